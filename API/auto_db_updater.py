@@ -20,6 +20,7 @@ genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 # Import from existing modules
 from config import CHROMA_DB_PATH, COLLECTION_NAME
+from index_generation import bump_generation
 
 class AutoDBUpdater:
     def __init__(self, db_path: str = None, collection_name: str = None):
@@ -193,6 +194,10 @@ class AutoDBUpdater:
             except Exception as e:
                 print(f"   ❌ Error adding batch {i//batch_size + 1}: {e}")
 
+        # Invalidate cached retrieval results in the API
+        if added_count:
+            bump_generation("auto_db_updater", self.db_path, self.collection_name, "models/text-embedding-004")
+
         return added_count
 
     def update_from_json_file(self, json_file: str) -> int:
@@ -0,0 +1,215 @@
+"""
+Latency comparison of the hybrid search pipelines with a stubbed Gemini
+Runs the same questions through HybridSearchEngine.search in hybrid mode (query rewrite,
+LLM knowledge, combination and filter: four serial Gemini calls) and one-shot mode (one
+structured-output call), and reports p50/p95 latency, Gemini calls per question and the
+mean of each step in source_info["timings_ms"] (in hybrid mode the LLM-knowledge branch runs
+alongside the query rewrite + retrieval branch).
+
+The Gemini model is replaced by a stub that sleeps like the real API: a fixed round trip
+(network + time to first token) plus a per-token generation time for the canned reply of
+each prompt, with random jitter. find_best_answer is a sleep returning a long database
+answer, so the numbers measure the LLM round trips only. No API key, Redis or databases
+are needed.
+
+Usage:
+    python benchmark_hybrid_modes.py
+    python benchmark_hybrid_modes.py --rtt 0.6 --per-token 0.008 --repeats 5
+    python benchmark_hybrid_modes.py --modes one_shot_hybrid
+"""
+
+import os
+
+# In-memory state and no answer cache, so every repeat runs the full pipeline
+os.environ["STATE_BACKEND"] = "memory"
+os.environ["CACHE_ENABLED"] = "false"
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+
+logging.basicConfig(level=logging.WARNING)
+
+import hybrid_search
+from search_config import SearchMode
+
+MODES = [SearchMode.HYBRID.value, SearchMode.ONE_SHOT_HYBRID.value]
+
+QUERIES = [
+    "What is EPR?",
+    "What documents are needed for EPR registration?",
+    "PRO registration process",
+    "What is category 1 plastic?",
+    "How do I buy EPR certificates from a PWP?",
+    "What are the penalties for not meeting EPR targets?",
+    "Who has to register as a brand owner?",
+    "What is ReCircle's office address?",
+]
+
+DB_ANSWER = (
+    "Extended Producer Responsibility (EPR) under the Plastic Waste Management Rules, 2016 makes producers, "
+    "importers and brand owners (PIBOs) responsible for collecting and processing the plastic packaging they "
+    "put on the market. PIBOs register on the CPCB centralized EPR portal with their GST, PAN, CIN and "
+    "consent documents, and meet category-wise targets for Category I (rigid), Category II (flexible), "
+    "Category III (multilayered) and Category IV (compostable) plastic by buying EPR certificates from "
+    "registered Plastic Waste Processors. Quarterly returns are due: Q1 (April-June): July 31; Q2 "
+    "(July-September): October 31; Q3 (October-December): January 31; Q4 (January-March): April 30. "
+    "The annual return for FY 2024-25 must be filed by January 31, 2026. Environmental compensation is "
+    "levied for unfulfilled targets. ReCircle, 5th Floor, Technocity, Mahape, Navi Mumbai, helps PIBOs "
+    "with registration, certificates and returns."
+)
+
+# Canned Gemini replies by prompt, sized like the real ones
+REWRITE_REPLY = "plastic waste EPR registration process for Producer Responsibility Organization"
+KNOWLEDGE_REPLY = (
+    "EPR (Extended Producer Responsibility) requires producers, importers and brand owners to take "
+    "responsibility for the plastic packaging they introduce, by registering on the CPCB portal, meeting "
+    "annual collection and recycling targets per plastic category, and buying EPR certificates from "
+    "registered processors. Non-compliance attracts environmental compensation."
+)
+COMBINED_REPLY = (
+    "EPR makes producers, importers and brand owners responsible for collecting and processing their plastic "
+    "packaging. They register on the CPCB portal and meet category-wise targets by buying EPR certificates "
+    "from registered Plastic Waste Processors; unmet targets attract environmental compensation."
+)
+FILTERED_REPLY = (
+    "EPR makes producers, importers and brand owners responsible for collecting and processing their plastic "
+    "packaging, registering on the CPCB portal and meeting category-wise targets with EPR certificates."
+)
+ONE_SHOT_REPLY = json.dumps({"rewritten_query": REWRITE_REPLY, "answer": FILTERED_REPLY})
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGeminiModel:
+    """generate_content that sleeps rtt + tokens * per_token (+/- jitter) and returns a canned reply"""
+
+    def __init__(self, rtt: float, per_token: float, jitter: float, seed: int):
+        self.rtt = rtt
+        self.per_token = per_token
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.output_tokens = 0
+
+    def _reply(self, prompt: str, generation_config) -> str:
+        if getattr(generation_config, "response_mime_type", None) == "application/json":
+            return ONE_SHOT_REPLY
+        if "rewrite it for better database search" in prompt:
+            return REWRITE_REPLY
+        if "As an EPR compliance expert" in prompt:
+            return KNOWLEDGE_REPLY
+        if "Create a direct answer" in prompt:
+            return COMBINED_REPLY
+        if "You are a content filter" in prompt:
+            return FILTERED_REPLY
+        raise ValueError(f"Unexpected prompt: {prompt[:80]}")
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        text = self._reply(prompt, generation_config)
+        tokens = max(1, len(text) // 4)
+        with self.lock:
+            self.calls += 1
+            self.output_tokens += tokens
+            factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep((self.rtt + tokens * self.per_token) * factor)
+        return StubResponse(text)
+
+
+def install_stubs(args) -> StubGeminiModel:
+    """Replace Gemini, the database search and the suggestions with stubs"""
+    model = StubGeminiModel(args.rtt, args.per_token, args.jitter, args.seed)
+    hybrid_search.hybrid_search_engine.model = model
+
+    def stub_find_best_answer(query, intent_result=None, previous_suggestions=None):
+        time.sleep(args.retrieval_delay)
+        return {"answer": DB_ANSWER, "suggestions": [], "source_info": {}}
+
+    hybrid_search.find_best_answer = stub_find_best_answer
+    hybrid_search.generate_related_questions = lambda query, results, intent_result=None, previous_suggestions=None: []
+    return model
+
+
+def run_mode(mode: str, model: StubGeminiModel, args) -> dict:
+    one_shot = mode == SearchMode.ONE_SHOT_HYBRID.value
+    latencies = []
+    answer_lengths = []
+    step_timings = {}
+    calls_before, tokens_before = model.calls, model.output_tokens
+    for _ in range(args.repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            result = hybrid_search.find_hybrid_answer(query, one_shot=one_shot)
+            latencies.append((time.perf_counter() - start) * 1000)
+            answer_lengths.append(len(result["answer"]))
+            for step, ms in result["source_info"].get("timings_ms", {}).items():
+                step_timings.setdefault(step, []).append(ms)
+    runs = len(latencies)
+    return {
+        "mode": mode,
+        "queries": runs,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.mean(latencies),
+        "gemini_calls_per_query": (model.calls - calls_before) / runs,
+        "output_tokens_per_query": (model.output_tokens - tokens_before) / runs,
+        "avg_answer_chars": statistics.mean(answer_lengths),
+        "mean_step_ms": {step: statistics.mean(values) for step, values in step_timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare hybrid and one-shot hybrid search latency with a stubbed Gemini")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES, help="Search modes to run")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the question set per mode")
+    parser.add_argument("--rtt", type=float, default=0.45, help="Seconds of network + time to first token per Gemini call")
+    parser.add_argument("--per-token", type=float, default=0.005, help="Seconds per generated token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random +/- fraction applied to each call's delay")
+    parser.add_argument("--retrieval-delay", type=float, default=0.15, help="Seconds per stubbed find_best_answer call")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the delay jitter")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    model = install_stubs(args)
+    reports = [run_mode(mode, model, args) for mode in args.modes]
+
+    print("=" * 72)
+    print(f"Hybrid search modes: {len(QUERIES)} questions x {args.repeats}, Gemini rtt={args.rtt}s "
+          f"+ {args.per_token * 1000:.1f} ms/token (±{args.jitter:.0%}), retrieval={args.retrieval_delay}s")
+    print("=" * 72)
+    print(f"{'mode':<18}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'calls/q':>9}{'tokens/q':>10}{'answer':>8}")
+    for report in reports:
+        print(f"{report['mode']:<18}{report['p50_ms']:>9.0f}{report['p95_ms']:>9.0f}{report['mean_ms']:>9.0f}"
+              f"{report['gemini_calls_per_query']:>9.1f}{report['output_tokens_per_query']:>10.0f}"
+              f"{report['avg_answer_chars']:>8.0f}")
+    for report in reports:
+        steps = ", ".join(f"{step} {ms:.0f}" for step, ms in report["mean_step_ms"].items())
+        print(f"  {report['mode']} steps (mean ms): {steps}")
+    if len(reports) == 2:
+        print(f"One-shot p50 speedup: {reports[0]['p50_ms'] / reports[1]['p50_ms']:.1f}x")
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "modes": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+int8 index vs float index vs ChromaDB benchmark
+Runs the non-timeline retrieval of find_best_answer on the same query embeddings through
+three backends and reports latency percentiles, memory and result agreement:
+
+    chroma         search_collections_serial over the collection registry
+    serving_index  float32 serving index (RETRIEVAL_BACKEND=serving_index)
+    int8           int8 shortlist + float re-scoring (RETRIEVAL_BACKEND=int8)
+
+Memory is the size of what each backend keeps in RAM for scoring: the HNSW segment files
+Chroma loads for each collection, the float32 matrix, and the int8 matrix plus its scales.
+Agreement is measured against Chroma (overlap of returned chunks) and between the int8
+and float indexes (identical results).
+
+Build the index first: python serving_index.py build
+
+Usage:
+    python benchmark_int8_index.py --repeats 5
+    python benchmark_int8_index.py --random --repeats 20
+"""
+
+import argparse
+import os
+import statistics
+import time
+from config import DB_PRIORITY_ORDER, INT8_RESCORE_CANDIDATES
+from search import collection_registry, search_collections_serial
+from serving_index import serving_index
+from benchmark_retrieval_modes import DEFAULT_QUERIES, percentile, embed_queries, result_signature
+
+# Files Chroma memory-maps or loads for each HNSW segment
+HNSW_FILES = ("data_level0.bin", "link_lists.bin", "length.bin", "header.bin", "index_metadata.pickle")
+
+
+def chroma_index_bytes() -> int:
+    """Bytes of HNSW segment files across all configured databases"""
+    total = 0
+    for db_config in DB_PRIORITY_ORDER:
+        for root, _, files in os.walk(db_config["path"]):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files if name in HNSW_FILES)
+    return total
+
+
+def result_keys(results):
+    return {(r['collection'], str(r['chunk_id'])) for r in results}
+
+
+def run_backend(search_func, embeddings, repeats):
+    latencies, outputs = [], []
+    for _ in range(repeats):
+        for embedding in embeddings:
+            start = time.perf_counter()
+            results, _ = search_func(embedding)
+            latencies.append((time.perf_counter() - start) * 1000)
+            outputs.append(results)
+    return latencies, outputs
+
+
+def main(args):
+    if not serving_index.is_available():
+        raise SystemExit("Serving index not built - run: python serving_index.py build")
+
+    queries = DEFAULT_QUERIES[:args.queries]
+    embeddings = embed_queries(queries, args.random)
+
+    collection_registry.load()
+    ordered_collections = collection_registry.get_ordered(exclude_udb=True)
+    backends = {
+        "chroma": lambda e: search_collections_serial(ordered_collections, e),
+        "serving_index": lambda e: serving_index.search(e),
+        "int8": lambda e: serving_index.search(e, quantized=True),
+    }
+    # Warm up: load HNSW segments, map the float matrix, load the int8 copy
+    for search_func in backends.values():
+        search_func(embeddings[0])
+
+    report = {name: run_backend(func, embeddings, args.repeats) for name, func in backends.items()}
+    stats = serving_index.get_stats()
+
+    print("=" * 70)
+    print(f"Index benchmark: {len(queries)} queries x {args.repeats} repeats, "
+          f"{'random' if args.random else 'Gemini'} embeddings, "
+          f"{stats['rows']} rows x {stats['dimensions']} dims, rescore {INT8_RESCORE_CANDIDATES}/collection")
+    print("=" * 70)
+    for name, (latencies, _) in report.items():
+        print(f"{name:<14} p50 {percentile(latencies, 50):7.2f} ms | p95 {percentile(latencies, 95):7.2f} ms | "
+              f"mean {statistics.mean(latencies):7.2f} ms")
+    print("-" * 70)
+    print(f"Memory  chroma HNSW files {chroma_index_bytes() / 1e6:8.2f} MB")
+    print(f"        float32 matrix    {stats['embedding_bytes'] / 1e6:8.2f} MB")
+    print(f"        int8 + scales     {stats['int8_bytes'] / 1e6:8.2f} MB")
+    print("-" * 70)
+
+    chroma_outputs = report["chroma"][1]
+    for name in ("serving_index", "int8"):
+        outputs = report[name][1]
+        overlaps = [
+            len(result_keys(ours) & result_keys(theirs)) / len(result_keys(theirs))
+            for ours, theirs in zip(outputs, chroma_outputs) if theirs
+        ]
+        print(f"{name:<14} overlap with chroma {statistics.mean(overlaps) if overlaps else 0.0:.3f}")
+    identical = sum(
+        result_signature(a) == result_signature(b)
+        for a, b in zip(report["int8"][1], report["serving_index"][1])
+    )
+    print(f"int8 identical to float index: {identical}/{len(report['int8'][1])}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare int8, float32 and ChromaDB retrieval")
+    parser.add_argument("--queries", type=int, default=len(DEFAULT_QUERIES), help="Number of sample queries")
+    parser.add_argument("--repeats", type=int, default=5, help="Times each query is searched per backend")
+    parser.add_argument("--random", action="store_true", help="Use random embeddings instead of calling Gemini")
+    main(parser.parse_args())
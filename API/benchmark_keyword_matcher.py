@@ -0,0 +1,148 @@
+"""
+Keyword matching micro-benchmark
+Times the per-turn keyword work (intent analysis, engagement score, context extraction,
+fallback topic and off-topic checks) through the shared keyword matcher against the
+previous per-list `keyword in text` scans, over conversations of growing length, and checks
+that both produce the same intent, engagement score and context.
+
+Usage:
+    python benchmark_keyword_matcher.py
+    python benchmark_keyword_matcher.py --turns 200 --iterations 20
+"""
+
+import argparse
+import random
+import statistics
+import time
+import keyword_matcher as keyword_matcher_module
+from intent_detector import intent_detector
+from context_manager import context_manager
+from search import get_fallback_questions, FALLBACK_TOPIC_KEYWORDS
+from benchmark_retrieval_modes import percentile
+
+# Same table main.py registers (main is not imported here)
+OFF_TOPIC_KEYWORDS = ['weather', 'sports', 'movie', 'music', 'food', 'game', 'joke', 'story', 'news', 'politics']
+keyword_matcher_module.keyword_matcher.register('off_topic', {'off_topic': OFF_TOPIC_KEYWORDS})
+
+SAMPLE_MESSAGES = [
+    "What is EPR and who needs to comply?",
+    "We are a manufacturer of packaged food products in Mumbai",
+    "How do I register on the CPCB portal for plastic packaging?",
+    "What are the penalties for non-compliance, we have an audit soon",
+    "Our company produces around 500 tons of multilayered plastic every year",
+    "Can you explain the process for buying EPR certificates and the pricing?",
+    "When is the annual return deadline for FY 2024-25?",
+    "I need help with documentation and the registration requirements",
+    "Is there a quick way to fulfill our EPR target this quarter?",
+    "Who can help me with the filing, it is urgent",
+]
+
+
+ENGAGEMENT_WEIGHTS = {'business_context': 2.0, 'urgency_signals': 1.5, 'service_interest': 1.8, 'compliance_focus': 1.6,
+                      'decision_signals': 2.5, 'technical_questions': 2.0, 'risk_indicators': 3.0}
+
+
+def legacy_engagement(query_lower: str, history: list) -> float:
+    """_calculate_engagement_score before the matcher: every indicator list scanned against every user message"""
+    score = 0
+    all_queries = [m.get('text', '').lower() for m in history if m.get('role') == 'user'] + [query_lower]
+    for text in all_queries:
+        for category, indicators in intent_detector.engagement_indicators.items():
+            for indicator in indicators:
+                if indicator in text:
+                    score += ENGAGEMENT_WEIGHTS.get(category, 1.0)
+    return min(score, 10.0)
+
+
+def legacy_turn(query: str, history: list) -> tuple:
+    """The scans analyze_intent, extract_context, get_fallback_questions and main.py ran before the matcher"""
+    query_lower = query.lower()
+
+    # analyze_intent: intent patterns, engagement score and connection keywords
+    intent_scores = {}
+    for intent_type, patterns in intent_detector.intent_patterns.items():
+        score = sum(patterns['weight'] for k in patterns['keywords'] if k in query_lower)
+        score += sum(patterns['weight'] * 1.2 for p in patterns['phrases'] if p in query_lower)
+        if score > 0:
+            intent_scores[intent_type] = score
+    intent = max(intent_scores, key=intent_scores.get) if intent_scores else 'general_inquiry'
+    legacy_engagement(query_lower, history)
+    for keywords in intent_detector.connection_keywords.values():
+        any(k in query_lower for k in keywords)
+
+    # main.py computes the engagement score again for lead tracking
+    engagement = legacy_engagement(query_lower, history)
+
+    all_text = query_lower
+    for m in history:
+        if m.get('role') == 'user':
+            all_text += ' ' + m.get('text', '').lower()
+
+    def first(table):
+        return next((name for name, keywords in table.items() if any(k in all_text for k in keywords)), None)
+
+    context = (
+        first(context_manager.industry_keywords),
+        first(context_manager.company_size_indicators),
+        first(context_manager.urgency_levels) or 'low',
+        next((loc.title() for loc in context_manager.locations if loc in all_text), None),
+    )
+    topic = next((t for t, keywords in FALLBACK_TOPIC_KEYWORDS.items() if any(k in query_lower for k in keywords)), None)
+    off_topic = any(k in query_lower for k in OFF_TOPIC_KEYWORDS)
+    return intent, engagement, context, topic, off_topic
+
+
+def matcher_turn(query: str, history: list) -> tuple:
+    query_lower = query.lower()
+    intent = intent_detector.analyze_intent(query, history).intent
+    engagement = intent_detector._calculate_engagement_score(query_lower, history)
+    ctx = context_manager.extract_context(query, history)
+    get_fallback_questions(query)
+    hits = keyword_matcher_module.keyword_matcher.scan(query_lower)
+    context = (ctx['industry'], ctx['company_size'], ctx['urgency'], ctx['location'])
+    return intent, engagement, context, hits.first('fallback_topics', FALLBACK_TOPIC_KEYWORDS), hits.any('off_topic', 'off_topic')
+
+
+def run_conversation(turn_func, turns: int, seed: int):
+    """Per-turn latencies (us) and outputs for one simulated conversation"""
+    rng = random.Random(seed)
+    history, latencies, outputs = [], [], []
+    for _ in range(turns):
+        query = rng.choice(SAMPLE_MESSAGES)
+        start = time.perf_counter()
+        outputs.append(turn_func(query, history))
+        latencies.append((time.perf_counter() - start) * 1e6)
+        history.append({'role': 'user', 'text': query})
+        history.append({'role': 'assistant', 'text': "EPR answer text " * 20})
+    return latencies, outputs
+
+
+def main(args):
+    print("=" * 70)
+    print(f"Keyword matching per turn: {args.turns}-turn conversations x {args.iterations}")
+    print(f"Backend: {'pyahocorasick' if keyword_matcher_module.ahocorasick else 'pure Python automaton'}")
+    print("=" * 70)
+
+    report = {}
+    for name, turn_func in (("any() scans", legacy_turn), ("matcher", matcher_turn)):
+        latencies, outputs = [], []
+        for i in range(args.iterations):
+            run_latencies, run_outputs = run_conversation(turn_func, args.turns, seed=i)
+            latencies.extend(run_latencies)
+            outputs.append(run_outputs)
+        report[name] = (latencies, outputs)
+        late_turns = [lat for i, lat in enumerate(latencies) if i % args.turns >= args.turns - 10]
+        print(f"{name:<12} p50 {percentile(latencies, 50):8.1f} us | p95 {percentile(latencies, 95):8.1f} us | "
+              f"mean {statistics.mean(latencies):8.1f} us | last 10 turns {statistics.mean(late_turns):8.1f} us")
+
+    speedup = statistics.mean(report["any() scans"][0]) / statistics.mean(report["matcher"][0])
+    print(f"Speedup: {speedup:.1f}x")
+    print(f"Identical results: {'yes' if report['any() scans'][1] == report['matcher'][1] else 'NO'}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared keyword matcher")
+    parser.add_argument("--turns", type=int, default=100, help="User turns per conversation")
+    parser.add_argument("--iterations", type=int, default=10, help="Conversations per implementation")
+    main(parser.parse_args())
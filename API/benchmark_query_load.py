@@ -0,0 +1,133 @@
+"""
+Load test for /query with a stubbed slow LLM
+Fires N concurrent sessions at the FastAPI app in-process and reports p50/p95/p99
+latency, plus the latency of "/" measured while the LLM calls are in flight.
+
+Search and Gemini calls are replaced with sleeps so the numbers reflect the
+serving layer only. Redis must be running (docker-compose up redis).
+
+Usage:
+    python benchmark_query_load.py --sessions 50 --queries 3 --llm-delay 2.0
+    python benchmark_query_load.py --blocking   # old behaviour: calls run on the event loop
+    python benchmark_query_load.py --same-question   # every session asks the same questions (single-flight)
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from search_config import get_search_config, SearchMode
+import main
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def install_stubs(retrieval_delay: float, llm_delay: float, blocking: bool):
+    """Replace search and Gemini calls in main with slow stubs"""
+    def stub_find_best_answer(query, intent_result=None, previous_suggestions=None):
+        time.sleep(retrieval_delay)
+        return {"answer": f"Stub database answer for {query}", "suggestions": ["Connect me to ReCircle"], "source_info": {}}
+
+    def stub_refine_with_gemini(user_name, query, raw_answer, history, is_first_message=False, session_id=None, source_info=None):
+        time.sleep(llm_delay)
+        from intent_detector import intent_detector
+        return f"Stub refined answer for {query}", intent_detector.analyze_intent(query, history), {}
+
+    def stub_find_hybrid_answer(query, intent_result=None, previous_suggestions=None, session_id=None, one_shot=False):
+        time.sleep(retrieval_delay + llm_delay)
+        return {"answer": f"Stub hybrid answer for {query}", "suggestions": ["Connect me to ReCircle"], "source_info": {}}
+
+    main.find_best_answer = stub_find_best_answer
+    main.refine_with_gemini = stub_refine_with_gemini
+    main.find_hybrid_answer = stub_find_hybrid_answer
+
+    if blocking:
+        async def run_inline(stage, func, *args, **kwargs):
+            return func(*args, **kwargs)
+        main.run_blocking = run_inline
+
+
+async def run_session(app, session_index: int, queries: int, latencies: list, errors: list, same_question: bool = False):
+    """One user: create a session, then ask questions back to back"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+        await client.post("/session")
+        history = []
+        for i in range(queries):
+            text = f"What is EPR compliance question {i}?" if same_question else f"What is EPR compliance question {i} from session {session_index}?"
+            start = time.perf_counter()
+            response = await client.post("/query", json={"text": text, "history": history})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+            history.append({"role": "user", "text": text})
+            history.append({"role": "bot", "text": response.json()["answer"]})
+
+
+async def probe_health(app, stop: asyncio.Event, latencies: list):
+    """Hit "/" every 50ms to show the loop keeps serving while LLM calls are in flight"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.get("/")
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.05)
+
+
+async def run_load_test(args):
+    install_stubs(args.retrieval_delay, args.llm_delay, args.blocking)
+    get_search_config().set_search_mode(SearchMode(args.mode))
+
+    query_latencies, health_latencies, errors = [], [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_health(main.app, stop, health_latencies))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_session(main.app, i, args.queries, query_latencies, errors, args.same_question)
+        for i in range(args.sessions)
+    ])
+    wall_time = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    main.execution_pools.shutdown()
+    counters = main.metrics.get_stats()["counters"]
+
+    print("=" * 60)
+    print(f"Load test: {args.sessions} sessions x {args.queries} queries, mode={args.mode}, "
+          f"llm_delay={args.llm_delay}s, {'BLOCKING' if args.blocking else 'execution pools'}")
+    print("=" * 60)
+    print(f"Requests:        {len(query_latencies)} ({len(errors)} errors: {sorted(set(errors))})")
+    print(f"Wall time:       {wall_time:.2f}s")
+    print(f"Throughput:      {len(query_latencies) / wall_time:.1f} req/s")
+    print(f"/query p50:      {percentile(query_latencies, 50):.0f} ms")
+    print(f"/query p95:      {percentile(query_latencies, 95):.0f} ms")
+    print(f"/query p99:      {percentile(query_latencies, 99):.0f} ms")
+    print(f"/query mean:     {statistics.mean(query_latencies):.0f} ms")
+    print(f"/ p99 under load: {percentile(health_latencies, 99):.1f} ms ({len(health_latencies)} probes)")
+    print(f"Searches run:    {counters.get('single_flight_leader', 0)} "
+          f"(shared: {counters.get('single_flight_shared_local', 0)} local, {counters.get('single_flight_shared_redis', 0)} redis)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /query against a stubbed slow LLM")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent sessions")
+    parser.add_argument("--queries", type=int, default=3, help="Questions per session")
+    parser.add_argument("--llm-delay", type=float, default=2.0, help="Seconds per stubbed LLM call")
+    parser.add_argument("--retrieval-delay", type=float, default=0.2, help="Seconds per stubbed retrieval call")
+    parser.add_argument("--mode", default="traditional", choices=[m.value for m in SearchMode], help="Search mode to exercise")
+    parser.add_argument("--blocking", action="store_true", help="Run calls inline on the event loop (pre-pool behaviour)")
+    parser.add_argument("--same-question", action="store_true", help="All sessions ask identical questions to exercise single-flight coalescing")
+    asyncio.run(run_load_test(parser.parse_args()))
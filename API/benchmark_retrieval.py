@@ -0,0 +1,325 @@
+"""
+Offline retrieval benchmark
+Replays the recorded query set in data/retrieval_benchmark.json through find_best_answer
+against fixture ChromaDB databases built from the same file (one per configured database,
+same collection names and distance spaces), with the Gemini embedding replaced by a
+deterministic hashed bag-of-words stub. Reports:
+- per-database query latency and how often each database was searched
+- early-stop rate of the priority search
+- recall@k of the labelled documents in the ranked results
+- overall p50/p95 latency and the retrieval path taken (vector, fused, lexical, timeline_lookup)
+- average answer length (the text refine_with_gemini receives), to compare --no-dedup runs
+
+With --embedding-backend local the fixtures also get their local-model collections (built by
+local_embeddings.py with the real LOCAL_EMBEDDING_MODEL, which must be installed) and queries
+go through the local path, to calibrate LOCAL_EARLY_STOP_THRESHOLD and LOCAL_DISTANCE_THRESHOLD.
+
+No Gemini key, Redis or production database is used, so the run is reproducible offline:
+recall and early-stop numbers only change when the code or the query file does. The query
+file sets the early-stop threshold for the stub embeddings, and the run exits non-zero if
+more than one database tier was never searched (the fixtures no longer test the priority order).
+
+Usage:
+    python benchmark_retrieval.py
+    python benchmark_retrieval.py --repeats 10 --k 5 --mode parallel
+    python benchmark_retrieval.py --no-bm25 --early-stop-threshold 0.6 --json before.json
+    python benchmark_retrieval.py --no-priority --no-dedup
+    python benchmark_retrieval.py --embedding-backend local --early-stop-threshold 0.35
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUERY_FILE = os.path.join(BASE_DIR, "data", "retrieval_benchmark.json")
+
+EMBEDDING_DIM = 768
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+STUB_STOPWORDS = {
+    "a", "an", "the", "is", "are", "of", "to", "in", "on", "for", "and", "or", "by", "with", "as",
+    "at", "from", "it", "its", "this", "that", "what", "which", "who", "how", "do", "does", "i", "we",
+    "you", "my", "our", "can", "should", "will", "under", "be", "must", "need", "needed", "there",
+}
+
+
+def _stub_tokens(text: str) -> list:
+    """Lowercased words with a plural "s" stripped, plus adjacent-word bigrams"""
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") else w
+             for w in TOKEN_PATTERN.findall(text.lower()) if w not in STUB_STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def stub_embedding(text: str) -> list:
+    """
+    Deterministic stand-in for gemini-embedding-001: each token is hashed (blake2b, so the
+    same in every process) to a signed dimension; the vector is L2-normalized. Texts that
+    share words get a high cosine similarity, which is enough to rank the fixture corpus.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in _stub_tokens(text):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def configure_environment(args, corpus: dict, fixture_dir: str):
+    """Point every path the search stack reads at the fixture directory (before config is imported)"""
+    for i in range(1, 7):
+        os.environ[f"CHROMA_DB_PATH_{i}"] = os.path.join(fixture_dir, f"db{i}")
+    os.environ.update({
+        "INDEX_GENERATION_PATH": os.path.join(fixture_dir, "index_generation.json"),
+        "BM25_INDEX_PATH": os.path.join(fixture_dir, "bm25_index.json"),
+        "KNOWLEDGE_CSV_PATH": os.path.join(fixture_dir, "knowledge.csv"),  # absent: fixture documents only
+        "SERVING_INDEX_DIR": os.path.join(fixture_dir, "serving_index"),
+        "RETRIEVAL_BACKEND": "chroma",
+        "RETRIEVAL_MODE": args.mode,
+        "QUERY_EMBEDDING_BACKEND": args.embedding_backend,
+        "LOCAL_EMBEDDING_FALLBACK": "false",
+        "EMBEDDING_CACHE_REDIS": "false",
+        "RETRIEVAL_CACHE_ENABLED": "true" if args.cache else "false",
+        "BM25_ENABLED": "false" if args.no_bm25 else "true",
+        "ENABLE_PRIORITY_SEARCH": "false" if args.no_priority else "true",
+        "DEDUP_ENABLED": "false" if args.no_dedup else "true",
+        "CANONICAL_ANSWERS_ENABLED": "false",  # retrieval only: no curated-answer shortcut
+    })
+    if args.early_stop_threshold is not None:
+        threshold_var = "LOCAL_EARLY_STOP_THRESHOLD" if args.embedding_backend == "local" else "EARLY_STOP_THRESHOLD"
+        os.environ[threshold_var] = str(args.early_stop_threshold)
+    elif args.embedding_backend == "gemini" and "early_stop_threshold" in corpus:
+        # Calibrated for stub_embedding distances, not the real Gemini ones
+        os.environ["EARLY_STOP_THRESHOLD"] = str(corpus["early_stop_threshold"])
+
+
+def build_fixtures(corpus: dict):
+    """One fixture database per configured path, holding that database's documents"""
+    import chromadb
+    import config
+
+    for path_name, database in corpus["databases"].items():
+        db_path = getattr(config, path_name)
+        client = chromadb.PersistentClient(path=db_path)
+        for collection_name in config.COLLECTIONS[db_path]:
+            try:
+                client.delete_collection(collection_name)
+            except Exception:
+                pass
+            # The UDB collection is created without a space (l2) in recreate_udb.py, the others use cosine
+            space = database.get("hnsw_space", "l2")
+            collection = client.create_collection(
+                name=collection_name, metadata={"hnsw:space": space} if space != "l2" else None
+            )
+            documents = database["documents"]
+            collection.add(
+                ids=[doc["doc_id"] for doc in documents],
+                documents=[doc["text"] for doc in documents],
+                embeddings=[stub_embedding(doc["text"]) for doc in documents],
+                metadatas=[{**doc.get("metadata", {}), "doc_id": doc["doc_id"], "chunk_id": i}
+                           for i, doc in enumerate(documents)],
+            )
+
+
+class Tracer:
+    """Wraps search internals to record per-database latency, early stops and the ranked results"""
+
+    def __init__(self, search_module):
+        self.search = search_module
+        self.db_latencies = defaultdict(list)
+        self.current = None
+        # With priority search off, find_best_answer labels every database "unknown"
+        self.db_paths = {
+            c["collection_key"]: c["db_path"]
+            for registry in (search_module.collection_registry, search_module.local_collection_registry)
+            for c in registry.get_ordered()
+        }
+
+        query_collection = search_module._query_collection
+        accept_results = search_module._accept_collection_results
+        related_questions = search_module.generate_related_questions
+
+        def timed_query_collection(col_info, query_embedding):
+            start = time.perf_counter()
+            try:
+                return query_collection(col_info, query_embedding)
+            finally:
+                db_path = self.db_paths.get(col_info["collection_key"], col_info["db_path"])
+                self.db_latencies[db_path].append((time.perf_counter() - start) * 1000)
+                if self.current is not None:
+                    self.current["queried"] += 1
+
+        def traced_accept(*args, **kwargs):
+            stopped = accept_results(*args, **kwargs)
+            if self.current is not None:
+                self.current["early_stop"] |= stopped
+            return stopped
+
+        def traced_related_questions(user_query, search_results=None, *args, **kwargs):
+            # find_best_answer passes its final ranking (sorted, thresholded, fused) here
+            if self.current is not None and search_results:
+                self.current["ranked"] = [(r.get("metadata") or {}).get("doc_id") for r in search_results]
+            return related_questions(user_query, search_results, *args, **kwargs)
+
+        search_module._query_collection = timed_query_collection
+        search_module._accept_collection_results = traced_accept
+        search_module.generate_related_questions = traced_related_questions
+
+    def run(self, query: str) -> dict:
+        self.current = {"queried": 0, "early_stop": False, "ranked": []}
+        start = time.perf_counter()
+        response = self.search.find_best_answer(query)
+        trace, self.current = self.current, None
+        trace["latency_ms"] = (time.perf_counter() - start) * 1000
+        trace["path"] = response["source_info"].get("retrieval", "no_match")
+        trace["answer_chars"] = len(response["answer"])
+        return trace
+
+
+def recall_at_k(ranked: list, relevant: list, k: int) -> float:
+    return len(set(ranked[:k]) & set(relevant)) / len(relevant) if relevant else 0.0
+
+
+def main(args):
+    with open(args.queries, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    fixture_dir = args.fixture_dir or tempfile.mkdtemp(prefix="retrieval_benchmark_")
+    configure_environment(args, corpus, fixture_dir)
+    build_fixtures(corpus)
+    if args.embedding_backend == "local":
+        from local_embeddings import build_local_collections
+        build_local_collections()
+
+    if not args.verbose:
+        logging.basicConfig(level=logging.WARNING)  # search.py's basicConfig(INFO) is then a no-op
+    import search
+    from config import DB_PRIORITY_ORDER
+    from metrics import metrics
+    search.embed_query = stub_embedding
+    registry = search.local_collection_registry if args.embedding_backend == "local" else search.collection_registry
+    early_stop_threshold, distance_threshold = search.distance_thresholds(registry, False)
+    tracer = Tracer(search)
+
+    queries = corpus["queries"]
+    for _ in range(args.warmup):
+        for item in queries:
+            tracer.run(item["query"])
+    tracer.db_latencies.clear()
+
+    traces = []
+    for _ in range(args.repeats):
+        for item in queries:
+            traces.append((item, tracer.run(item["query"])))
+
+    if not args.fixture_dir:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    first_pass = traces[:len(queries)]
+    recalls = [recall_at_k(trace["ranked"], item["relevant"], args.k) for item, trace in first_pass]
+    vector_searches = [trace for _, trace in traces if trace["queried"]]
+    latencies = [trace["latency_ms"] for _, trace in traces]
+    paths = Counter(trace["path"] for _, trace in first_pass)
+    answer_chars = statistics.mean(trace["answer_chars"] for _, trace in first_pass)
+
+    print("=" * 78)
+    print(f"Retrieval benchmark: {len(queries)} recorded queries x {args.repeats} repeats, "
+          f"{args.mode} mode, BM25 {'off' if args.no_bm25 else 'on'}, {args.embedding_backend} embeddings, "
+          f"early stop < {early_stop_threshold}, valid match <= {distance_threshold}")
+    print("=" * 78)
+    print(f"{'Database':<46} {'searches':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for entry in DB_PRIORITY_ORDER:
+        samples = tracer.db_latencies.get(entry["path"], [])
+        print(f"{entry['priority']}. {entry['description'][:43]:<43} {len(samples):>8} "
+              f"{percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f}")
+    print("-" * 78)
+    early_stops = sum(trace["early_stop"] for trace in vector_searches)
+    print(f"Priority searches: {len(vector_searches)} | early stop rate "
+          f"{early_stops / len(vector_searches) if vector_searches else 0.0:.1%} | avg databases queried "
+          f"{statistics.mean(t['queried'] for t in vector_searches) if vector_searches else 0.0:.2f}")
+    print(f"Retrieval paths: {', '.join(f'{path} {count}' for path, count in sorted(paths.items()))}")
+    print(f"recall@{args.k}: {statistics.mean(recalls):.3f} | "
+          f"queries with a labelled hit: {sum(r > 0 for r in recalls)}/{len(recalls)}")
+    print(f"Answer length: {answer_chars:.0f} chars (~{answer_chars / 4:.0f} tokens) | "
+          f"near-duplicates skipped: {metrics.get_counter('dedup_dropped') // (args.warmup + args.repeats)}")
+    print(f"find_best_answer: p50 {percentile(latencies, 50):.2f} ms | p95 {percentile(latencies, 95):.2f} ms | "
+          f"mean {statistics.mean(latencies):.2f} ms")
+    # The timeline lookup answers UDB questions without a vector search, so one idle tier is expected
+    unsearched = [entry["description"] for entry in DB_PRIORITY_ORDER if not tracer.db_latencies.get(entry["path"])]
+    if len(unsearched) > 1:
+        print(f"FAIL: {len(unsearched)} database tiers were never searched: {', '.join(unsearched)}")
+    if args.show_misses:
+        for (item, trace), recall in zip(first_pass, recalls):
+            if recall < 1.0:
+                print(f"  recall {recall:.2f} [{trace['path']}] {item['query']} -> {trace['ranked'][:args.k]}")
+    print("=" * 78)
+
+    if args.json:
+        report = {
+            "queries": len(queries),
+            "repeats": args.repeats,
+            "mode": args.mode,
+            "bm25": not args.no_bm25,
+            "embedding_backend": args.embedding_backend,
+            "early_stop_threshold": early_stop_threshold,
+            "distance_threshold": distance_threshold,
+            "databases": {
+                entry["description"]: {
+                    "searches": len(tracer.db_latencies.get(entry["path"], [])),
+                    "p50_ms": round(percentile(tracer.db_latencies.get(entry["path"], []), 50), 3),
+                    "p95_ms": round(percentile(tracer.db_latencies.get(entry["path"], []), 95), 3),
+                }
+                for entry in DB_PRIORITY_ORDER
+            },
+            "early_stop_rate": round(early_stops / len(vector_searches), 4) if vector_searches else 0.0,
+            "unsearched_databases": unsearched,
+            "paths": dict(paths),
+            f"recall_at_{args.k}": round(statistics.mean(recalls), 4),
+            "answer_chars": round(answer_chars, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    return 1 if len(unsearched) > 1 else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline retrieval latency and recall benchmark")
+    parser.add_argument("--queries", default=DEFAULT_QUERY_FILE, help="Fixture corpus and labelled query set (JSON)")
+    parser.add_argument("--repeats", type=int, default=5, help="Times the query set is replayed")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes before measuring")
+    parser.add_argument("--k", type=int, default=3, help="Cut-off for recall@k")
+    parser.add_argument("--mode", choices=["serial", "parallel"], default="serial", help="RETRIEVAL_MODE")
+    parser.add_argument("--no-bm25", action="store_true", help="Disable the BM25 index (fusion and fast path)")
+    parser.add_argument("--no-priority", action="store_true", help="Disable priority search / early stopping")
+    parser.add_argument("--embedding-backend", choices=["gemini", "local"], default="gemini",
+                        help="gemini: stub embeddings on the main collections, local: the local model and its collections")
+    parser.add_argument("--early-stop-threshold", type=float,
+                        help="Override EARLY_STOP_THRESHOLD (LOCAL_EARLY_STOP_THRESHOLD with --embedding-backend local)")
+    parser.add_argument("--no-dedup", action="store_true", help="Join the top 3 chunks without the near-duplicate filter")
+    parser.add_argument("--cache", action="store_true", help="Keep the retrieval result cache enabled")
+    parser.add_argument("--fixture-dir", help="Build the fixture databases here and keep them (default: temp dir)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--show-misses", action="store_true", help="List queries with recall below 1")
+    parser.add_argument("--verbose", action="store_true", help="Keep the search INFO logs")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""
+Serial vs parallel retrieval benchmark
+Runs the priority-ordered database search of find_best_answer in both RETRIEVAL_MODEs
+over the same query embeddings and reports latency percentiles, databases searched,
+and whether both modes returned identical results.
+
+Embeddings are computed once per query before timing starts, so only the ChromaDB
+queries are measured. Use --random to skip Gemini and search with random unit vectors
+(every query then misses the early-stop threshold, which is the serial worst case).
+
+Usage:
+    python benchmark_retrieval_modes.py --repeats 5
+    python benchmark_retrieval_modes.py --random --repeats 20
+"""
+
+import argparse
+import random
+import statistics
+import time
+import google.generativeai as genai
+from search import collection_registry, search_collections_serial, search_collections_parallel
+from execution_pools import execution_pools
+
+DEFAULT_QUERIES = [
+    "What is EPR and who needs to comply?",
+    "How do I register as a PIBO on the CPCB portal?",
+    "What are the recycling targets for category 1 plastic packaging?",
+    "What documents are needed for EPR registration?",
+    "What is the penalty for not filing annual returns?",
+    "How are EPR certificates traded?",
+    "What is the difference between a producer and a brand owner?",
+    "Are compostable plastics covered under EPR?",
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def embed_queries(queries, use_random: bool):
+    """One embedding per query (random unit vectors with --random)"""
+    embeddings = []
+    for query in queries:
+        if use_random:
+            vector = [random.gauss(0, 1) for _ in range(768)]
+            norm = sum(v * v for v in vector) ** 0.5
+            embeddings.append([v / norm for v in vector])
+        else:
+            result = genai.embed_content(
+                model="models/gemini-embedding-001",
+                content=query,
+                task_type="retrieval_query",
+                output_dimensionality=768
+            )
+            embeddings.append(result['embedding'])
+    return embeddings
+
+
+def result_signature(results):
+    """Comparable view of a result list (collection, chunk, rounded distance)"""
+    return sorted((r['collection'], str(r['chunk_id']), round(r['distance'], 6)) for r in results)
+
+
+def run_mode(search_func, ordered_collections, embeddings, repeats):
+    latencies, searched_counts, signatures = [], [], []
+    for _ in range(repeats):
+        for embedding in embeddings:
+            start = time.perf_counter()
+            results, searched = search_func(ordered_collections, embedding)
+            latencies.append((time.perf_counter() - start) * 1000)
+            searched_counts.append(len(searched))
+            signatures.append(result_signature(results))
+    return latencies, searched_counts, signatures
+
+
+def main(args):
+    queries = DEFAULT_QUERIES[:args.queries]
+    embeddings = embed_queries(queries, args.random)
+
+    collection_registry.load()
+    ordered_collections = collection_registry.get_ordered(exclude_udb=True)
+    print(f"Databases in priority order: {len(ordered_collections)}")
+
+    # Warm up HNSW indexes so neither mode pays the first-load cost
+    search_collections_serial(ordered_collections, embeddings[0])
+
+    report = {}
+    for name, func in (("serial", search_collections_serial), ("parallel", search_collections_parallel)):
+        report[name] = run_mode(func, ordered_collections, embeddings, args.repeats)
+
+    execution_pools.shutdown()
+
+    print("=" * 60)
+    print(f"Retrieval benchmark: {len(queries)} queries x {args.repeats} repeats, "
+          f"{'random' if args.random else 'Gemini'} embeddings")
+    print("=" * 60)
+    for name, (latencies, searched_counts, _) in report.items():
+        print(f"{name:<9} p50 {percentile(latencies, 50):7.1f} ms | p95 {percentile(latencies, 95):7.1f} ms | "
+              f"mean {statistics.mean(latencies):7.1f} ms | avg DBs searched {statistics.mean(searched_counts):.1f}")
+    identical = report["serial"][2] == report["parallel"][2]
+    print(f"Identical results: {'yes' if identical else 'NO'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare serial and parallel retrieval latency")
+    parser.add_argument("--queries", type=int, default=len(DEFAULT_QUERIES), help="Number of sample queries")
+    parser.add_argument("--repeats", type=int, default=5, help="Times each query is searched per mode")
+    parser.add_argument("--random", action="store_true", help="Use random embeddings instead of calling Gemini")
+    main(parser.parse_args())
@@ -0,0 +1,97 @@
+"""
+Suggestion generation micro-benchmark
+Times generate_related_questions (served from the in-memory FAQ index) against the
+previous implementation, which re-read and re-parsed data/epr_faqs.csv up to twice per
+call, and checks that both return the same suggestions.
+
+Usage:
+    python benchmark_suggestions.py
+    python benchmark_suggestions.py --iterations 5000
+"""
+
+import argparse
+import csv
+import statistics
+import time
+import search
+from config import FAQ_CSV_PATH
+from benchmark_retrieval_modes import percentile
+
+SAMPLE_QUERIES = [
+    "What is EPR?",
+    "How do I register for EPR on the CPCB portal?",
+    "What are the penalties for EPR non-compliance?",
+    "Where can I buy EPR certificates?",
+    "annual return filing deadline",
+    "Tell me about multilayered plastic packaging targets",
+    "Who can help me with compliance?",
+    "random words that match nothing",
+]
+
+
+def csv_scan_faq_questions(user_query: str, previous_suggestions: list = None) -> list:
+    """The per-request CSV scan that get_faq_questions used before the FAQ index"""
+    previous_suggestions = previous_suggestions or []
+    query_lower = user_query.lower()
+    query_words = set(query_lower.split())
+    scored_questions = []
+    with open(FAQ_CSV_PATH, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            keywords = row.get('keywords', '').lower()
+            question = row.get('question', '')
+            if question.lower().strip() == query_lower.strip():
+                continue
+            if question in previous_suggestions:
+                continue
+            score = len(query_words.intersection(set(keywords.split())))
+            if score > 0:
+                scored_questions.append((question, score))
+    scored_questions.sort(key=lambda x: x[1], reverse=True)
+    top_questions = [q[0] for q in scored_questions[:2]]
+    if len(top_questions) >= 2:
+        return top_questions
+    with open(FAQ_CSV_PATH, 'r', encoding='utf-8') as f:
+        high_priority = [row['question'] for row in csv.DictReader(f)
+                         if row.get('priority') == 'high'
+                         and row['question'] not in top_questions
+                         and row['question'] not in previous_suggestions
+                         and row['question'].lower().strip() != query_lower.strip()]
+    return top_questions + high_priority[:2 - len(top_questions)]
+
+
+def time_calls(iterations: int):
+    latencies, outputs = [], []
+    for i in range(iterations):
+        query = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        start = time.perf_counter()
+        outputs.append(search.generate_related_questions(query, None, None, ["What is EPR?"]))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies, outputs
+
+
+def main(args):
+    indexed_faq_questions = search.get_faq_questions
+    indexed_faq_questions("warm up")  # load the index outside the timed loop
+
+    report = {}
+    for name, faq_func in (("csv scan", csv_scan_faq_questions), ("faq index", indexed_faq_questions)):
+        search.get_faq_questions = faq_func
+        report[name] = time_calls(args.iterations)
+    search.get_faq_questions = indexed_faq_questions
+
+    print("=" * 60)
+    print(f"generate_related_questions: {args.iterations} calls over {len(SAMPLE_QUERIES)} queries")
+    print("=" * 60)
+    for name, (latencies, _) in report.items():
+        print(f"{name:<10} p50 {percentile(latencies, 50):9.1f} us | p95 {percentile(latencies, 95):9.1f} us | "
+              f"mean {statistics.mean(latencies):9.1f} us")
+    speedup = statistics.mean(report["csv scan"][0]) / statistics.mean(report["faq index"][0])
+    print(f"Speedup: {speedup:.1f}x")
+    print(f"Identical suggestions: {'yes' if report['csv scan'][1] == report['faq index'][1] else 'NO'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suggestion generation")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per implementation")
+    main(parser.parse_args())
@@ -0,0 +1,335 @@
+"""
+BM25 lexical index
+Inverted index over every document in the configured collections plus data/knowledge.csv,
+so short keyword queries ("ARF deadline", "C1 plastic") can be matched without an
+embedding call.
+
+The index is persisted to BM25_INDEX_PATH as per-source term frequencies. A source is one
+ChromaDB database or the knowledge CSV; when its on-disk version changes only that source
+is re-read and re-tokenized, and the postings are rebuilt from the stored frequencies.
+
+find_best_answer uses it two ways:
+1. Lexical fast path: when the top BM25 hit is decisive the vector search is skipped
+2. Reciprocal rank fusion of the BM25 and vector result lists
+
+Build or refresh from the command line:
+    python bm25_index.py build
+    python bm25_index.py search "ARF deadline"
+"""
+
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import (
+    DB_PRIORITY_ORDER, UDB_PATH, DB_MANIFEST_POLL_INTERVAL, BM25_INDEX_PATH, KNOWLEDGE_CSV_PATH,
+    BM25_RESULTS, BM25_RRF_K, BM25_FAST_PATH_MIN_SCORE, BM25_FAST_PATH_RATIO, BM25_FAST_PATH_MAX_TERMS
+)
+from collection_registry import get_db_version
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+READ_BATCH_SIZE = 1000
+
+# Keeps fiscal years ("2024-25") and codes ("c1", "cat-i") as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "to", "in", "on", "for", "and",
+    "or", "by", "with", "as", "at", "from", "it", "its", "this", "that", "what", "which", "who", "how",
+    "do", "does", "did", "i", "we", "you", "my", "our", "your", "can", "should", "will", "under", "me",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _file_version(path: str) -> List[int]:
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return [0, 0]
+
+
+class BM25Index:
+    def __init__(self, registry, knowledge_path: str = KNOWLEDGE_CSV_PATH, index_path: str = BM25_INDEX_PATH,
+                 refresh_interval: float = DB_MANIFEST_POLL_INTERVAL):
+        self.registry = registry
+        self.knowledge_path = knowledge_path
+        self.index_path = index_path
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.RLock()
+        self._last_check = 0.0
+        # source_key -> {"version": [...], "docs": [...]}, as persisted
+        self._sources: Dict[str, Dict] = {}
+        # Swapped as a whole on rebuild so in-flight searches keep a consistent view
+        self._state: Optional[Dict] = None
+
+    # ---- sources ----
+
+    def _source_versions(self) -> Dict[str, List[int]]:
+        versions = {db_config["path"]: list(get_db_version(db_config["path"])) for db_config in DB_PRIORITY_ORDER}
+        versions[self.knowledge_path] = _file_version(self.knowledge_path)
+        return versions
+
+    def _read_database(self, db_path: str) -> List[Dict]:
+        """Every document of one database's configured collections"""
+        from search import _default_source
+
+        db_config = next(c for c in DB_PRIORITY_ORDER if c["path"] == db_path)
+        docs = []
+        for collection_key, collection in self.registry.get_collections(db_path=db_path).items():
+            total = collection.count()
+            for offset in range(0, total, READ_BATCH_SIZE):
+                batch = collection.get(include=["documents", "metadatas"], limit=READ_BATCH_SIZE, offset=offset)
+                for i, doc in enumerate(batch["documents"]):
+                    if not doc:
+                        continue
+                    metadata = batch["metadatas"][i] or {}
+                    source = metadata.get("source", "unknown")
+                    if source == "unknown" or not source:
+                        source = "Updated_DB_Timeline" if db_path == UDB_PATH else _default_source(collection_key)
+                    docs.append({
+                        "document": doc,
+                        "collection": collection_key,
+                        "metadata": metadata,
+                        "chunk_id": metadata.get("chunk_id", offset + i),
+                        "source": source,
+                        "pdf_index": metadata.get("pdf_index", 0),
+                        "db_path": db_path,
+                        "db_priority": db_config["priority"],
+                        "db_recency": db_config["recency"],
+                        "text": doc,
+                    })
+        return docs
+
+    def _read_knowledge(self) -> List[Dict]:
+        """One document per knowledge.csv row; the question is indexed along with the answer"""
+        docs = []
+        try:
+            with open(self.knowledge_path, "r", encoding="utf-8-sig") as f:
+                for i, row in enumerate(csv.DictReader(f)):
+                    question = (row.get("question") or "").strip()
+                    answer = (row.get("answer") or "").strip()
+                    if not answer:
+                        continue
+                    docs.append({
+                        "document": answer,
+                        "collection": "knowledge.csv",
+                        "metadata": {"question": question, "intent": row.get("intent", "")},
+                        "chunk_id": i,
+                        "source": "EPR_Knowledge_CSV",
+                        "pdf_index": 0,
+                        "db_path": self.knowledge_path,
+                        "db_priority": 0,
+                        "db_recency": "curated",
+                        "text": f"{question} {answer}",
+                    })
+        except OSError as e:
+            logger.warning(f"Knowledge CSV not readable: {self.knowledge_path}: {e}")
+        return docs
+
+    def _read_source(self, source_key: str) -> List[Dict]:
+        docs = self._read_knowledge() if source_key == self.knowledge_path else self._read_database(source_key)
+        for doc in docs:
+            tokens = tokenize(doc.pop("text"))
+            doc["tf"] = dict(Counter(tokens))
+            doc["length"] = len(tokens)
+        return docs
+
+    # ---- persistence ----
+
+    def _load_persisted(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format") == INDEX_FORMAT_VERSION:
+            self._sources = data.get("sources", {})
+            logger.info(f"📖 BM25 index loaded from {self.index_path} (built {data.get('built_at')})")
+
+    def _persist(self):
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": INDEX_FORMAT_VERSION, "built_at": datetime.utcnow().isoformat(),
+                           "sources": self._sources}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not persist BM25 index to {self.index_path}: {e}")
+
+    # ---- build ----
+
+    def _build_state(self) -> Dict:
+        """Postings and length statistics from the per-source term frequencies"""
+        docs = [doc for source in self._sources.values() for doc in source["docs"]]
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_id, doc in enumerate(docs):
+            for term, tf in doc["tf"].items():
+                postings[term].append((doc_id, tf))
+        total = len(docs)
+        avg_length = (sum(doc["length"] for doc in docs) / total) if total else 0.0
+        idf = {term: math.log(1 + (total - len(p) + 0.5) / (len(p) + 0.5)) for term, p in postings.items()}
+        return {"docs": docs, "postings": dict(postings), "idf": idf, "avg_length": avg_length or 1.0}
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Re-read sources whose on-disk version changed; returns the refreshed source keys"""
+        with self._lock:
+            if self._state is None and not self._sources:
+                self._load_persisted()
+            versions = self._source_versions()
+            changed = [
+                key for key, version in versions.items()
+                if force or self._sources.get(key, {}).get("version") != version
+            ]
+            removed = [key for key in self._sources if key not in versions]
+            for key in removed:
+                del self._sources[key]
+            for key in changed:
+                start = time.perf_counter()
+                docs = self._read_source(key)
+                self._sources[key] = {"version": versions[key], "docs": docs}
+                logger.info(f"🔤 BM25 indexed {len(docs)} documents from {key} in {time.perf_counter() - start:.1f}s")
+            if changed or removed or self._state is None:
+                self._state = self._build_state()
+            if changed or removed:
+                self._persist()
+            self._last_check = time.monotonic()
+            return changed
+
+    def _ensure_fresh(self) -> Dict:
+        """Load on first use, then pick up changed sources at most every refresh_interval seconds"""
+        if self._state is None or time.monotonic() - self._last_check >= self.refresh_interval:
+            self.refresh()
+        return self._state
+
+    # ---- search ----
+
+    def search(self, query: str, timeline: bool = False, limit: int = BM25_RESULTS) -> List[Dict]:
+        """
+        Top BM25 hits as find_best_answer result dicts (with 'bm25_score' and no 'distance').
+        Timeline queries search only UDB documents, regular queries everything else,
+        the same split as the vector search.
+        """
+        state = self._ensure_fresh()
+        terms = tokenize(query)
+        if not terms or not state["docs"]:
+            return []
+
+        docs = state["docs"]
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            postings = state["postings"].get(term)
+            if not postings:
+                continue
+            idf = state["idf"][term]
+            for doc_id, tf in postings:
+                length_norm = 1 - BM25_B + BM25_B * docs[doc_id]["length"] / state["avg_length"]
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        in_scope = [
+            (score, doc_id) for doc_id, score in scores.items()
+            if (docs[doc_id]["db_path"] == UDB_PATH) == timeline
+        ]
+        in_scope.sort(reverse=True)
+        results = []
+        for score, doc_id in in_scope[:limit]:
+            doc = docs[doc_id]
+            results.append({
+                'document': doc["document"],
+                'distance': None,
+                'bm25_score': round(score, 4),
+                'collection': doc["collection"],
+                'metadata': doc["metadata"],
+                'chunk_id': doc["chunk_id"],
+                'source': doc["source"],
+                'pdf_index': doc["pdf_index"],
+                'db_path': doc["db_path"],
+                'db_priority': doc["db_priority"],
+                'db_recency': doc["db_recency"]
+            })
+        return results
+
+    def get_stats(self) -> Dict:
+        state = self._ensure_fresh()
+        return {
+            "documents": len(state["docs"]),
+            "terms": len(state["postings"]),
+            "sources": {key: len(source["docs"]) for key, source in self._sources.items()},
+        }
+
+
+def is_decisive(query: str, lexical_results: List[Dict]) -> bool:
+    """
+    True when a short keyword query has one clear BM25 winner: its score clears
+    BM25_FAST_PATH_MIN_SCORE and beats the runner-up by BM25_FAST_PATH_RATIO.
+    """
+    if not lexical_results or len(tokenize(query)) > BM25_FAST_PATH_MAX_TERMS:
+        return False
+    top = lexical_results[0]["bm25_score"]
+    # Duplicated documents (same text in several collections) do not count as competition
+    runner_up = next(
+        (r["bm25_score"] for r in lexical_results[1:] if r["document"] != lexical_results[0]["document"]), 0.0
+    )
+    return top >= BM25_FAST_PATH_MIN_SCORE and top >= BM25_FAST_PATH_RATIO * runner_up
+
+
+def reciprocal_rank_fusion(*ranked_lists: List[Dict], k: int = BM25_RRF_K) -> List[Dict]:
+    """
+    Merge ranked result lists by sum of 1 / (k + rank). A document found by several
+    retrievers keeps the fields of its first occurrence plus any 'distance',
+    'bm25_score' or 'embedding' the others reported.
+    """
+    fused: Dict[Tuple[str, str], Dict] = {}
+    scores: Dict[Tuple[str, str], float] = defaultdict(float)
+    for results in ranked_lists:
+        for rank, result in enumerate(results, start=1):
+            key = (result['collection'], result['document'])
+            scores[key] += 1.0 / (k + rank)
+            if key not in fused:
+                fused[key] = dict(result)
+            else:
+                for field in ('distance', 'bm25_score', 'embedding'):
+                    if fused[key].get(field) is None and result.get(field) is not None:
+                        fused[key][field] = result[field]
+    ordered = sorted(fused, key=lambda key: scores[key], reverse=True)
+    for key in ordered:
+        fused[key]['rrf_score'] = round(scores[key], 6)
+    return [fused[key] for key in ordered]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build or query the BM25 lexical index")
+    parser.add_argument("command", choices=["build", "search"], help="build: refresh changed sources; search: run a query")
+    parser.add_argument("query", nargs="?", default="", help="Query text for search")
+    parser.add_argument("--full", action="store_true", help="Re-read every source, not only changed ones")
+    parser.add_argument("--timeline", action="store_true", help="Search UDB documents only")
+    args = parser.parse_args()
+
+    from search import bm25_index
+    if args.command == "build":
+        start = time.perf_counter()
+        refreshed = bm25_index.refresh(force=args.full)
+        stats = bm25_index.get_stats()
+        print(f"Refreshed {len(refreshed)} source(s) in {time.perf_counter() - start:.1f}s: "
+              f"{stats['documents']} documents, {stats['terms']} terms -> {bm25_index.index_path}")
+    else:
+        hits = bm25_index.search(args.query, timeline=args.timeline)
+        for hit in hits:
+            print(f"{hit['bm25_score']:8.3f}  {hit['collection'][:40]:<40}  {hit['document'][:90]!r}")
+        print(f"Decisive: {'yes' if is_decisive(args.query, hits) else 'no'}")
@@ -0,0 +1,251 @@
+"""
+Canonical Q&A bank
+Curated question/answer pairs from data/knowledge.csv and data/recircle_company_info.csv,
+with every question pre-embedded (same Gemini model and task as query embeddings).
+
+A user query that matches a known question gets the curated answer directly, skipping
+LLM refinement:
+
+- exactly after normalization: checked before any search, no embedding needed
+  (find_canonical_answer)
+- with cosine similarity >= CANONICAL_MATCH_THRESHOLD: checked inside find_best_answer
+  with the Gemini query embedding retrieval computes anyway (find_canonical_answer_by_embedding).
+  Timeline questions, BM25 fast-path hits and queries embedded with the local model
+  never need a Gemini embedding, so they are not matched semantically.
+
+Question vectors are persisted to CANONICAL_INDEX_PATH keyed by question text, so after a
+CSV edit only new or changed questions are embedded. Hits and misses are counted in metrics.
+
+Build ahead of deployment (otherwise done at startup):
+    python canonical_answers.py build
+"""
+
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from config import (
+    KNOWLEDGE_CSV_PATH, RECIRCLE_INFO_CSV_PATH, CANONICAL_INDEX_PATH, CANONICAL_MATCH_THRESHOLD,
+    COLLECTION_REFRESH_INTERVAL
+)
+from embedding_cache import normalize_text, DEFAULT_MODEL, DEFAULT_TASK_TYPE, DEFAULT_DIMENSIONALITY
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 100
+
+
+def _question_key(question: str) -> str:
+    return hashlib.sha1(normalize_text(question).rstrip("?!. ").encode("utf-8")).hexdigest()
+
+
+def _file_version(path: str):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+
+class CanonicalAnswers:
+    def __init__(self, csv_paths: List[str], index_path: str = CANONICAL_INDEX_PATH,
+                 threshold: float = CANONICAL_MATCH_THRESHOLD, refresh_interval: float = COLLECTION_REFRESH_INTERVAL):
+        self.csv_paths = csv_paths
+        self.index_path = index_path
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._versions = None
+        self._last_check = 0.0
+        # Swapped as a whole on reload: {"entries", "by_key", "matrix"}
+        self._state: Optional[Dict] = None
+
+    def _read_entries(self) -> List[Dict]:
+        """One entry per distinct question across the CSVs (first occurrence wins)"""
+        entries, seen = [], set()
+        for path in self.csv_paths:
+            try:
+                with open(path, "r", encoding="utf-8-sig") as f:
+                    for row in csv.DictReader(f):
+                        question = (row.get("question") or "").strip()
+                        answer = (row.get("answer") or "").strip()
+                        key = _question_key(question)
+                        if not question or not answer or key in seen:
+                            continue
+                        seen.add(key)
+                        entries.append({
+                            "key": key,
+                            "question": question,
+                            "answer": answer,
+                            "category": row.get("category") or row.get("intent") or "",
+                            "source": os.path.basename(path),
+                        })
+            except OSError as e:
+                logger.warning(f"Canonical Q&A file not readable: {path}: {e}")
+        return entries
+
+    def _load_vectors(self) -> Dict[str, np.ndarray]:
+        try:
+            with np.load(self.index_path) as data:
+                return dict(zip(data["keys"].tolist(), data["embeddings"]))
+        except (OSError, KeyError, ValueError):
+            return {}
+
+    def _save_vectors(self, vectors: Dict[str, np.ndarray]):
+        tmp_path = f"{self.index_path}.tmp.npz"
+        try:
+            keys = sorted(vectors)
+            embeddings = np.stack([vectors[k] for k in keys]) if keys else np.zeros((0, DEFAULT_DIMENSIONALITY), dtype=np.float32)
+            np.savez(tmp_path, keys=np.array(keys), embeddings=embeddings)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not persist canonical question vectors to {self.index_path}: {e}")
+
+    @staticmethod
+    def _embed_questions(questions: List[str]) -> List[np.ndarray]:
+        import google.generativeai as genai
+        vectors = []
+        for start in range(0, len(questions), EMBED_BATCH_SIZE):
+            result = genai.embed_content(
+                model=DEFAULT_MODEL,
+                content=questions[start:start + EMBED_BATCH_SIZE],
+                task_type=DEFAULT_TASK_TYPE,
+                output_dimensionality=DEFAULT_DIMENSIONALITY
+            )
+            vectors.extend(np.asarray(v, dtype=np.float32) for v in result["embedding"])
+        return vectors
+
+    def load(self):
+        """Read the CSVs and embed any question without a stored vector"""
+        with self._lock:
+            self._versions = [_file_version(p) for p in self.csv_paths]
+            self._last_check = time.monotonic()
+            entries = self._read_entries()
+            vectors = self._load_vectors()
+
+            missing = [e for e in entries if e["key"] not in vectors]
+            if missing:
+                try:
+                    for entry, vector in zip(missing, self._embed_questions([e["question"] for e in missing])):
+                        vectors[entry["key"]] = vector
+                    self._save_vectors({e["key"]: vectors[e["key"]] for e in entries})
+                    logger.info(f"✅ Embedded {len(missing)} canonical question(s)")
+                except Exception as e:
+                    logger.error(f"❌ Could not embed canonical questions (exact matches only): {e}")
+
+            embedded = [e for e in entries if e["key"] in vectors]
+            matrix = np.stack([vectors[e["key"]] for e in embedded]) if embedded else np.zeros((0, DEFAULT_DIMENSIONALITY), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._state = {
+                "entries": embedded,
+                "by_key": {e["key"]: e for e in entries},
+                "matrix": (matrix / norms).astype(np.float32),
+            }
+            logger.info(f"📗 Canonical Q&A bank ready: {len(entries)} questions ({len(embedded)} embedded)")
+
+    def _ensure_loaded(self) -> Dict:
+        """Load on first use, then reload when a CSV changes (checked every refresh_interval seconds)"""
+        if self._state is None:
+            self.load()
+        elif time.monotonic() - self._last_check >= self.refresh_interval:
+            self._last_check = time.monotonic()
+            if [_file_version(p) for p in self.csv_paths] != self._versions:
+                logger.info("🔄 Canonical Q&A files changed, reloading")
+                self.load()
+        return self._state
+
+    def match_exact(self, user_query: str) -> Optional[Dict]:
+        """The curated entry whose question equals the query after normalization, or None"""
+        entry = self._ensure_loaded()["by_key"].get(_question_key(user_query))
+        if entry is None:
+            return None
+        metrics.increment("canonical_hit_exact")
+        return {**entry, "similarity": 1.0}
+
+    def match_embedding(self, query_embedding: List[float]) -> Optional[Dict]:
+        """The curated entry closest to a Gemini query embedding plus its similarity, or None below the threshold"""
+        state = self._ensure_loaded()
+        if len(state["entries"]):
+            query = np.asarray(query_embedding, dtype=np.float32)
+            similarities = state["matrix"] @ (query / (np.linalg.norm(query) or 1.0))
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                metrics.increment("canonical_hit_semantic")
+                return {**state["entries"][best], "similarity": round(float(similarities[best]), 4)}
+
+        metrics.increment("canonical_miss")
+        return None
+
+    def get_stats(self) -> Dict:
+        hits_exact = metrics.get_counter("canonical_hit_exact")
+        hits_semantic = metrics.get_counter("canonical_hit_semantic")
+        misses = metrics.get_counter("canonical_miss")
+        total = hits_exact + hits_semantic + misses
+        state = self._state or {"by_key": {}, "entries": []}
+        return {
+            "questions": len(state["by_key"]),
+            "embedded": len(state["entries"]),
+            "threshold": self.threshold,
+            "hits_exact": hits_exact,
+            "hits_semantic": hits_semantic,
+            "misses": misses,
+            "hit_rate": round((hits_exact + hits_semantic) / total, 4) if total else 0.0,
+        }
+
+
+# Global instance
+canonical_answers = CanonicalAnswers([KNOWLEDGE_CSV_PATH, RECIRCLE_INFO_CSV_PATH])
+
+
+def is_canonical_result(result: dict) -> bool:
+    """True for a curated answer (returned as is, without refinement)"""
+    return result.get("source_info", {}).get("retrieval") == "canonical"
+
+
+def find_canonical_answer(user_query: str, intent_result=None, previous_suggestions: list = None) -> Optional[dict]:
+    """find_best_answer-shaped result for an exact canonical match, or None"""
+    entry = canonical_answers.match_exact(user_query)
+    return _canonical_result(entry, user_query, intent_result, previous_suggestions) if entry else None
+
+
+def find_canonical_answer_by_embedding(user_query: str, query_embedding: List[float], intent_result=None,
+                                       previous_suggestions: list = None) -> Optional[dict]:
+    """find_best_answer-shaped result for a semantic canonical match of the query's Gemini embedding, or None"""
+    entry = canonical_answers.match_embedding(query_embedding)
+    return _canonical_result(entry, user_query, intent_result, previous_suggestions) if entry else None
+
+
+def _canonical_result(entry: Dict, user_query: str, intent_result, previous_suggestions: list) -> dict:
+    from search import generate_related_questions
+    logger.info(f"📗 Canonical answer ({entry['similarity']:.3f}) for: {entry['question'][:80]}")
+    return {
+        "answer": entry["answer"],
+        "suggestions": generate_related_questions(user_query, None, intent_result, previous_suggestions),
+        "source_info": {
+            "collection_name": entry["source"],
+            "source_document": entry["source"],
+            "canonical_question": entry["question"],
+            "confidence_score": entry["similarity"],
+            "valid_match": True,
+            "retrieval": "canonical"
+        }
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Embed the canonical Q&A questions")
+    parser.add_argument("command", choices=["build"], help="build: embed new questions and save the vectors")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    canonical_answers.load()
+    stats = canonical_answers.get_stats()
+    print(f"{stats['embedded']}/{stats['questions']} questions embedded in {time.perf_counter() - start:.1f}s -> {canonical_answers.index_path}")
@@ -1,4 +1,5 @@
 import chromadb
+from index_generation import bump_generation
 
 UDB_PATH = r"c:\Users\BHAKTI\OneDrive\Desktop\ReCircle\EPR ChatBot\ChatBot-RAG\UDB\UDB"
 
@@ -8,6 +9,7 @@ client = chromadb.PersistentClient(path=UDB_PATH)
 try:
     client.delete_collection(name="updated_db")
     print("Deleted old 'updated_db' collection")
+    bump_generation("cleanup_udb", UDB_PATH)
 except Exception as e:
     print(f"Could not delete: {e}")
 
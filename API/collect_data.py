@@ -8,33 +8,22 @@ import os
 from dotenv import load_dotenv
 import logging
 from brevo_service import brevo_service
+from redis_pool import get_redis
 
 load_dotenv()
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Redis client
-try:
-    redis_host = os.getenv("REDIS_HOST", "localhost")  # Fallback only if not defined
-    redis_client = redis.StrictRedis(host=redis_host, port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-    logging.info(f"✅ Redis client initialized and connected to {redis_host}")
-except Exception as e:
-    logging.error(f"❌ Failed to initialize Redis client: {e}")
-    redis_client = None
-
 RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 
 
 async def get_user_data_from_session(session_id: str):
     """Checks Redis for existing user data for a given session ID."""
-    if not redis_client:
-        return None
     try:
         session_key = f"session:{session_id}"
-        if redis_client.exists(session_key) and redis_client.hget(session_key, "user_data_collected") == "true":
-            user_data = redis_client.hgetall(session_key)
+        user_data = await get_redis().hgetall(session_key)
+        if user_data.get("user_data_collected") == "true":
             logging.info(f"✅ Found existing user data for session {session_id}")
             return user_data
     except redis.exceptions.ConnectionError as e:
@@ -45,9 +34,6 @@ async def get_user_data_from_session(session_id: str):
 
 
 async def collect_user_data(user_data: UserData):
-    if not redis_client:
-        raise HTTPException(status_code=503, detail="Service temporarily unavailable.")
-
     try:
         logging.info(f"📥 Received form submission for session: {user_data.session_id}")
 
@@ -62,7 +48,7 @@ async def collect_user_data(user_data: UserData):
             "organization": user_data.organization,
             "last_interaction": datetime.utcnow().isoformat(),
         }
-        redis_client.hmset(session_key, mapping=user_data_map)
+        await get_redis().hset(session_key, mapping=user_data_map)
         logging.info(f"✅ Data saved to Redis for key: {session_key}")
 
         session_id = user_data.session_id
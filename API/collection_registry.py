@@ -0,0 +1,179 @@
+"""
+Collection handle registry
+Opens every configured ChromaDB collection once, caches its document count and keeps
+the priority-ordered search list precomputed, instead of doing this on every query.
+Handles are refreshed lazily when a database changes: its manifest generation (see
+db_manifest.py) is polled every DB_MANIFEST_POLL_INTERVAL seconds - and right away when a
+writer bumps the index generation - and its SQLite file every COLLECTION_REFRESH_INTERVAL
+seconds for writes that did not update the manifest.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from index_generation import index_generation
+from db_manifest import manifest_reader
+
+logger = logging.getLogger(__name__)
+
+
+def get_db_version(db_path: str) -> Tuple[int, int, int]:
+    """
+    On-disk version of a ChromaDB: mtime and size of its SQLite file (directory mtime as
+    fallback) and its manifest generation
+    """
+    generation = manifest_reader.read_generation(db_path)
+    sqlite_path = os.path.join(db_path, "chroma.sqlite3")
+    try:
+        stat = os.stat(sqlite_path)
+        return stat.st_mtime_ns, stat.st_size, generation
+    except OSError:
+        try:
+            return os.stat(db_path).st_mtime_ns, 0, generation
+        except OSError:
+            return 0, 0, generation
+
+
+class CollectionRegistry:
+    def __init__(self, clients: Dict, collections_map: Dict[str, List[str]], priority_order: List[Dict],
+                 udb_path: str, refresh_interval: float = 30, poll_interval: float = 2):
+        self.clients = clients
+        self.collections_map = collections_map
+        self.priority_order = priority_order
+        self.udb_path = udb_path
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._last_check = 0.0
+        self._last_poll = 0.0
+        self._index_generation = None
+        # Incremented whenever a database is (re)opened; part of the retrieval cache key
+        self.generation = 0
+        self._versions: Dict[str, Tuple[int, int, int]] = {}
+        # collection_key -> {"collection", "name", "db_path", "count"}
+        self._entries: Dict[str, Dict] = {}
+        self._ordered: List[Dict] = []
+        self._ordered_without_udb: List[Dict] = []
+
+    @staticmethod
+    def collection_key(collection_name: str, db_path: str) -> str:
+        return f"{collection_name}@{db_path}"
+
+    def _open_database(self, db_path: str):
+        """(Re)open every configured collection of one database and cache its count"""
+        # Read the version first so a write during re-opening is picked up next time
+        version = get_db_version(db_path)
+        # Build a new dict and swap it in, so readers never iterate a changing one
+        entries = {k: entry for k, entry in self._entries.items() if entry["db_path"] != db_path}
+        client = self.clients.get(db_path)
+
+        for collection_name in (self.collections_map.get(db_path, []) if client is not None else []):
+            try:
+                collection = client.get_collection(name=collection_name)
+                count = collection.count()
+                entries[self.collection_key(collection_name, db_path)] = {
+                    "collection": collection,
+                    "name": collection_name,
+                    "db_path": db_path,
+                    "count": count,
+                }
+                logger.info(f"✅ Found collection '{collection_name}' with {count} documents from {db_path}")
+            except Exception as e:
+                logger.warning(f"Collection '{collection_name}' not found in {db_path}: {e}")
+        self._entries = entries
+        self._versions[db_path] = version
+        self.generation += 1
+
+    def _build_ordering(self):
+        """Precompute the priority-ordered search list (exact db_path match, newest first)"""
+        ordered = []
+        for db_config in self.priority_order:
+            db_path = db_config["path"]
+            for collection_key, entry in self._entries.items():
+                if entry["db_path"] == db_path:
+                    ordered.append({
+                        "collection_key": collection_key,
+                        "collection_obj": entry["collection"],
+                        "priority": db_config["priority"],
+                        "db_path": db_path,
+                        "description": db_config["description"],
+                        "recency": db_config["recency"]
+                    })
+        self._ordered = ordered
+        self._ordered_without_udb = [c for c in ordered if c["db_path"] != self.udb_path]
+
+    def load(self):
+        """Open all databases (called at startup; later calls only refresh changed ones)"""
+        with self._lock:
+            for db_path in self.clients:
+                self._open_database(db_path)
+            self._build_ordering()
+            self._loaded = True
+            self._last_check = self._last_poll = time.monotonic()
+            self._index_generation = index_generation.read()
+
+        if not self._entries:
+            logger.error("No collections found. ChromaDB databases may be empty.")
+        else:
+            total = sum(entry["count"] for entry in self._entries.values())
+            logger.info(f"📚 Collection registry ready: {len(self._entries)} collections, {total} documents")
+
+    def _ensure_fresh(self):
+        """Load on first use, then re-open databases whose on-disk version changed"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+            return
+
+        now = time.monotonic()
+        generation = index_generation.read()
+        if now - self._last_poll < self.poll_interval and generation == self._index_generation:
+            return
+
+        with self._lock:
+            if now - self._last_poll < self.poll_interval and generation == self._index_generation:
+                return
+            self._last_poll = now
+            self._index_generation = generation
+            if now - self._last_check >= self.refresh_interval:
+                self._last_check = now
+                changed = [p for p in self.clients if get_db_version(p) != self._versions.get(p)]
+            else:
+                # Between full checks only the manifests are compared (one stat() each)
+                changed = [p for p in self.clients
+                           if manifest_reader.read_generation(p) != self._versions.get(p, (0, 0, 0))[2]]
+            if not changed:
+                return
+            for db_path in changed:
+                logger.info(f"🔄 Database changed on disk, refreshing collections: {db_path}")
+                self._open_database(db_path)
+            self._build_ordering()
+
+    def current_generation(self) -> int:
+        """Re-open databases changed on disk, then return the re-open counter"""
+        self._ensure_fresh()
+        return self.generation
+
+    def get_collections(self, db_path: Optional[str] = None) -> Dict:
+        """{collection_key: collection} for all databases, or only db_path"""
+        self._ensure_fresh()
+        return {
+            key: entry["collection"]
+            for key, entry in self._entries.items()
+            if db_path is None or entry["db_path"] == db_path
+        }
+
+    def get_ordered(self, exclude_udb: bool = False) -> List[Dict]:
+        """Priority-ordered collections (see get_priority_ordered_collections)"""
+        self._ensure_fresh()
+        return self._ordered_without_udb if exclude_udb else self._ordered
+
+    def get_counts(self) -> Dict[str, int]:
+        """Cached document count per collection"""
+        self._ensure_fresh()
+        return {key: entry["count"] for key, entry in self._entries.items()}
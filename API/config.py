@@ -48,6 +48,89 @@ ENABLE_PRIORITY_SEARCH = os.getenv("ENABLE_PRIORITY_SEARCH", "true").lower() ==
 EARLY_STOP_THRESHOLD = float(os.getenv("EARLY_STOP_THRESHOLD", "1.5"))
 EARLY_STOP_THRESHOLD_TIMELINE = float(os.getenv("EARLY_STOP_THRESHOLD_TIMELINE", "2.0"))
 
+# How find_best_answer queries the priority-ordered databases
+# "serial": one at a time, stopping at the first excellent match
+# "parallel": all at once on the fan-out pool, merged in priority order with the same early stop
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "serial").lower()
+
+# Where find_best_answer gets its nearest neighbours
+# "chroma": query each PersistentClient, "serving_index": the consolidated memory-mapped index
+# built by `python serving_index.py build` (falls back to chroma if it has not been built),
+# "int8": the same index scored with its int8-quantized copy and float re-scoring
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma").lower()
+SERVING_INDEX_DIR = os.getenv("SERVING_INDEX_DIR", os.path.join(BASE_DIR, "serving_index"))
+# int8 backend: rows per collection re-scored with exact float32 vectors
+INT8_RESCORE_CANDIDATES = int(os.getenv("INT8_RESCORE_CANDIDATES", "50"))
+
+# Query embeddings (see local_embeddings.py)
+# "gemini": gemini-embedding-001 against the main collections
+# "local": LOCAL_EMBEDDING_MODEL on CPU against the parallel "<collection><LOCAL_COLLECTION_SUFFIX>" collections
+QUERY_EMBEDDING_BACKEND = os.getenv("QUERY_EMBEDDING_BACKEND", "gemini").lower()
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_COLLECTION_SUFFIX = os.getenv("LOCAL_COLLECTION_SUFFIX", "_local")
+# Retry with the local model when the Gemini embedding call fails (needs the local collections built)
+LOCAL_EMBEDDING_FALLBACK = os.getenv("LOCAL_EMBEDDING_FALLBACK", "true").lower() == "true"
+# Distance thresholds for local-model results. The local collections are cosine (0-2) and MiniLM
+# scores sit in a different range than Gemini, so EARLY_STOP_THRESHOLD and the 1.5 / 2.0 valid-match
+# cut-offs would accept almost every hit. Recalibrate with benchmark_retrieval.py --embedding-backend local
+LOCAL_EARLY_STOP_THRESHOLD = float(os.getenv("LOCAL_EARLY_STOP_THRESHOLD", "0.4"))
+LOCAL_DISTANCE_THRESHOLD = float(os.getenv("LOCAL_DISTANCE_THRESHOLD", "0.7"))
+LOCAL_DISTANCE_THRESHOLD_TIMELINE = float(os.getenv("LOCAL_DISTANCE_THRESHOLD_TIMELINE", "0.8"))
+
+# Query embedding cache (see embedding_cache.py): in-process LRU, optionally backed by Redis
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "true").lower() == "true"
+# Redis hashes expire this long after their last write
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# BM25 lexical index (see bm25_index.py) over all collections plus the curated knowledge CSV
+BM25_ENABLED = os.getenv("BM25_ENABLED", "true").lower() == "true"
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", os.path.join(BASE_DIR, "bm25_index.json"))
+KNOWLEDGE_CSV_PATH = os.getenv("KNOWLEDGE_CSV_PATH", os.path.join(BASE_DIR, "data", "knowledge.csv"))
+BM25_RESULTS = int(os.getenv("BM25_RESULTS", "10"))
+# Reciprocal rank fusion constant: score = sum of 1 / (k + rank) over the BM25 and vector lists
+BM25_RRF_K = int(os.getenv("BM25_RRF_K", "60"))
+# BM25 hits scoring below this matched only common terms: left out of fusion and fast-path answers
+BM25_MIN_SCORE = float(os.getenv("BM25_MIN_SCORE", "2.0"))
+# Lexical fast path: skip the embedding call for short queries with one clear BM25 winner
+BM25_FAST_PATH_ENABLED = os.getenv("BM25_FAST_PATH_ENABLED", "true").lower() == "true"
+BM25_FAST_PATH_MIN_SCORE = float(os.getenv("BM25_FAST_PATH_MIN_SCORE", "8.0"))
+BM25_FAST_PATH_RATIO = float(os.getenv("BM25_FAST_PATH_RATIO", "1.5"))
+BM25_FAST_PATH_MAX_TERMS = int(os.getenv("BM25_FAST_PATH_MAX_TERMS", "4"))
+
+# Canonical Q&A bank (see canonical_answers.py): curated answers returned without retrieval or refinement
+CANONICAL_ANSWERS_ENABLED = os.getenv("CANONICAL_ANSWERS_ENABLED", "true").lower() == "true"
+RECIRCLE_INFO_CSV_PATH = os.getenv("RECIRCLE_INFO_CSV_PATH", os.path.join(BASE_DIR, "data", "recircle_company_info.csv"))
+CANONICAL_INDEX_PATH = os.getenv("CANONICAL_INDEX_PATH", os.path.join(BASE_DIR, "canonical_index.npz"))
+# Cosine similarity between the query and a known question needed to short-circuit
+CANONICAL_MATCH_THRESHOLD = float(os.getenv("CANONICAL_MATCH_THRESHOLD", "0.93"))
+
+# Suggested-question FAQ (see faq_index.py), reloaded when the file changes
+FAQ_CSV_PATH = os.getenv("FAQ_CSV_PATH", os.path.join(BASE_DIR, "data", "epr_faqs.csv"))
+FAQ_RELOAD_CHECK_INTERVAL = float(os.getenv("FAQ_RELOAD_CHECK_INTERVAL", "5"))
+
+# Retrieval result cache (see retrieval_cache.py): nearest neighbours per query embedding, dropped
+# when a writer bumps the index generation in INDEX_GENERATION_PATH (see index_generation.py)
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+# Embedding components are rounded to this many decimals for the cache key
+RETRIEVAL_CACHE_DECIMALS = int(os.getenv("RETRIEVAL_CACHE_DECIMALS", "4"))
+INDEX_GENERATION_PATH = os.getenv("INDEX_GENERATION_PATH", os.path.join(BASE_DIR, "index_generation.json"))
+
+# Near-duplicate filter (see result_dedup.py): chunks joined into an answer must be less similar
+# than this (cosine of their embeddings) to every chunk already picked
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.95"))
+
+# Date questions are answered from the retrieved text by deadline_extractor.py; Gemini is
+# only asked when no single deadline can be extracted
+DEADLINE_EXTRACTOR_ENABLED = os.getenv("DEADLINE_EXTRACTOR_ENABLED", "true").lower() == "true"
+
+# Seconds between checks for databases changed on disk (see collection_registry.py)
+COLLECTION_REFRESH_INTERVAL = float(os.getenv("COLLECTION_REFRESH_INTERVAL", "30"))
+# Seconds between polls of the per-database manifests written by writer scripts (see db_manifest.py)
+DB_MANIFEST_POLL_INTERVAL = float(os.getenv("DB_MANIFEST_POLL_INTERVAL", "2"))
+
 # UDB path for timeline queries (2024-25, 2025-26)
 UDB_PATH = CHROMA_DB_PATH_6
 
@@ -61,6 +144,51 @@ COLLECTIONS = {
     CHROMA_DB_PATH_6: ["updated_db"]  # Lowercase to match actual collection name
 }
 
+# Redis connection settings shared by every module (see redis_pool.py)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+
+# Execution pools for blocking work (see execution_pools.py)
+# *_POOL_SIZE: worker threads per stage, *_MAX_CONCURRENCY: calls admitted per stage (running + queued)
+RETRIEVAL_POOL_SIZE = int(os.getenv("RETRIEVAL_POOL_SIZE", "8"))
+RETRIEVAL_MAX_CONCURRENCY = int(os.getenv("RETRIEVAL_MAX_CONCURRENCY", "16"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+REPORTING_POOL_SIZE = int(os.getenv("REPORTING_POOL_SIZE", "2"))
+REPORTING_MAX_CONCURRENCY = int(os.getenv("REPORTING_MAX_CONCURRENCY", "4"))
+# Threads for per-database queries in parallel retrieval (separate from the retrieval pool that waits on them)
+FANOUT_POOL_SIZE = int(os.getenv("FANOUT_POOL_SIZE", "16"))
+# Threads (and the cap on in-flight calls) for LLM side branches started by calls already on the LLM pool,
+# e.g. hybrid search's LLM-knowledge call; when all are busy the branch runs inline instead
+LLM_BRANCH_POOL_SIZE = int(os.getenv("LLM_BRANCH_POOL_SIZE", "16"))
+
+# Seconds a request may wait for a free slot in a stage before the API answers 503
+STAGE_QUEUE_TIMEOUT = float(os.getenv("STAGE_QUEUE_TIMEOUT", "30"))
+
+# Where per-conversation state lives (see state_backend.py and MULTI_WORKER_README.md)
+# "memory": inside this process (single worker only), "redis": shared by all workers/containers
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "state")
+CONTEXT_WINDOW_TTL_SECONDS = int(os.getenv("CONTEXT_WINDOW_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Upper bound on keys held by the in-memory backend (oldest evicted first)
+MEMORY_STATE_MAX_KEYS = int(os.getenv("MEMORY_STATE_MAX_KEYS", "10000"))
+# Background monitors run on one worker only; the leader renews a Redis lease this often
+MONITOR_LEASE_SECONDS = int(os.getenv("MONITOR_LEASE_SECONDS", "90"))
+
+# Single-flight: concurrent identical questions share one search (see single_flight.py)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# Also coalesce across workers/containers with a Redis lock
+SINGLE_FLIGHT_REDIS = os.getenv("SINGLE_FLIGHT_REDIS", "false").lower() == "true"
+SINGLE_FLIGHT_LOCK_TTL = float(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "60"))
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "45"))
+SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.1"))
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "10"))
+
 # PDF Documents path
 PDF_DOCUMENTS_PATH = os.getenv("PDF_DOCUMENTS_PATH", os.path.join(BASE_DIR, "..", "fwdplasticwastemanagementrules"))
 
@@ -1,7 +1,7 @@
 from typing import Dict, Optional, List
 import json
 import re
-from collect_data import redis_client
+from keyword_matcher import keyword_matcher, KeywordHits
 
 class ContextManager:
     def __init__(self):
@@ -25,6 +25,22 @@ class ContextManager:
             'medium': ['soon', 'quickly', 'next month'],
             'low': ['planning', 'future', 'considering']
         }
+        
+        # Common Indian cities/states
+        self.locations = ['mumbai', 'delhi', 'bangalore', 'chennai', 'pune', 'hyderabad',
+                          'gujarat', 'maharashtra', 'karnataka', 'tamil nadu']
+        
+        self.help_keywords = {
+            'help': ['help', 'assist', 'support', 'guidance', 'consultation', 'advice', 'solution', 'reach out', 'contact'],
+            'theory': ['what is', 'define', 'definition', 'meaning', 'explain', 'category', 'type']
+        }
+        
+        # All keyword tables are matched in one pass by the shared matcher
+        keyword_matcher.register('industry', self.industry_keywords)
+        keyword_matcher.register('company_size', self.company_size_indicators)
+        keyword_matcher.register('urgency', self.urgency_levels)
+        keyword_matcher.register('location', {'location': self.locations})
+        keyword_matcher.register('help_query', self.help_keywords)
     
     def extract_context(self, query: str, history: List[Dict]) -> Dict:
         """Extract user context from conversation"""
@@ -33,33 +49,26 @@ class ContextManager:
             if msg.get('role') == 'user':
                 all_text += ' ' + msg.get('text', '').lower()
         
+        # The joined text changes every turn, so it is not worth caching
+        hits = keyword_matcher.scan(all_text, cache=False)
         context = {
-            'industry': self._detect_industry(all_text),
-            'company_size': self._detect_company_size(all_text),
-            'urgency': self._detect_urgency(all_text),
+            'industry': self._detect_industry(hits),
+            'company_size': self._detect_company_size(hits),
+            'urgency': self._detect_urgency(hits),
             'plastic_volume': self._extract_volume(all_text),
-            'location': self._extract_location(all_text)
+            'location': self._extract_location(hits)
         }
         
         return context
     
-    def _detect_industry(self, text: str) -> Optional[str]:
-        for industry, keywords in self.industry_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return industry
-        return None
+    def _detect_industry(self, hits: KeywordHits) -> Optional[str]:
+        return hits.first('industry', self.industry_keywords)
     
-    def _detect_company_size(self, text: str) -> Optional[str]:
-        for size, indicators in self.company_size_indicators.items():
-            if any(indicator in text for indicator in indicators):
-                return size
-        return None
+    def _detect_company_size(self, hits: KeywordHits) -> Optional[str]:
+        return hits.first('company_size', self.company_size_indicators)
     
-    def _detect_urgency(self, text: str) -> str:
-        for level, keywords in self.urgency_levels.items():
-            if any(keyword in text for keyword in keywords):
-                return level
-        return 'low'
+    def _detect_urgency(self, hits: KeywordHits) -> str:
+        return hits.first('urgency', self.urgency_levels) or 'low'
     
     def _extract_volume(self, text: str) -> Optional[str]:
         # Extract plastic volume mentions
@@ -73,25 +82,17 @@ class ContextManager:
                 return match.group(0)
         return None
     
-    def _extract_location(self, text: str) -> Optional[str]:
-        # Common Indian cities/states
-        locations = ['mumbai', 'delhi', 'bangalore', 'chennai', 'pune', 'hyderabad', 
-                    'gujarat', 'maharashtra', 'karnataka', 'tamil nadu']
-        for location in locations:
-            if location in text:
+    def _extract_location(self, hits: KeywordHits) -> Optional[str]:
+        matched = hits.matched('location', 'location')
+        for location in self.locations:
+            if location in matched:
                 return location.title()
         return None
     
     def _is_help_query(self, query: str) -> bool:
         """Check if query is asking for help/assistance vs theoretical information"""
-        help_keywords = ['help', 'assist', 'support', 'guidance', 'consultation', 'advice', 'solution', 'reach out', 'contact']
-        theory_keywords = ['what is', 'define', 'definition', 'meaning', 'explain', 'category', 'type']
-        
-        query_lower = query.lower()
-        has_help = any(keyword in query_lower for keyword in help_keywords)
-        has_theory = any(keyword in query_lower for keyword in theory_keywords)
-        
-        return has_help and not has_theory
+        hits = keyword_matcher.scan(query.lower())
+        return hits.any('help_query', 'help') and not hits.any('help_query', 'theory')
     
     def personalize_response(self, base_response: str, context: Dict, query: str = "", user_name: str = None) -> str:
         """Personalize response based on user context"""
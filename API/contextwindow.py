@@ -1,19 +1,21 @@
-from collections import deque
 from typing import Dict, List, Optional
 import json
 import time
+from config import CONTEXT_WINDOW_TTL_SECONDS
+from state_backend import get_state_backend
 
 class ContextWindow:
-    def __init__(self, max_size: int = 6):
-        """Initialize context window with FIFO queue"""
+    def __init__(self, max_size: int = 6, ttl_seconds: int = CONTEXT_WINDOW_TTL_SECONDS):
+        """Initialize context window with FIFO queue (stored in the shared state backend)"""
         self.max_size = max_size
-        self.sessions: Dict[str, deque] = {}
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"context:{session_id}"
     
     def add_query(self, session_id: str, user_query: str, bot_response: str = None):
         """Add user query to session context window"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = deque(maxlen=self.max_size)
-        
         # Add query-response pair with timestamp
         context_item = {
             "timestamp": time.time(),
@@ -22,14 +24,11 @@ class ContextWindow:
             "role": "user"
         }
         
-        self.sessions[session_id].append(context_item)
+        get_state_backend().list_append(self._key(session_id), context_item, self.max_size, self.ttl_seconds)
     
     def get_context(self, session_id: str) -> List[Dict]:
         """Get conversation context for session"""
-        if session_id not in self.sessions:
-            return []
-        
-        return list(self.sessions[session_id])
+        return get_state_backend().list_get(self._key(session_id))
     
     def get_context_string(self, session_id: str) -> str:
         """Get formatted context string for LLM"""
@@ -47,13 +46,15 @@ class ContextWindow:
     
     def clear_session(self, session_id: str):
         """Clear context for specific session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        get_state_backend().delete(self._key(session_id))
     
     def update_response(self, session_id: str, bot_response: str):
         """Update the last query with bot response"""
-        if session_id in self.sessions and self.sessions[session_id]:
-            self.sessions[session_id][-1]["bot_response"] = bot_response
+        context = self.get_context(session_id)
+        if context:
+            last_item = context[-1]
+            last_item["bot_response"] = bot_response
+            get_state_backend().list_update_last(self._key(session_id), last_item)
 
 # Global context window instance
 context_window = ContextWindow()
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Per-database manifest
+Every ChromaDB directory gets a manifest.json next to its chroma.sqlite3:
+
+    {"generation": 7, "document_count": 5321, "checksum": "...", "embedding_models": [...],
+     "collections": {"updated_db": {"count": 12, "checksum": "...", "embedding_model": "..."}},
+     "source": "recreate_udb", "updated_at": "2026-01-12T10:04:31"}
+
+Writer scripts rewrite it through index_generation.bump_generation(source, db_path, ...) once
+their changes are on disk: the generation is incremented and the counts and content checksum
+(ids, documents and metadata; embeddings excluded) are recomputed. The API only stat()s the
+manifests (see ManifestReader) and re-opens a database when its generation changes, so edits
+the SQLite mtime does not reveal (fix_november_dates.py, drop-and-rebuild) are still seen.
+
+Write or inspect manifests by hand (e.g. for existing databases):
+    python db_manifest.py write --db /path/to/db --model models/gemini-embedding-001
+    python db_manifest.py show
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: manifest writes are not serialized across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+CHECKSUM_BATCH_SIZE = 1000
+
+
+def manifest_path(db_path: str) -> str:
+    return os.path.join(db_path, MANIFEST_FILENAME)
+
+
+def load_manifest(db_path: str) -> Dict:
+    """The database's manifest, or {} if it has none"""
+    try:
+        with open(manifest_path(db_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest.get("generation"), int) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _collection_summary(collection) -> Dict:
+    """Document count and content checksum (rows in id order) of one collection"""
+    rows = []
+    total = collection.count()
+    for offset in range(0, total, CHECKSUM_BATCH_SIZE):
+        batch = collection.get(include=["documents", "metadatas"], limit=CHECKSUM_BATCH_SIZE, offset=offset)
+        rows.extend(zip(batch["ids"], batch["documents"], batch["metadatas"]))
+    rows.sort(key=lambda row: row[0])
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return {"count": len(rows), "checksum": digest.hexdigest()}
+
+
+def write_manifest(db_path: str, source: str, collection_name: Optional[str] = None,
+                   embedding_model: Optional[str] = None) -> Dict:
+    """
+    Recompute and save the manifest with the generation incremented. embedding_model is
+    recorded for collection_name (every collection if None); collections that carry an
+    "embedding_model" metadata entry, or were not named, keep what they had.
+    """
+    import chromadb
+
+    lock_file = open(os.path.join(db_path, f"{MANIFEST_FILENAME}.lock"), "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        previous = load_manifest(db_path)
+        previous_collections = previous.get("collections", {})
+
+        collections = {}
+        client = chromadb.PersistentClient(path=db_path)
+        for listed in client.list_collections():
+            name = getattr(listed, "name", listed)
+            collection = client.get_collection(name=name)
+            model = (collection.metadata or {}).get("embedding_model")
+            if not model and embedding_model and collection_name in (None, name):
+                model = embedding_model
+            collections[name] = {
+                **_collection_summary(collection),
+                "embedding_model": model or previous_collections.get(name, {}).get("embedding_model"),
+            }
+
+        checksum = hashlib.sha256()
+        for name in sorted(collections):
+            checksum.update(f"{name}:{collections[name]['checksum']}\n".encode("utf-8"))
+        manifest = {
+            "generation": previous.get("generation", 0) + 1,
+            "document_count": sum(c["count"] for c in collections.values()),
+            "checksum": checksum.hexdigest(),
+            "embedding_models": sorted({c["embedding_model"] for c in collections.values() if c["embedding_model"]}),
+            "collections": collections,
+            "source": source,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = f"{manifest_path(db_path)}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path(db_path))
+    finally:
+        lock_file.close()
+
+    logger.info(f"🧾 Manifest of {db_path}: generation {manifest['generation']}, "
+                f"{manifest['document_count']} documents ({source})")
+    return manifest
+
+
+class ManifestReader:
+    """Manifest generations for the API: one stat() per database, the file is re-read only when it changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # db_path -> (stat signature, manifest)
+        self._cache: Dict[str, tuple] = {}
+
+    def read(self, db_path: str) -> Dict:
+        try:
+            stat = os.stat(manifest_path(db_path))
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            signature = None
+        cached = self._cache.get(db_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        manifest = load_manifest(db_path) if signature else {}
+        with self._lock:
+            self._cache[db_path] = (signature, manifest)
+        return manifest
+
+    def read_generation(self, db_path: str) -> int:
+        """0 for a database without a manifest"""
+        return self.read(db_path).get("generation", 0)
+
+
+# Global instance
+manifest_reader = ManifestReader()
+
+
+if __name__ == "__main__":
+    from config import CHROMA_DB_PATHS
+    from index_generation import bump_generation
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Write or show ChromaDB manifests")
+    parser.add_argument("command", choices=["write", "show"],
+                        help="write: recompute the manifest and bump the generation, show: print it")
+    parser.add_argument("--db", action="append", help="Only this database path (repeatable)")
+    parser.add_argument("--collection", help="Collection the --model applies to (default: all)")
+    parser.add_argument("--model", help="Embedding model to record")
+    args = parser.parse_args()
+
+    db_paths: List[str] = args.db or CHROMA_DB_PATHS
+    for db_path in db_paths:
+        if args.command == "write":
+            bump_generation("db_manifest", db_path, collection_name=args.collection, embedding_model=args.model)
+        manifest = load_manifest(db_path)
+        print(f"{db_path}: generation {manifest.get('generation', 0)}, {manifest.get('document_count', '?')} documents, "
+              f"models {manifest.get('embedding_models', [])}, checksum {manifest.get('checksum', '-')[:12]}")
@@ -0,0 +1,178 @@
+"""
+Rule-based deadline extraction
+Date questions ("ARF deadline for FY 2024-25", "Q3 certificate deadline 2025-26") used to be
+sent to Gemini with the database text and "Extract ONLY the date ... maximum 10 words".
+extract_deadline does the same with regular expressions over the retrieved text, in well
+under a millisecond:
+
+1. The question gives the fiscal year, quarter and document type (annual return or
+   quarterly), using the timeline index parsers.
+2. Quarterly: "Q1 (April-June 2025): July 31, 2025" entries are read from the text.
+   Annual: a sentence is a candidate if it is about a filing, return or deadline and a date
+   follows explicit deadline wording ("deadline", "last date", "due", "on or before",
+   "until", "filed by"); period ranges in parentheses are ignored. Dates after anything
+   else ("notified by MoEFCC on ...") are never taken for a deadline.
+3. Candidates whose sentence (or chunk) names a different fiscal year are dropped. If the
+   remaining ones disagree on the date, or none is left, None is returned and the caller
+   asks Gemini as before.
+
+The answer has the shape of the prompt's example: "January 31, 2026 for FY 2024-25".
+"""
+
+import logging
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+from timeline_index import FISCAL_YEAR_PATTERN, parse_fiscal_year, detect_doc_type
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",), ("june", "jun"),
+        ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"), ("october", "oct"),
+        ("november", "nov"), ("december", "dec"),
+    ], start=1)
+    for name in names
+}
+_MONTH = r"(?P<{}>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+
+# "31 January 2026", "31st Jan, 2026", "January 31, 2026", "Jan 31 2026"
+DATE_PATTERN = re.compile(
+    r"\b(?:(?P<day1>\d{1,2})(?:st|nd|rd|th)?\s+" + _MONTH.format("month1") + r",?\s+(?P<year1>20\d{2})"
+    r"|" + _MONTH.format("month2") + r"\s+(?P<day2>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year2>20\d{2}))\b",
+    re.IGNORECASE,
+)
+
+# The question must ask for a date, not just mention filing
+DEADLINE_QUESTION_PATTERN = re.compile(r"\b(?:deadlines?|last dates?|due|when|dates?|timelines?)\b", re.IGNORECASE)
+# Wording that introduces the deadline in a sentence; the first date after one is taken
+DEADLINE_CUE_PATTERN = re.compile(
+    r"\b(?:deadline|last date|due date|due|on or before|till|until|(?:filed|submitted) (?:on or )?(?:by|before))\b",
+    re.IGNORECASE
+)
+# A candidate sentence must be about a filing, return or deadline
+FILING_TERM_PATTERN = re.compile(
+    r"\b(?:deadlines?|last date|due|fil(?:e|ed|ing)|returns?|reports?|reporting|submi(?:t|tted|ssion))\b", re.IGNORECASE
+)
+QUARTER_ENTRY_PATTERN = re.compile(r"\bQ([1-4])\b[^:.]*:\s*(?P<date>[^.;]*\d{4})", re.IGNORECASE)
+QUARTER_QUESTION_PATTERNS = [
+    (1, re.compile(r"\b(?:q1|first quarter|quarter 1)\b")),
+    (2, re.compile(r"\b(?:q2|second quarter|quarter 2)\b")),
+    (3, re.compile(r"\b(?:q3|third quarter|quarter 3)\b")),
+    (4, re.compile(r"\b(?:q4|fourth quarter|last quarter|quarter 4)\b")),
+]
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z(])")
+PARENTHESES_PATTERN = re.compile(r"\([^)]*\)")
+
+
+def parse_date(text: str) -> Optional[date]:
+    """The first date in text, or None"""
+    match = DATE_PATTERN.search(text)
+    if not match:
+        return None
+    day = match.group("day1") or match.group("day2")
+    month = (match.group("month1") or match.group("month2")).lower()
+    year = match.group("year1") or match.group("year2")
+    try:
+        return date(int(year), MONTHS[month], int(day))
+    except ValueError:
+        return None
+
+
+def format_date(value: date) -> str:
+    return f"{value.strftime('%B')} {value.day}, {value.year}"
+
+
+def fiscal_years_in(text: str) -> set:
+    """Every fiscal year named in text, as "YYYY-YY" (also "2024–2025")"""
+    return {
+        f"{start}-{end}" for start, end in FISCAL_YEAR_PATTERN.findall(text)
+        if (int(start) + 1) % 100 == int(end)
+    }
+
+
+def parse_quarter(query: str) -> Optional[int]:
+    query_lower = query.lower()
+    quarters = [number for number, pattern in QUARTER_QUESTION_PATTERNS if pattern.search(query_lower)]
+    return quarters[0] if len(quarters) == 1 else None
+
+
+def _year_matches(sentence: str, chunk_years: set, fiscal_year: Optional[str]) -> bool:
+    """False if the sentence - or, when it names none, its chunk - is about another fiscal year"""
+    if not fiscal_year:
+        return True
+    years = fiscal_years_in(sentence) or chunk_years
+    return not years or fiscal_year in years
+
+
+def _quarterly_candidates(chunks: List[str], fiscal_year: Optional[str], quarter: Optional[int]) -> List[Tuple[int, date]]:
+    candidates = []
+    for chunk in chunks:
+        chunk_years = fiscal_years_in(chunk)
+        if fiscal_year and chunk_years and fiscal_year not in chunk_years:
+            continue
+        for match in QUARTER_ENTRY_PATTERN.finditer(chunk):
+            number = int(match.group(1))
+            deadline = parse_date(match.group("date"))
+            if deadline and (quarter is None or number == quarter):
+                candidates.append((number, deadline))
+    return candidates
+
+
+def _annual_candidates(chunks: List[str], fiscal_year: Optional[str]) -> List[Tuple[str, date]]:
+    """(fiscal year or "", deadline) for each sentence stating a deadline"""
+    candidates = []
+    for chunk in chunks:
+        chunk_years = fiscal_years_in(chunk)
+        for sentence in SENTENCE_SPLIT_PATTERN.split(chunk):
+            if re.match(r"\s*Q[1-4]\b", sentence) or not FILING_TERM_PATTERN.search(sentence):
+                continue
+            if not _year_matches(sentence, chunk_years, fiscal_year):
+                continue
+            # "(April 1, 2024 to March 31, 2025)" is the period, not the deadline
+            text = PARENTHESES_PATTERN.sub(" ", sentence)
+            cue = DEADLINE_CUE_PATTERN.search(text)
+            deadline = parse_date(text[cue.end():]) if cue else None
+            if deadline:
+                years = fiscal_years_in(sentence) or chunk_years
+                candidates.append((fiscal_year or (next(iter(years)) if len(years) == 1 else ""), deadline))
+    return candidates
+
+
+def extract_deadline(query: str, text: str) -> Optional[str]:
+    """
+    Short answer to a date question from the retrieved text, e.g. "June 30, 2026 for FY 2025-26",
+    or None when the text does not state one deadline for what was asked.
+    """
+    if not text or not DEADLINE_QUESTION_PATTERN.search(query):
+        return None
+    fiscal_year = parse_fiscal_year(query)
+    quarter = parse_quarter(query)
+    chunks = [chunk for chunk in text.split("\n\n") if chunk.strip()]
+
+    answer = None
+    if quarter or detect_doc_type(query) == "quarterly_obligations":
+        candidates = _quarterly_candidates(chunks, fiscal_year, quarter)
+        suffix = f" of FY {fiscal_year}" if fiscal_year else ""
+        if quarter and len({deadline for _, deadline in candidates}) == 1:
+            answer = f"{format_date(candidates[0][1])} for Q{quarter}{suffix}"
+        elif not quarter and candidates:
+            by_quarter = {}
+            for number, deadline in candidates:
+                by_quarter.setdefault(number, deadline)
+            answer = "Quarterly deadlines" + suffix + ": " + "; ".join(
+                f"Q{number} {format_date(deadline)}" for number, deadline in sorted(by_quarter.items())
+            )
+    else:
+        candidates = _annual_candidates(chunks, fiscal_year)
+        if len({deadline for _, deadline in candidates}) == 1:
+            year = candidates[0][0]
+            answer = format_date(candidates[0][1]) + (f" for FY {year}" if year else "")
+
+    metrics.increment("deadline_extracted" if answer else "deadline_extraction_failed")
+    if answer:
+        logger.info(f"📅 Deadline extracted without Gemini: {answer}")
+    return answer
@@ -0,0 +1,154 @@
+"""
+Query embedding cache
+Two tiers in front of genai.embed_content:
+1. In-process LRU (EMBEDDING_CACHE_SIZE entries)
+2. Redis hash per (model, task_type, dimensionality), field = hash of the normalized
+   text, value = float32 bytes. Shared by all workers; the hash expires
+   EMBEDDING_CACHE_TTL_SECONDS after its last write.
+Repeat questions skip the Gemini round trip. Hits and misses are counted in metrics.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import google.generativeai as genai
+from config import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_REDIS, EMBEDDING_CACHE_TTL_SECONDS
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "models/gemini-embedding-001"
+DEFAULT_TASK_TYPE = "retrieval_query"
+DEFAULT_DIMENSIONALITY = 768
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share an entry"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries: int = 2048, use_redis: bool = True, redis_ttl: int = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, List[float]]" = OrderedDict()
+
+    @staticmethod
+    def _redis_key(model: str, task_type: str, dimensionality: int) -> str:
+        return f"embcache:{model}:{task_type}:{dimensionality}"
+
+    @staticmethod
+    def _field(normalized: str) -> str:
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: Tuple) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+            return embedding
+
+    def _put_local(self, key: Tuple, embedding: List[float]):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_redis(self, redis_key: str, field: str, dimensionality: int) -> Optional[List[float]]:
+        if not self.use_redis:
+            return None
+        try:
+            from redis_pool import get_sync_binary_redis
+            raw = get_sync_binary_redis().hget(redis_key, field)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        vector = np.frombuffer(raw, dtype=np.float32)
+        if vector.shape[0] != dimensionality:
+            return None
+        return vector.tolist()
+
+    def _put_redis(self, redis_key: str, field: str, embedding: List[float]):
+        if not self.use_redis:
+            return
+        try:
+            from redis_pool import get_sync_binary_redis
+            pipe = get_sync_binary_redis().pipeline(transaction=False)
+            pipe.hset(redis_key, field, np.asarray(embedding, dtype=np.float32).tobytes())
+            pipe.expire(redis_key, self.redis_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache write failed: {e}")
+
+    def get_embedding(self, text: str, model: str = DEFAULT_MODEL, task_type: str = DEFAULT_TASK_TYPE,
+                      dimensionality: int = DEFAULT_DIMENSIONALITY) -> List[float]:
+        """Embedding for text, from cache when possible (raises if Gemini fails on a miss)"""
+        normalized = normalize_text(text)
+        key = (normalized, model, task_type, dimensionality)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            metrics.increment("embedding_cache_hit_memory")
+            return embedding
+
+        redis_key = self._redis_key(model, task_type, dimensionality)
+        field = self._field(normalized)
+        embedding = self._get_redis(redis_key, field, dimensionality)
+        if embedding is not None:
+            metrics.increment("embedding_cache_hit_redis")
+            self._put_local(key, embedding)
+            return embedding
+
+        metrics.increment("embedding_cache_miss")
+        result = genai.embed_content(
+            model=model,
+            content=text,
+            task_type=task_type,
+            output_dimensionality=dimensionality
+        )
+        embedding = result['embedding']
+        # Store what Redis would return, so both tiers give identical vectors
+        if self.use_redis:
+            embedding = np.asarray(embedding, dtype=np.float32).tolist()
+        self._put_local(key, embedding)
+        self._put_redis(redis_key, field, embedding)
+        return embedding
+
+    def get_stats(self) -> Dict:
+        hits_memory = metrics.get_counter("embedding_cache_hit_memory")
+        hits_redis = metrics.get_counter("embedding_cache_hit_redis")
+        misses = metrics.get_counter("embedding_cache_miss")
+        total = hits_memory + hits_redis + misses
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "hits_memory": hits_memory,
+            "hits_redis": hits_redis,
+            "misses": misses,
+            "hit_rate": round((hits_memory + hits_redis) / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        """Clear the in-process tier (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_REDIS, EMBEDDING_CACHE_TTL_SECONDS)
+
+
+def embed_query(text: str) -> List[float]:
+    """Cached Gemini retrieval_query embedding (768 dims) used by search"""
+    return embedding_cache.get_embedding(text)
@@ -0,0 +1,211 @@
+"""
+Execution layer for blocking work
+Runs retrieval, LLM and reporting calls on separate bounded thread pools so the
+event loop keeps accepting and serving requests while slow calls are in flight.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Iterator
+from config import (
+    RETRIEVAL_POOL_SIZE, RETRIEVAL_MAX_CONCURRENCY,
+    LLM_POOL_SIZE, LLM_MAX_CONCURRENCY,
+    REPORTING_POOL_SIZE, REPORTING_MAX_CONCURRENCY,
+    STAGE_QUEUE_TIMEOUT, FANOUT_POOL_SIZE, LLM_BRANCH_POOL_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Stage name -> pool size and concurrency cap
+STAGES = {
+    "retrieval": {"workers": RETRIEVAL_POOL_SIZE, "max_concurrency": RETRIEVAL_MAX_CONCURRENCY},
+    "llm": {"workers": LLM_POOL_SIZE, "max_concurrency": LLM_MAX_CONCURRENCY},
+    "reporting": {"workers": REPORTING_POOL_SIZE, "max_concurrency": REPORTING_MAX_CONCURRENCY},
+}
+
+
+class StageBusyError(Exception):
+    """Raised when a stage has no free slot within STAGE_QUEUE_TIMEOUT"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' is at capacity")
+        self.stage = stage
+
+
+class ExecutionPools:
+    def __init__(self, stages: Dict[str, Dict], queue_timeout: float):
+        self.stages = stages
+        self.queue_timeout = queue_timeout
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight = {stage: 0 for stage in stages}
+        self._fanout_executor = None
+        self._fanout_lock = threading.Lock()
+        self._branch_executor = None
+        self._branch_slots = threading.BoundedSemaphore(LLM_BRANCH_POOL_SIZE)
+        self._branch_in_flight = 0
+
+    def _get_executor(self, stage: str) -> ThreadPoolExecutor:
+        """Create the stage's thread pool on first use"""
+        if stage not in self._executors:
+            workers = self.stages[stage]["workers"]
+            self._executors[stage] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{stage}-pool")
+            logger.info(f"🧵 Started '{stage}' pool with {workers} workers")
+        return self._executors[stage]
+
+    def _get_semaphore(self, stage: str) -> asyncio.Semaphore:
+        """Create the stage's concurrency cap on first use (inside the running loop)"""
+        if stage not in self._semaphores:
+            self._semaphores[stage] = asyncio.Semaphore(self.stages[stage]["max_concurrency"])
+        return self._semaphores[stage]
+
+    async def run(self, stage: str, func: Callable, *args, **kwargs):
+        """Run a blocking callable on the stage's pool without blocking the event loop"""
+        if stage not in self.stages:
+            raise ValueError(f"Unknown execution stage: {stage}")
+
+        semaphore = self._get_semaphore(stage)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"🚦 '{stage}' stage at capacity for {self.queue_timeout}s - rejecting call")
+            raise StageBusyError(stage)
+
+        self._in_flight[stage] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(stage), partial(func, *args, **kwargs))
+        finally:
+            self._in_flight[stage] -= 1
+            semaphore.release()
+
+    async def iterate(self, stage: str, func: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+        """
+        Drive a blocking generator on the stage's pool and yield its items on the loop.
+        The stage slot is held until the generator finishes; if the consumer stops early
+        (e.g. the client disconnected) the producer stops at its next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def produce():
+            for item in func(*args, **kwargs):
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        task = asyncio.ensure_future(self.run(stage, produce))
+        task.add_done_callback(lambda _: queue.put_nowait(done))
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            # Surface producer errors (including StageBusyError)
+            await task
+        finally:
+            cancelled.set()
+
+    def get_fanout_executor(self) -> ThreadPoolExecutor:
+        """
+        Plain thread pool for sub-tasks submitted from code already running on a stage pool
+        (e.g. one query per database). Kept separate so those callers can never deadlock
+        waiting on their own pool.
+        """
+        with self._fanout_lock:
+            if self._fanout_executor is None:
+                self._fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_POOL_SIZE, thread_name_prefix="fanout-pool")
+                logger.info(f"🧵 Started fan-out pool with {FANOUT_POOL_SIZE} workers")
+            return self._fanout_executor
+
+    def submit_llm_branch(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Start an LLM call that a call already on the LLM pool will join later (e.g. hybrid
+        search's LLM-knowledge branch) on its own pool of LLM_BRANCH_POOL_SIZE threads. Kept
+        off the stage and fan-out pools so branches neither deadlock on the pool that waits
+        for them nor delay per-database queries. Raises StageBusyError at once when every
+        branch slot is taken; the caller then makes the call itself, inside its own LLM slot.
+        """
+        if not self._branch_slots.acquire(blocking=False):
+            raise StageBusyError("llm_branch")
+        with self._fanout_lock:
+            if self._branch_executor is None:
+                self._branch_executor = ThreadPoolExecutor(max_workers=LLM_BRANCH_POOL_SIZE, thread_name_prefix="llm-branch-pool")
+                logger.info(f"🧵 Started LLM branch pool with {LLM_BRANCH_POOL_SIZE} workers")
+            self._branch_in_flight += 1
+            try:
+                future = self._branch_executor.submit(func, *args, **kwargs)
+            except RuntimeError:  # pool shut down
+                self._branch_in_flight -= 1
+                self._branch_slots.release()
+                raise
+        future.add_done_callback(self._release_branch_slot)
+        return future
+
+    def _release_branch_slot(self, _future: Future):
+        with self._fanout_lock:
+            self._branch_in_flight -= 1
+        self._branch_slots.release()
+
+    def get_stats(self) -> Dict:
+        """Current in-flight calls and limits per stage (and for LLM side branches)"""
+        stats = {
+            stage: {
+                "in_flight": self._in_flight[stage],
+                "workers": settings["workers"],
+                "max_concurrency": settings["max_concurrency"]
+            }
+            for stage, settings in self.stages.items()
+        }
+        stats["llm_branch"] = {
+            "in_flight": self._branch_in_flight,
+            "workers": LLM_BRANCH_POOL_SIZE,
+            "max_concurrency": LLM_BRANCH_POOL_SIZE
+        }
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Stop all pools (called on app shutdown)"""
+        for stage, executor in self._executors.items():
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info(f"🛑 Stopped '{stage}' pool")
+        self._executors.clear()
+        self._semaphores.clear()
+        with self._fanout_lock:
+            if self._fanout_executor is not None:
+                self._fanout_executor.shutdown(wait=wait, cancel_futures=True)
+                self._fanout_executor = None
+                logger.info("🛑 Stopped fan-out pool")
+            if self._branch_executor is not None:
+                self._branch_executor.shutdown(wait=wait, cancel_futures=True)
+                self._branch_executor = None
+                logger.info("🛑 Stopped LLM branch pool")
+
+
+# Global instance
+execution_pools = ExecutionPools(STAGES, STAGE_QUEUE_TIMEOUT)
+
+async def run_blocking(stage: str, func: Callable, *args, **kwargs):
+    """Run func(*args, **kwargs) on the given stage's thread pool"""
+    return await execution_pools.run(stage, func, *args, **kwargs)
+
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Shared fan-out pool (see ExecutionPools.get_fanout_executor)"""
+    return execution_pools.get_fanout_executor()
+
+
+def submit_llm_branch(func: Callable, *args, **kwargs) -> Future:
+    """LLM side branch on its own bounded pool (see ExecutionPools.submit_llm_branch)"""
+    return execution_pools.submit_llm_branch(func, *args, **kwargs)
+
+
+def iterate_blocking(stage: str, func: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+    """Iterate a blocking generator func(*args, **kwargs) from the given stage's thread pool"""
+    return execution_pools.iterate(stage, func, *args, **kwargs)
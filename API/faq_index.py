@@ -0,0 +1,106 @@
+"""
+In-memory FAQ index
+Loads data/epr_faqs.csv once into an inverted keyword index (keyword -> FAQ rows) with the
+high-priority questions precomputed, so suggestion generation does no file I/O. The file's
+mtime is checked at most every FAQ_RELOAD_CHECK_INTERVAL seconds and the index is rebuilt
+when it changes.
+"""
+
+import csv
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from config import FAQ_CSV_PATH, FAQ_RELOAD_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class FAQIndex:
+    def __init__(self, path: str = FAQ_CSV_PATH, check_interval: float = FAQ_RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = 0.0
+        # Swapped as a whole on reload: {"questions", "normalized", "postings", "high_priority"}
+        self._state: Optional[Dict] = None
+
+    def _load(self) -> Dict:
+        questions: List[str] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        high_priority: List[int] = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                row_id = len(questions)
+                questions.append(row.get('question', ''))
+                for keyword in set(row.get('keywords', '').lower().split()):
+                    postings[keyword].append(row_id)
+                if row.get('priority') == 'high':
+                    high_priority.append(row_id)
+        return {
+            "questions": questions,
+            "normalized": [q.lower().strip() for q in questions],
+            "postings": dict(postings),
+            "high_priority": high_priority,
+        }
+
+    def _ensure_loaded(self) -> Optional[Dict]:
+        """Current index; reloads when the CSV's mtime changes (None if the file is missing)"""
+        now = time.monotonic()
+        if self._state is not None and now - self._last_check < self.check_interval:
+            return self._state
+        with self._lock:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                if self._state is None:
+                    logger.warning(f"FAQ file not found: {self.path}")
+                return self._state
+            if mtime != self._mtime:
+                self._state = self._load()
+                self._mtime = mtime
+                logger.info(f"📋 FAQ index loaded: {len(self._state['questions'])} questions, "
+                            f"{len(self._state['postings'])} keywords")
+        return self._state
+
+    def related_questions(self, user_query: str, previous_suggestions: list = None, limit: int = 2) -> list:
+        """
+        Up to `limit` FAQ questions ranked by keyword overlap with the query (file order
+        breaks ties), topped up with high-priority questions. Questions equal to the query
+        or already suggested are skipped.
+        """
+        state = self._ensure_loaded()
+        if state is None:
+            return []
+
+        previous = set(previous_suggestions or [])
+        query_lower = user_query.lower()
+        query_normalized = query_lower.strip()
+        questions, normalized = state["questions"], state["normalized"]
+
+        def allowed(row_id: int) -> bool:
+            return normalized[row_id] != query_normalized and questions[row_id] not in previous
+
+        scores: Dict[int, int] = defaultdict(int)
+        for word in set(query_lower.split()):
+            for row_id in state["postings"].get(word, ()):
+                scores[row_id] += 1
+        ranked = sorted((row_id for row_id in scores if allowed(row_id)), key=lambda r: (-scores[r], r))
+        top_questions = [questions[row_id] for row_id in ranked[:limit]]
+        if len(top_questions) >= limit:
+            return top_questions
+
+        for row_id in state["high_priority"]:
+            if len(top_questions) >= limit:
+                break
+            if allowed(row_id) and questions[row_id] not in top_questions:
+                top_questions.append(questions[row_id])
+        return top_questions
+
+
+# Global instance
+faq_index = FAQIndex()
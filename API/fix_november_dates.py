@@ -4,8 +4,10 @@ Script to fix incorrect November 30, 2025 dates in ChromaDB databases.
 Replaces them with the correct final deadline: 31st January 2026
 """
 
+import os
 import sqlite3
 import sys
+from index_generation import bump_generation
 
 def fix_database(db_path, dry_run=False):
     """
@@ -86,6 +88,8 @@ def fix_database(db_path, dry_run=False):
         if not dry_run and updates_made > 0:
             conn.commit()
             print(f"\n✓ Successfully updated {updates_made} documents")
+            # In-place SQLite edits: record them in the manifest so the API picks them up
+            bump_generation("fix_november_dates", os.path.dirname(os.path.abspath(db_path)))
         elif dry_run:
             print(f"\n✓ Dry run complete - would update {updates_made} documents")
 
@@ -3,6 +3,7 @@ import chromadb
 import google.generativeai as genai
 import pdfplumber
 from dotenv import load_dotenv
+from index_generation import bump_generation
 
 load_dotenv()
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
@@ -83,6 +84,7 @@ def process_folder_pdfs(folder_path):
             metadatas=all_metadata,
             ids=all_ids
         )
+        bump_generation("gemini_pdf_processor", os.path.abspath("./chroma_db"), "pdf_docs", "models/text-embedding-004")
         
         print(f"Stored {len(all_chunks)} chunks from {len(pdf_files)} PDFs")
         print("Database ready!")
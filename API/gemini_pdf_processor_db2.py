@@ -3,6 +3,7 @@ import chromadb
 import google.generativeai as genai
 import pdfplumber
 from dotenv import load_dotenv
+from index_generation import bump_generation
 
 load_dotenv()
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
@@ -83,6 +84,7 @@ def process_folder_pdfs(folder_path, collection_name="epr_docs"):
             metadatas=all_metadata,
             ids=all_ids
         )
+        bump_generation("gemini_pdf_processor_db2", os.path.abspath("./chroma_db1"), collection_name, "models/text-embedding-004")
         
         print(f"Stored {len(all_chunks)} chunks from {len(pdf_files)} PDFs in chroma_db1/{collection_name}")
         print("Database ready!")
@@ -1,11 +1,18 @@
 import google.generativeai as genai
 import os
+import json
 import logging
 import re
-from typing import Dict, List, Optional
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from search import find_best_answer, generate_related_questions
-from config import CHROMA_DB_PATHS, COLLECTIONS
+from config import CHROMA_DB_PATHS, COLLECTIONS, ANSWER_CACHE_TTL_SECONDS, CONTEXT_WINDOW_TTL_SECONDS
+from state_backend import get_state_backend
+from execution_pools import submit_llm_branch, StageBusyError
+from metrics import metrics
+from canonical_answers import is_canonical_result
 from web_search_integration import search_with_web, web_search_engine
 
 load_dotenv()
@@ -14,6 +21,23 @@ logger = logging.getLogger(__name__)
 
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
+# One-shot mode: local replacements for the Gemini query rewrite before the database search
+YEAR_RANGE_PATTERN = re.compile(r"\b(20\d{2})\s*[-–/]\s*20(\d{2})\b")
+ABBREVIATIONS = [
+    (re.compile(r"\bPROs?\b(?! \()"), "Producer Responsibility Organization"),  # case-sensitive: not "pros"
+    (re.compile(r"\bCPCB\b(?! \()", re.IGNORECASE), "Central Pollution Control Board"),
+]
+
+# Structured output of the one-shot call: the rewritten question and the final, filtered answer
+ONE_SHOT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "rewritten_query": {"type": "string"},
+        "answer": {"type": "string"},
+    },
+    "required": ["rewritten_query", "answer"],
+}
+
 class HybridSearchEngine:
     def __init__(self):
         # Read weights from environment variables, with fallback to defaults
@@ -29,47 +53,87 @@ class HybridSearchEngine:
         logger.info(f"🔧 Hybrid Search Initialized: LLM={self.llm_weight*100:.0f}%, DB={self.db_weight*100:.0f}%")
 
         self.model = genai.GenerativeModel("gemini-2.0-flash")
-        self.conversation_history = []  # Store last 5 Q&A pairs
-        self.answer_cache = {}  # Cache for consistent answers to similar questions
+        # Last 5 Q&A pairs per session and the answer cache live in the state backend (shared across workers)
+        self.history_max_size = 5
+        self.history_ttl = CONTEXT_WINDOW_TTL_SECONDS
+        self.cache_namespace = "hybrid_answers"
+        self.cache_ttl = ANSWER_CACHE_TTL_SECONDS
 
         # Cache configuration
         self.cache_max_size = int(os.getenv('CACHE_MAX_SIZE', '100'))  # Max cached queries
         self.cache_enabled = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
     
-    def search(self, query: str, intent_result=None, previous_suggestions: list = None) -> Dict:
+    def search(self, query: str, intent_result=None, previous_suggestions: list = None, session_id: str = None,
+               one_shot: bool = False) -> Dict:
         """
         Hybrid search combining LLM knowledge and database search
         + Real-time web search for time-sensitive queries
         + Answer caching for consistency
+
+        one_shot replaces the four serial Gemini calls (query rewrite, LLM knowledge, combination,
+        filter) with a local query rewrite and one structured-output call given the database context
+
+        The steps run as a dependency graph: the LLM-knowledge call needs only the question (or,
+        with conversation history, the rewritten question), so it runs on the LLM branch pool
+        while this thread rewrites the query and searches the databases; both branches join at
+        _combine_results. Per-step timings are returned in source_info["timings_ms"].
         """
-        logger.info(f"🔄 Hybrid search for: {query[:100]}...")
+        logger.info(f"🔄 Hybrid search{' (one-shot)' if one_shot else ''} for: {query[:100]}...")
+
+        # This session's previous Q&A - answers that depend on it are never shared through the cache
+        conversation_history = self._get_conversation_history(session_id)
+        use_cache = self.cache_enabled and not conversation_history
 
         # STEP 0: Check cache for consistent answers (only for non-time-sensitive queries)
-        cache_key = query.lower().strip()
-        if self.cache_enabled and cache_key in self.answer_cache:
+        cache_key = ("one_shot:" if one_shot else "") + query.lower().strip()
+        cached_result = get_state_backend().cache_get(self.cache_namespace, cache_key) if use_cache else None
+        # Decided once on the user's question: the cache, the LLM branch and the web search all follow it
+        is_time_sensitive = web_search_engine.is_time_sensitive_query(query)
+        if cached_result is not None:
             # Don't use cache for time-sensitive queries
-            if not web_search_engine.is_time_sensitive_query(query):
+            if not is_time_sensitive:
                 logger.info(f"✅ Cache hit for query: {query[:50]}...")
-                return self.answer_cache[cache_key]
+                return cached_result
+
+        search_start = time.perf_counter()
+        timings = {}
+        has_history = bool(conversation_history)
+
+        # Check if this is a deadline/date query - these should use database directly
+        is_deadline_query = any(word in query.lower() for word in ['deadline', 'last date', 'due date', 'filing date', 'when', 'arf', 'annual return'])
 
-        # STEP 1: Use Gemini to understand and enhance query
-        enhanced_query = self._understand_query_with_gemini(query)
+        # LLM-knowledge branch: without history it only needs the original question, so start it now
+        # (deadline and time-sensitive queries usually answer from the database / web search alone,
+        # so they start it only if needed)
+        llm_knowledge = None
+        if not one_shot and not is_deadline_query and not has_history and not is_time_sensitive:
+            llm_knowledge = self._start_llm_knowledge(query, query, has_history)
 
-        # STEP 2: Check if query requires real-time web search
-        is_time_sensitive = web_search_engine.is_time_sensitive_query(enhanced_query)
+        # STEP 1: Use Gemini to understand and enhance query (one-shot: rewrite locally, Gemini rewrites in its single call)
+        enhanced_query = self._timed(timings, "query_rewrite", self._normalize_query if one_shot else self._understand_query_with_gemini, query)
 
-        # STEP 3: Add context from previous questions
-        context_aware_query = self._add_conversation_context(enhanced_query)
+        # STEP 2: Add context from this session's previous questions
+        context_aware_query = self._add_conversation_context(enhanced_query, conversation_history)
+        if not one_shot and not is_deadline_query and has_history and not is_time_sensitive:
+            llm_knowledge = self._start_llm_knowledge(context_aware_query, query, has_history)
 
-        # Get database results (40%)
-        db_results = find_best_answer(context_aware_query, intent_result, previous_suggestions)
+        # Retrieval branch: get database results (40%) on this thread
+        db_results = self._timed(timings, "retrieval", find_best_answer, context_aware_query, intent_result, previous_suggestions)
         db_answer = db_results.get("answer", "")
+        timings["retrieval_branch"] = round((time.perf_counter() - search_start) * 1000, 1)
+        is_canonical = is_canonical_result(db_results)
 
-        # Check if this is a deadline/date query - these should use database directly
-        is_deadline_query = any(word in query.lower() for word in ['deadline', 'last date', 'due date', 'filing date', 'when', 'arf', 'annual return'])
-
+        # KNOWN QUESTIONS: the curated answer is used as is
+        if is_canonical:
+            logger.info(f"📗 Canonical answer found during retrieval - using it directly")
+            hybrid_answer = db_answer
+            source_info = {
+                "hybrid_search": False,
+                "database_only": True,
+                "db_source": db_results.get("source_info", {})
+            }
         # FOR DEADLINE QUERIES: Use database answer directly without LLM mixing
-        if is_deadline_query and db_answer and len(db_answer) > 50:
+        elif is_deadline_query and db_answer and len(db_answer) > 50:
             logger.info(f"📅 Deadline query detected - using database answer directly")
             hybrid_answer = db_answer
             source_info = {
@@ -95,87 +159,39 @@ class HybridSearchEngine:
             else:
                 # Web search failed - fall back to normal hybrid
                 logger.warning("⚠️ Web search unavailable, using normal hybrid search")
-                llm_results = self._get_llm_knowledge(context_aware_query, query)
-                hybrid_answer = self._combine_results(db_results, llm_results, query)
+                hybrid_answer, llm_info = self._answer_with_llm(db_results, context_aware_query, query, has_history, one_shot, timings, llm_knowledge)
                 source_info = {
                     "hybrid_search": True,
                     "web_search_enabled": False,
                     "llm_weight": self.llm_weight,
                     "db_weight": self.db_weight,
-                    "db_source": db_results.get("source_info", {})
+                    "db_source": db_results.get("source_info", {}),
+                    **llm_info
                 }
         else:
             # NORMAL HYBRID SEARCH: 60% LLM + 40% Database
-            llm_results = self._get_llm_knowledge(context_aware_query, query)
-            hybrid_answer = self._combine_results(db_results, llm_results, query)
+            hybrid_answer, llm_info = self._answer_with_llm(db_results, context_aware_query, query, has_history, one_shot, timings, llm_knowledge)
             source_info = {
                 "hybrid_search": True,
                 "web_search_enabled": False,
                 "llm_weight": self.llm_weight,
                 "db_weight": self.db_weight,
-                "db_source": db_results.get("source_info", {})
+                "db_source": db_results.get("source_info", {}),
+                **llm_info
             }
 
-        # GEMINI-BASED INTELLIGENT FILTERING: Remove irrelevant content
-        if not is_deadline_query and len(hybrid_answer) > 150:
-            logger.info(f"🤖 Using Gemini to filter response (length: {len(hybrid_answer)} chars)")
-
-            filter_prompt = f"""You are a content filter. Your job is to remove ONLY the irrelevant parts from this answer.
+        # GEMINI-BASED INTELLIGENT FILTERING: Remove irrelevant content (the one-shot call already filtered)
+        if not is_deadline_query and not is_canonical and len(hybrid_answer) > 150:
+            if not one_shot:
+                hybrid_answer = self._timed(timings, "filter", self._filter_with_gemini, query, hybrid_answer)
+            hybrid_answer = self._cleanup_answer(hybrid_answer)
 
-User asked: "{query}"
-
-Current answer:
-{hybrid_answer}
-
-INSTRUCTIONS:
-1. Keep ONLY the information that DIRECTLY answers the user's question
-2. REMOVE any information about:
-   - Quarterly filing deadlines (Q1, Q2, Q3, Q4)
-   - EPR certificate deadlines unless asked
-   - Annual return filing dates unless asked
-   - Barcode/QR code requirements unless asked
-   - Any dates or deadlines unless specifically asked
-3. Keep the answer SHORT - maximum 60 words
-4. Return ONLY the filtered answer, nothing else
-
-Filtered answer:"""
-
-            try:
-                filter_config = genai.types.GenerationConfig(
-                    temperature=0.1,
-                    max_output_tokens=100
-                )
-                filter_response = self.model.generate_content(filter_prompt, generation_config=filter_config)
-                filtered_answer = filter_response.text.strip()
-
-                if filtered_answer and len(filtered_answer) >= 30:
-                    original_len = len(hybrid_answer)
-                    hybrid_answer = filtered_answer
-                    logger.info(f"✅ Gemini filtered: {original_len} → {len(hybrid_answer)} chars")
-                else:
-                    logger.warning(f"⚠️ Gemini filter returned too short, keeping original")
-            except Exception as e:
-                logger.error(f"❌ Gemini filter failed: {e}")
-
-            # Additional cleanup patterns for any remaining fragments
-            cleanup_patterns = [
-                r'(?:with|and) (?:specific )?deadlines.*?(?:\.|$)',
-                r'Q[1-4]\s*\([^)]+\)[:\s]*[^;\n]*',
-                r'The deadline for filing.*?(?:\.|$)',
-                r'Under the Plastic Waste Management Amendment Rules.*?\d{4}\)',
-                r'\n\s*•\s*Q[1-4].*?(?:\n|$)',
-            ]
-
-            for pattern in cleanup_patterns:
-                hybrid_answer = re.sub(pattern, '', hybrid_answer, flags=re.DOTALL | re.IGNORECASE | re.MULTILINE)
-
-            # Final cleanup
-            hybrid_answer = re.sub(r'\n\s*\n+', '\n\n', hybrid_answer)
-            hybrid_answer = re.sub(r'[,;:]\s*$', '.', hybrid_answer)
-            hybrid_answer = hybrid_answer.strip()
+        timings["total"] = round((time.perf_counter() - search_start) * 1000, 1)
+        source_info["timings_ms"] = timings
+        logger.info(f"⏱️ Hybrid search timings (ms): {timings}")
 
         # Store this Q&A in conversation history
-        self._update_conversation_history(query, hybrid_answer)
+        self._update_conversation_history(session_id, query, hybrid_answer)
 
         # Generate suggestions using the same FAQ CSV logic as main search
         suggestions = generate_related_questions(query, [], intent_result, previous_suggestions)
@@ -187,7 +203,7 @@ Filtered answer:"""
         }
 
         # Cache the result for non-time-sensitive queries
-        if self.cache_enabled and not is_time_sensitive:
+        if use_cache and not is_time_sensitive:
             self._cache_result(cache_key, result)
 
         return result
@@ -238,33 +254,60 @@ Enhanced Query:"""
             logger.error(f"❌ Query understanding failed: {e}")
             return query  # Fallback to original query on error
 
-    def _add_conversation_context(self, query: str) -> str:
+    def _normalize_query(self, query: str) -> str:
+        """Rewrite done without Gemini in one-shot mode: year formats and abbreviations"""
+        normalized = YEAR_RANGE_PATTERN.sub(r"\1-\2", query)
+        for pattern, expansion in ABBREVIATIONS:
+            normalized = pattern.sub(lambda match: f"{match.group(0)} ({expansion})", normalized, count=1)
+        if normalized != query:
+            logger.info(f"🧠 Query normalized: '{query}' → '{normalized}'")
+        return normalized
+
+    def _add_conversation_context(self, query: str, conversation_history: List[Dict]) -> str:
         """Add context from previous 5 questions to current query"""
-        if not self.conversation_history:
+        if not conversation_history:
             return query
         
         context = "\n".join([f"Q: {item['question']}\nA: {item['answer'][:100]}..." 
-                            for item in self.conversation_history[-3:]])  # Last 3 for brevity
+                            for item in conversation_history[-3:]])  # Last 3 for brevity
         
         return f"Previous context:\n{context}\n\nCurrent question: {query}"
     
-    def _update_conversation_history(self, question: str, answer: str):
-        """Update conversation history, keeping only last 5 Q&A pairs"""
-        self.conversation_history.append({
-            "question": question,
-            "answer": answer
-        })
-        
-        # Keep only last 5 conversations
-        if len(self.conversation_history) > 5:
-            self.conversation_history = self.conversation_history[-5:]
+    @staticmethod
+    def _history_key(session_id: str) -> str:
+        return f"hybrid:history:{session_id}"
+
+    def _get_conversation_history(self, session_id: str = None) -> List[Dict]:
+        """Last 5 Q&A pairs of this session (none without a session)"""
+        if not session_id:
+            return []
+        return get_state_backend().list_get(self._history_key(session_id))
+
+    def _update_conversation_history(self, session_id: str, question: str, answer: str):
+        """Update the session's conversation history, keeping only last 5 Q&A pairs"""
+        if not session_id:
+            return
+        get_state_backend().list_append(
+            self._history_key(session_id),
+            {"question": question, "answer": answer},
+            max_len=self.history_max_size,
+            ttl=self.history_ttl
+        )
     
-    def _get_llm_knowledge(self, context_query: str, original_query: str) -> str:
+    def has_conversation_history(self, session_id: str = None) -> bool:
+        """True if this session's next query will be contextualized by earlier Q&A"""
+        return bool(self._get_conversation_history(session_id))
+
+    def record_turn(self, session_id: str, question: str, answer: str):
+        """Add a Q&A pair computed elsewhere (e.g. a shared single-flight answer) to the session's history"""
+        self._update_conversation_history(session_id, question, answer)
+
+    def _get_llm_knowledge(self, context_query: str, original_query: str, has_history: bool = False) -> str:
         """Get LLM's knowledge about the query with conversation context"""
         prompt = f"""
         As an EPR compliance expert, answer this query:
 
-        {context_query if len(self.conversation_history) > 0 else f"Query: {original_query}"}
+        {context_query if has_history else f"Query: {original_query}"}
 
         RULES:
         - If you know the answer with certainty, provide it directly and concisely
@@ -379,6 +422,166 @@ Enhanced Query:"""
             logger.error(f"Result combination failed: {e}")
             return self._fallback_combination(db_answer, llm_knowledge)
     
+    @staticmethod
+    def _timed(timings: Dict, step: str, func, *args, **kwargs):
+        """func(*args, **kwargs), recording its duration in ms as timings[step]"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[step] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _llm_knowledge_branch(self, context_query: str, query: str, has_history: bool) -> Tuple[str, float]:
+        """(_get_llm_knowledge result, its duration in ms) - the branch writes no shared state"""
+        branch_timings = {}
+        llm_knowledge = self._timed(branch_timings, "llm_knowledge", self._get_llm_knowledge, context_query, query, has_history=has_history)
+        return llm_knowledge, branch_timings["llm_knowledge"]
+
+    def _start_llm_knowledge(self, context_query: str, query: str, has_history: bool) -> Optional[Future]:
+        """
+        Run _llm_knowledge_branch on the LLM branch pool, or return None when all its slots are taken
+        (the call is then made inline at the join, within this search's own LLM slot). A search that
+        answers without the LLM just never joins the future.
+        """
+        try:
+            return submit_llm_branch(self._llm_knowledge_branch, context_query, query, has_history)
+        except StageBusyError:
+            logger.info("🚦 LLM branch pool busy - LLM knowledge will run after retrieval")
+            metrics.increment("llm_branch_inline")
+            return None
+
+    def _answer_with_llm(self, db_results: Dict, context_query: str, query: str, has_history: bool,
+                         one_shot: bool, timings: Dict, llm_knowledge: Optional[Future] = None) -> Tuple[str, Dict]:
+        """
+        (answer, extra source info) from LLM knowledge + database results, in one or two Gemini calls.
+        llm_knowledge is the LLM-knowledge branch if it was started alongside retrieval.
+        """
+        if one_shot:
+            return self._timed(timings, "one_shot", self._answer_in_one_call, db_results, context_query, query, has_history)
+        if llm_knowledge is None:
+            llm_results = self._timed(timings, "llm_knowledge", self._get_llm_knowledge, context_query, query, has_history=has_history)
+        else:
+            # Join: time spent waiting here is how much longer the LLM branch took than retrieval
+            llm_results, timings["llm_knowledge"] = self._timed(timings, "llm_knowledge_wait", llm_knowledge.result)
+        return self._timed(timings, "combine", self._combine_results, db_results, llm_results, query), {}
+
+    def _answer_in_one_call(self, db_results: Dict, context_query: str, query: str, has_history: bool) -> Tuple[str, Dict]:
+        """Query rewrite, LLM knowledge, combination and filtering as one structured-output Gemini call"""
+        db_answer = db_results.get("answer", "")
+        query_lower = query.lower()
+        is_contact_query = 'recircle' in query_lower and any(keyword in query_lower for keyword in
+                              ['address', 'contact', 'phone', 'email', 'office', 'location', 'visit', 'call'])
+        weighting = (
+            "This is a ReCircle contact query: start directly with the DATABASE answer (80% weight), it has accurate "
+            "ReCircle contact details; only supplement with your own knowledge if it lacks specific details."
+            if is_contact_query and db_answer else
+            f"Combine your own EPR knowledge ({int(self.llm_weight*100)}% weight) with the DATABASE KNOWLEDGE "
+            f"({int(self.db_weight*100)}% weight)."
+        )
+
+        prompt = f"""You are an EPR compliance expert for plastic waste. Answer the user's question in one step.
+
+{context_query if has_history else f"USER QUERY: {query}"}
+
+DATABASE KNOWLEDGE:
+{db_answer or "(no database results)"}
+
+STEP 1 - rewritten_query: rewrite the question as a clear, self-contained query.
+- Normalize year formats (2023-2024 → 2023-24), expand abbreviations (PRO → Producer Responsibility Organization)
+- Keep the original intent and meaning; if it is already clear and specific, return it as-is
+
+STEP 2 - answer: answer the rewritten query.
+- {weighting}
+- The database contains extra information that is NOT relevant to the question. Use ONLY what answers it.
+- Answer in MAXIMUM 50 words. Simple definition questions ("what is EPR", "what is C1") get 1-2 sentences ONLY.
+- DO NOT include quarterly deadlines (Q1-Q4), EPR certificate filing dates, annual return deadlines,
+  barcode/QR requirements or registration deadlines UNLESS the user specifically asks about them
+- If the question asks for dates or deadlines you are uncertain about and the database does not state them, answer:
+  "For the latest information on [topic], please check the CPCB portal at cpcb.nic.in or contact the EPR helpline."
+- Focus ONLY on EPR plastic waste (do NOT mention e-waste, battery waste, etc.)
+- Clean up HTML entities (&quot; &amp; etc.), start with the answer immediately (no preambles)
+"""
+
+        try:
+            generation_config = genai.types.GenerationConfig(
+                temperature=0.1,
+                top_p=0.7,
+                max_output_tokens=200,  # Rewritten query + 50-word answer + JSON keys
+                response_mime_type="application/json",
+                response_schema=ONE_SHOT_RESPONSE_SCHEMA
+            )
+            response = self.model.generate_content(prompt, generation_config=generation_config)
+            parsed = json.loads(response.text)
+            answer = parsed.get("answer", "").strip()
+            rewritten_query = parsed.get("rewritten_query", "").strip()
+            if not answer:
+                raise ValueError("empty answer")
+            logger.info(f"🧠 One-shot answer ({len(answer)} chars) for rewritten query: '{rewritten_query}'")
+            return answer, {"one_shot": True, "rewritten_query": rewritten_query}
+        except Exception as e:
+            logger.error(f"One-shot answer failed: {e}")
+            return self._fallback_combination(db_answer, ""), {"one_shot": True}
+
+    def _filter_with_gemini(self, query: str, hybrid_answer: str) -> str:
+        """Ask Gemini to remove the parts of the answer that do not answer the question"""
+        logger.info(f"🤖 Using Gemini to filter response (length: {len(hybrid_answer)} chars)")
+
+        filter_prompt = f"""You are a content filter. Your job is to remove ONLY the irrelevant parts from this answer.
+
+User asked: "{query}"
+
+Current answer:
+{hybrid_answer}
+
+INSTRUCTIONS:
+1. Keep ONLY the information that DIRECTLY answers the user's question
+2. REMOVE any information about:
+   - Quarterly filing deadlines (Q1, Q2, Q3, Q4)
+   - EPR certificate deadlines unless asked
+   - Annual return filing dates unless asked
+   - Barcode/QR code requirements unless asked
+   - Any dates or deadlines unless specifically asked
+3. Keep the answer SHORT - maximum 60 words
+4. Return ONLY the filtered answer, nothing else
+
+Filtered answer:"""
+
+        try:
+            filter_config = genai.types.GenerationConfig(
+                temperature=0.1,
+                max_output_tokens=100
+            )
+            filter_response = self.model.generate_content(filter_prompt, generation_config=filter_config)
+            filtered_answer = filter_response.text.strip()
+
+            if filtered_answer and len(filtered_answer) >= 30:
+                original_len = len(hybrid_answer)
+                hybrid_answer = filtered_answer
+                logger.info(f"✅ Gemini filtered: {original_len} → {len(hybrid_answer)} chars")
+            else:
+                logger.warning(f"⚠️ Gemini filter returned too short, keeping original")
+        except Exception as e:
+            logger.error(f"❌ Gemini filter failed: {e}")
+        return hybrid_answer
+
+    def _cleanup_answer(self, hybrid_answer: str) -> str:
+        """Regex cleanup for deadline fragments left after filtering"""
+        cleanup_patterns = [
+            r'(?:with|and) (?:specific )?deadlines.*?(?:\.|$)',
+            r'Q[1-4]\s*\([^)]+\)[:\s]*[^;\n]*',
+            r'The deadline for filing.*?(?:\.|$)',
+            r'Under the Plastic Waste Management Amendment Rules.*?\d{4}\)',
+            r'\n\s*•\s*Q[1-4].*?(?:\n|$)',
+        ]
+
+        for pattern in cleanup_patterns:
+            hybrid_answer = re.sub(pattern, '', hybrid_answer, flags=re.DOTALL | re.IGNORECASE | re.MULTILINE)
+
+        # Final cleanup
+        hybrid_answer = re.sub(r'\n\s*\n+', '\n\n', hybrid_answer)
+        hybrid_answer = re.sub(r'[,;:]\s*$', '.', hybrid_answer)
+        return hybrid_answer.strip()
+
     def _fallback_combination(self, db_answer: str, llm_knowledge: str) -> str:
         """Simple fallback combination if LLM combination fails"""
         if not db_answer and not llm_knowledge:
@@ -395,26 +598,26 @@ Enhanced Query:"""
 
     def _cache_result(self, cache_key: str, result: Dict):
         """Store result in cache with size limit"""
-        # Implement simple LRU-like behavior: remove oldest if cache is full
-        if len(self.answer_cache) >= self.cache_max_size:
-            # Remove the first (oldest) entry
-            oldest_key = next(iter(self.answer_cache))
-            del self.answer_cache[oldest_key]
+        # Simple LRU-like behavior: the backend removes the oldest entry if the cache is full
+        evicted = get_state_backend().cache_set(self.cache_namespace, cache_key, result, self.cache_max_size, self.cache_ttl)
+        if evicted:
             logger.info(f"🗑️ Cache full, removed oldest entry")
 
-        self.answer_cache[cache_key] = result
         logger.info(f"💾 Cached result for query: {cache_key[:50]}...")
 
     def clear_cache(self):
         """Clear the answer cache"""
-        self.answer_cache.clear()
+        get_state_backend().cache_clear(self.cache_namespace)
         logger.info("🧹 Answer cache cleared")
 
 # Global instance
 hybrid_search_engine = HybridSearchEngine()
 
-def find_hybrid_answer(query: str, intent_result=None, previous_suggestions: list = None) -> Dict:
+def find_hybrid_answer(query: str, intent_result=None, previous_suggestions: list = None, session_id: str = None,
+                       one_shot: bool = False) -> Dict:
     """
     Main function to get hybrid search results
+    session_id scopes the conversation history used to contextualize the query
+    one_shot answers with a single structured Gemini call instead of four serial ones
     """
-    return hybrid_search_engine.search(query, intent_result, previous_suggestions)
\ No newline at end of file
+    return hybrid_search_engine.search(query, intent_result, previous_suggestions, session_id, one_shot)
\ No newline at end of file
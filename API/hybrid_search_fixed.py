@@ -269,14 +269,14 @@ What specific information do you need?"""
         """Search ONLY DB4 (Timeline DB) for deadline queries"""
         from config import CHROMA_DB_PATH_4, COLLECTIONS
         import chromadb
-        from sentence_transformers import SentenceTransformer
+        from local_embeddings import get_local_model
         
         try:
             client = chromadb.PersistentClient(path=CHROMA_DB_PATH_4)
             collection_name = COLLECTIONS[CHROMA_DB_PATH_4][0]
             collection = client.get_collection(name=collection_name)
             
-            model = SentenceTransformer('all-MiniLM-L6-v2')
+            model = get_local_model()
             query_embedding = model.encode([query]).tolist()
             
             results = collection.query(
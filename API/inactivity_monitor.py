@@ -1,7 +1,9 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from collect_data import redis_client
+from redis_pool import get_redis
+from execution_pools import run_blocking
+from state_backend import holds_lease
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -56,9 +58,13 @@ async def monitor_inactivity():
     while True:
         try:
             await asyncio.sleep(60)
+
+            # With several workers only the lease holder scans sessions
+            if not await holds_lease("inactivity_monitor"):
+                continue
             
-            session_keys = redis_client.keys("session:*")
-            for key in session_keys:
+            redis_client = get_redis()
+            async for key in redis_client.scan_iter(match="session:*", count=500):
                 key_str = key.decode() if isinstance(key, bytes) else key
                 if ":chat" in key_str or ":thankyou_sent" in key_str or ":monitor_inactivity" in key_str or ":backend_sent" in key_str or ":finalized" in key_str or ":suggestions" in key_str:
                     continue
@@ -67,21 +73,21 @@ async def monitor_inactivity():
 
                 # Only monitor sessions that are marked for monitoring
                 monitor_key = f"session:{session_id}:monitor_inactivity"
-                if not redis_client.exists(monitor_key):
+                if not await redis_client.exists(monitor_key):
                     continue
 
                 thankyou_key = f"session:{session_id}:thankyou_sent"
-                if redis_client.exists(thankyou_key):
+                if await redis_client.exists(thankyou_key):
                     continue
 
                 # Check key type before calling hgetall
-                key_type = redis_client.type(key_str)
+                key_type = await redis_client.type(key_str)
                 if isinstance(key_type, bytes):
                     key_type = key_type.decode()
                 if key_type != "hash":
                     continue
 
-                session_data = redis_client.hgetall(key_str)
+                session_data = await redis_client.hgetall(key_str)
                 if not session_data:
                     continue
                 
@@ -100,19 +106,19 @@ async def monitor_inactivity():
                     user_name = (session_data.get(b"user_name") or session_data.get("user_name") or b"").decode() if isinstance(session_data.get(b"user_name") or session_data.get("user_name"), bytes) else session_data.get("user_name", "User")
                     
                     # Send thank you email only once (check flag)
-                    if user_email and not redis_client.exists(thankyou_key):
+                    if user_email and not await redis_client.exists(thankyou_key):
                         logging.info(f"📧 Sending thank you email to {user_name} ({user_email}) after {INACTIVITY_THRESHOLD_MINUTES} min inactivity")
-                        if send_thank_you_email(user_email, user_name):
-                            redis_client.set(thankyou_key, "1", ex=86400)
+                        if await run_blocking("reporting", send_thank_you_email, user_email, user_name):
+                            await redis_client.set(thankyou_key, "1", ex=86400)
                             logging.info(f"✅ Thank you email sent and flag set for session {session_id}")
                     
                     # Send PDF to backend team (can be sent multiple times)
                     backend_sent_key = f"session:{session_id}:backend_sent"
-                    if not redis_client.exists(backend_sent_key):
+                    if not await redis_client.exists(backend_sent_key):
                         logging.info(f"📊 Sending PDF to backend team for session {session_id}")
                         from session_reporter import finalize_session
-                        finalize_session(session_id)
-                        redis_client.set(backend_sent_key, "1", ex=3600)  # 1 hour expiry
+                        await run_blocking("reporting", finalize_session, session_id)
+                        await redis_client.set(backend_sent_key, "1", ex=3600)  # 1 hour expiry
                         logging.info(f"✅ PDF sent to backend team for session {session_id}")
                         
         except Exception as e:
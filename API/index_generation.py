@@ -0,0 +1,106 @@
+"""
+Index generation number
+A counter in INDEX_GENERATION_PATH that every script writing to a ChromaDB (or building an
+index derived from one) bumps when it finishes; a write to a database also rewrites that
+database's manifest (see db_manifest.py). The API reads the counter on each query - a
+stat() call, the file is only re-read when it changes - and uses it to key the retrieval
+result cache and to check the manifests immediately instead of at the next poll.
+
+Writers:
+    from index_generation import bump_generation
+    bump_generation("update_udb", UDB_PATH, collection_name="Updated_DB", embedding_model="models/text-embedding-004")
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from config import INDEX_GENERATION_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps are not serialized across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class IndexGeneration:
+    def __init__(self, path: str = INDEX_GENERATION_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat = None
+        self._data: Dict = {"generation": 0}
+
+    def _read_file(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data.get("generation"), int) else {"generation": 0}
+        except (OSError, ValueError):
+            return {"generation": 0}
+
+    def read(self) -> int:
+        """Current generation (0 until a writer has bumped it)"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            signature = None
+        if signature != self._stat:
+            with self._lock:
+                self._data = self._read_file() if signature else {"generation": 0}
+                self._stat = signature
+        return self._data["generation"]
+
+    def bump(self, source: str, db_path: Optional[str] = None) -> int:
+        """Increment the generation after a write; returns the new value"""
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            generation = self._read_file()["generation"] + 1
+            tmp_path = f"{self.path}.tmp.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "generation": generation,
+                    "source": source,
+                    "db_path": db_path,
+                    "updated_at": datetime.now().isoformat(timespec="seconds"),
+                }, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            lock_file.close()
+        logger.info(f"🔢 Index generation {generation} ({source})")
+        return generation
+
+    def get_stats(self) -> Dict:
+        """Generation plus the source and db_path of the last bump"""
+        self.read()
+        return dict(self._data)
+
+
+# Global instance
+index_generation = IndexGeneration()
+
+
+def bump_generation(source: str, db_path: Optional[str] = None, collection_name: Optional[str] = None,
+                    embedding_model: Optional[str] = None) -> int:
+    """
+    Called by writer scripts once their changes are on disk. With db_path, the database's
+    manifest is rewritten first (embedding_model is recorded for collection_name, or for
+    every collection if None).
+    """
+    if db_path:
+        try:
+            from db_manifest import write_manifest
+            write_manifest(db_path, source, collection_name, embedding_model)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not update the manifest of {db_path} ({source}): {e}")
+    try:
+        return index_generation.bump(source, db_path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not bump index generation ({source}): {e}")
+        return index_generation.read()
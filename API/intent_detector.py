@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 import re
 from dataclasses import dataclass
 import json
+from keyword_matcher import keyword_matcher
 
 @dataclass
 class IntentResult:
@@ -129,10 +130,26 @@ class IntentDetector:
             'urgent_keywords': ['urgent', 'deadline', 'penalty', 'audit'],
             'service_requests': ['certificate', 'registration', 'consultation', 'quote']
         }
+
+        # Keyword lists checked by _should_suggest_connection
+        self.connection_keywords = {
+            'risk': ['penalty', 'fine', 'audit', 'legal action', 'court'],
+            'info': ['what is', 'what are', 'define', 'definition', 'meaning of', 'explain',
+                     'how to', 'process', 'documents', 'required', 'timeline', 'date', 'when'],
+            'help_service': ['help me', 'assist me', 'need help', 'want help', 'can you help',
+                             'consultation', 'quote', 'pricing', 'cost of service', 'want to work with']
+        }
+
+        # All keyword tables are matched in one pass by the shared matcher
+        keyword_matcher.register('intent_keywords', {intent: p['keywords'] for intent, p in self.intent_patterns.items()})
+        keyword_matcher.register('intent_phrases', {intent: p['phrases'] for intent, p in self.intent_patterns.items()})
+        keyword_matcher.register('engagement', self.engagement_indicators)
+        keyword_matcher.register('connection', self.connection_keywords)
     
     def analyze_intent(self, query: str, conversation_history: List[Dict]) -> IntentResult:
         """Analyze user intent with enhanced engagement tracking"""
         query_lower = query.lower()
+        hits = keyword_matcher.scan(query_lower)
         
         # Calculate engagement score from conversation
         engagement_score = self._calculate_engagement_score(query_lower, conversation_history)
@@ -146,14 +163,16 @@ class IntentDetector:
             indicators = []
             
             # Check keywords
-            for keyword in patterns['keywords']:
-                if keyword in query_lower:
+            matched_keywords = hits.matched('intent_keywords', intent_type)
+            for keyword in patterns['keywords'] if matched_keywords else ():
+                if keyword in matched_keywords:
                     score += patterns['weight']
                     indicators.append(f"keyword: {keyword}")
             
             # Check phrases
-            for phrase in patterns['phrases']:
-                if phrase in query_lower:
+            matched_phrases = hits.matched('intent_phrases', intent_type)
+            for phrase in patterns['phrases'] if matched_phrases else ():
+                if phrase in matched_phrases:
                     score += patterns['weight'] * 1.2
                     indicators.append(f"phrase: {phrase}")
             
@@ -193,10 +212,16 @@ class IntentDetector:
         engagement_behaviors = []
         
         for query in all_queries:
-            # Check engagement indicators
+            # Check engagement indicators (history messages are served from the matcher's cache)
+            matched_categories = keyword_matcher.scan(query).categories('engagement')
+            if not matched_categories:
+                continue
             for category, indicators in self.engagement_indicators.items():
+                matched = matched_categories.get(category)
+                if not matched:
+                    continue
                 for indicator in indicators:
-                    if indicator in query:
+                    if indicator in matched:
                         if category == 'business_context':
                             score += 2.0
                         elif category == 'urgency_signals':
@@ -225,10 +250,10 @@ class IntentDetector:
                                  engagement_score: float, intent: str, confidence: float) -> bool:
         """Enhanced connection suggestion logic - only for high-intent queries"""
         user_message_count = len([msg for msg in history if msg.get('role') == 'user']) + 1
+        hits = keyword_matcher.scan(query)
         
         # Immediate connection for high-risk situations
-        risk_keywords = ['penalty', 'fine', 'audit', 'legal action', 'court']
-        if any(keyword in query for keyword in risk_keywords):
+        if hits.any('connection', 'risk'):
             return True
         
         # Immediate connection for urgent needs
@@ -236,16 +261,11 @@ class IntentDetector:
             return True
         
         # Exclude informational queries
-        info_keywords = ['what is', 'what are', 'define', 'definition', 'meaning of', 'explain', 
-                        'how to', 'process', 'documents', 'required', 'timeline', 'date', 'when']
-        if any(keyword in query for keyword in info_keywords):
+        if hits.any('connection', 'info'):
             return False
         
         # Only for explicit help/service requests
-        help_keywords = ['help me', 'assist me', 'need help', 'want help', 'can you help']
-        service_keywords = ['consultation', 'quote', 'pricing', 'cost of service', 'want to work with']
-        
-        if any(keyword in query for keyword in help_keywords + service_keywords):
+        if hits.any('connection', 'help_service'):
             return True
         
         # Very high engagement only (10+ messages with high score)
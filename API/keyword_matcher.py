@@ -0,0 +1,186 @@
+"""
+Shared multi-pattern keyword matcher
+Modules register their keyword tables once (namespace -> {category: [keywords]}) and the
+matcher compiles all of them into a single Aho-Corasick automaton. scan(text) walks the
+text once and reports every category with at least one keyword present, with the same
+substring semantics as `keyword in text`.
+
+Scan results are cached per text (LRU), so conversation histories that are re-analysed
+on every turn are only scanned once per message. Uses the pyahocorasick C extension when
+installed, otherwise a pure-Python automaton.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+SCAN_CACHE_SIZE = 4096
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+class KeywordHits:
+    """Keywords found in one text, grouped by namespace and category"""
+    __slots__ = ("_hits",)
+
+    def __init__(self, hits: Dict[str, Dict[str, FrozenSet[str]]]):
+        self._hits = hits
+
+    def categories(self, namespace: str) -> Dict[str, FrozenSet[str]]:
+        """Matched keywords per category of the namespace (categories without a hit are absent)"""
+        return self._hits.get(namespace, {})
+
+    def matched(self, namespace: str, category: str) -> FrozenSet[str]:
+        """Keywords of the category present in the text"""
+        return self._hits.get(namespace, {}).get(category, _EMPTY)
+
+    def any(self, namespace: str, category: str) -> bool:
+        return category in self._hits.get(namespace, {})
+
+    def first(self, namespace: str, categories: Iterable[str]) -> Optional[str]:
+        """First category (in the given order) with a hit"""
+        matched = self._hits.get(namespace)
+        if matched:
+            for category in categories:
+                if category in matched:
+                    return category
+        return None
+
+
+class _PythonAutomaton:
+    """
+    Aho-Corasick automaton over characters, used when pyahocorasick is not installed.
+    Failure links are folded into a full transition table at build time, so scanning is
+    one dict lookup per character.
+    """
+
+    def __init__(self, patterns: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        # Breadth-first: a state's transitions default to those of its failure state, and its
+        # outputs include the failure state's (states closer to the root are finished first)
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+        # Transitions back to the root are implied by the lookup default
+        self.transitions = [{c: s for c, s in t.items() if s} for t in transitions]
+        self.outputs = [tuple(o) for o in outputs]
+
+    def find(self, text: str) -> set:
+        transitions, outputs = self.transitions, self.outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class _CAutomaton:
+    """pyahocorasick-backed automaton"""
+
+    def __init__(self, patterns: List[str]):
+        self.automaton = ahocorasick.Automaton()
+        for pattern_id, pattern in enumerate(patterns):
+            self.automaton.add_word(pattern, pattern_id)
+        self.automaton.make_automaton()
+
+    def find(self, text: str) -> set:
+        return {pattern_id for _, pattern_id in self.automaton.iter(text)}
+
+
+class KeywordMatcher:
+    def __init__(self, cache_size: int = SCAN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # namespace -> {category: [keywords]}
+        self._tables: Dict[str, Dict[str, List[str]]] = {}
+        self._compiled = None
+        self._cache: "OrderedDict[str, KeywordHits]" = OrderedDict()
+
+    def register(self, namespace: str, tables: Dict[str, Iterable[str]]):
+        """Add (or replace) a namespace's keyword tables; the automaton is recompiled on next scan"""
+        with self._lock:
+            self._tables[namespace] = {category: list(keywords) for category, keywords in tables.items()}
+            self._compiled = None
+            self._cache.clear()
+
+    def _compile(self):
+        """Automaton plus, per pattern id, the keyword and the (namespace, category) labels it belongs to"""
+        labels: Dict[str, List[Tuple[str, str]]] = {}
+        for namespace, tables in self._tables.items():
+            for category, keywords in tables.items():
+                for keyword in keywords:
+                    if keyword:
+                        labels.setdefault(keyword, []).append((namespace, category))
+        patterns = list(labels)
+        automaton = _CAutomaton(patterns) if ahocorasick is not None else _PythonAutomaton(patterns)
+        return automaton, patterns, [labels[p] for p in patterns]
+
+    def scan(self, text: str, cache: bool = True) -> KeywordHits:
+        """
+        Every registered category with a keyword in text (single pass). cache=False for
+        texts that will not repeat, such as a whole conversation joined into one string.
+        """
+        hits = self._cache.get(text) if cache else None
+        if hits is not None:
+            try:
+                self._cache.move_to_end(text)
+            except KeyError:  # evicted by a concurrent scan
+                pass
+            return hits
+
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = self._compile()
+            automaton, patterns, pattern_labels = self._compiled
+
+        grouped: Dict[str, Dict[str, set]] = {}
+        for pattern_id in automaton.find(text):
+            for namespace, category in pattern_labels[pattern_id]:
+                grouped.setdefault(namespace, {}).setdefault(category, set()).add(patterns[pattern_id])
+        hits = KeywordHits({
+            namespace: {category: frozenset(keywords) for category, keywords in categories.items()}
+            for namespace, categories in grouped.items()
+        })
+        if not cache:
+            return hits
+
+        with self._lock:
+            self._cache[text] = hits
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return hits
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# Global instance shared by intent_detector, context_manager, search, llm_refiner and main
+keyword_matcher = KeywordMatcher()
@@ -2,7 +2,7 @@ from typing import Dict, Optional
 from datetime import datetime
 import json
 import logging
-from collect_data import redis_client
+from redis_pool import get_redis
 from notification_system import notification_system
 from backend_notifications import backend_notifications
 from lead_qualification import lead_qualification
@@ -32,12 +32,10 @@ class LeadManager:
     async def track_user_intent(self, session_id: str, intent_result, query: str,
                                 user_data: Optional[Dict] = None, engagement_score: float = 0):
         """Track user intent and update lead scoring in Redis"""
-        if not redis_client:
-            return
-
         try:
+            redis_client = get_redis()
             lead_key = f"lead:{session_id}"
-            existing_data = redis_client.hgetall(lead_key)
+            existing_data = await redis_client.hgetall(lead_key)
 
             lead_data = {
                 'session_id': session_id,
@@ -96,8 +94,8 @@ class LeadManager:
             lead_data['priority'] = self._calculate_priority(lead_data['lead_score'], engagement_score)
 
             # Save to Redis
-            redis_client.hmset(lead_key, mapping=lead_data)
-            redis_client.expire(lead_key, 86400 * 30)
+            await redis_client.hset(lead_key, mapping=lead_data)
+            await redis_client.expire(lead_key, 86400 * 30)
 
             # Trigger notifications only (no PDF here)
             await self._check_notifications(lead_data)
@@ -147,8 +145,10 @@ class LeadManager:
         """Send alert for critical leads (no PDF)"""
         try:
             lead_key = f"lead:{lead_data['session_id']}"
-            redis_client.hset(lead_key, 'critical_lead', 'true')
-            redis_client.hset(lead_key, 'critical_timestamp', datetime.utcnow().isoformat())
+            await get_redis().hset(lead_key, mapping={
+                'critical_lead': 'true',
+                'critical_timestamp': datetime.utcnow().isoformat()
+            })
             await notification_system.send_hot_lead_alert(lead_data)
         except Exception as e:
             logging.error(f"Error notifying critical lead: {e}")
@@ -157,8 +157,10 @@ class LeadManager:
         """Notify hot leads (no PDF)"""
         try:
             lead_key = f"lead:{lead_data['session_id']}"
-            redis_client.hset(lead_key, 'hot_lead', 'true')
-            redis_client.hset(lead_key, 'hot_lead_timestamp', datetime.utcnow().isoformat())
+            await get_redis().hset(lead_key, mapping={
+                'hot_lead': 'true',
+                'hot_lead_timestamp': datetime.utcnow().isoformat()
+            })
             await notification_system.send_hot_lead_alert(lead_data)
         except Exception as e:
             logging.error(f"Error notifying hot lead: {e}")
@@ -167,7 +169,7 @@ class LeadManager:
         """Notify backend team about high engagement users"""
         try:
             lead_key = f"lead:{lead_data['session_id']}"
-            redis_client.hset(lead_key, 'backend_notified', 'true')
+            await get_redis().hset(lead_key, 'backend_notified', 'true')
 
             user_data = {
                 'email': lead_data.get('email', ''),
@@ -227,11 +229,9 @@ class LeadManager:
             return 'Unknown'
 
     async def get_lead_summary(self, session_id: str) -> Optional[Dict]:
-        if not redis_client:
-            return None
         try:
             lead_key = f"lead:{session_id}"
-            lead_data = redis_client.hgetall(lead_key)
+            lead_data = await get_redis().hgetall(lead_key)
             if not lead_data:
                 return None
             intents = json.loads(lead_data.get('intents', '[]'))
@@ -1,6 +1,7 @@
 import google.generativeai as genai
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 import os
+import re
 import logging
 from dotenv import load_dotenv
 from intent_detector import IntentDetector, IntentResult
@@ -8,6 +9,10 @@ from context_manager import context_manager
 from proactive_engagement import proactive_engagement
 from lead_qualification import lead_qualification
 from contextwindow import context_window
+from timeline_index import is_timeline_query as detect_timeline_query
+from keyword_matcher import keyword_matcher
+from deadline_extractor import extract_deadline
+from config import DEADLINE_EXTRACTOR_ENABLED
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -24,7 +29,120 @@ model = "gemini-2.0-flash"
 
 bot_name = "ReBot"
 intent_detector = IntentDetector()
-def refine_with_gemini(
+# Post-processing for non-date answers: everything after a trigger phrase is dropped,
+# then cleanup patterns remove any remaining quarterly/deadline fragments
+TRIGGER_PHRASES = [
+    r'EPR certificates?.*?must be obtained quarterly',
+    r'All registered entities must complete',
+    r'Importers must ensure barcode',
+    r'with deadlines for uploading',
+    r'with the following deadlines',
+]
+
+CLEANUP_PATTERNS = [
+    r'(?:with|and) (?:specific )?deadlines.*?(?:\.|$)',
+    r'Q[1-4]\s*\([^)]+\)[:\s]*[^;\n]*',
+    r'The deadline for filing.*?(?:\.|$)',
+    r'Under the Plastic Waste Management Amendment Rules.*?\d{4}\)',
+    r'\n\s*•\s*Q[1-4].*?(?:\n|$)',
+]
+
+# Queries asking for a date get a date-only answer; help queries get the ReCircle promotion
+DATE_QUERY_KEYWORDS = ['deadline', 'when', 'date', 'timeline', 'due date', 'last date', 'filing']
+HELP_QUERY_KEYWORDS = ['help', 'who will help', 'who can help', 'assist', 'support', 'consultant', 'contact',
+                       'approach', 'service provider', 'expert']
+keyword_matcher.register('refiner', {'date_query': DATE_QUERY_KEYWORDS, 'help_query': HELP_QUERY_KEYWORDS})
+
+# Characters held back while streaming, so cleanup patterns can still change the tail
+STREAM_HOLDBACK_CHARS = 80
+
+
+def _find_trigger(text: str):
+    """Return the first trigger phrase match in text, if any"""
+    for trigger in TRIGGER_PHRASES:
+        match = re.search(trigger, text, flags=re.IGNORECASE)
+        if match:
+            return trigger, match
+    return None, None
+
+
+def postprocess_answer(text: str, is_date_query: bool) -> str:
+    """AGGRESSIVE POST-PROCESSING: Remove unwanted quarterly/deadline info if NOT asked for"""
+    refined_answer = text.strip()
+    if is_date_query:
+        return refined_answer
+
+    # NUCLEAR OPTION: Remove EVERYTHING after certain trigger phrases
+    trigger, match = _find_trigger(refined_answer)
+    if match:
+        refined_answer = refined_answer[:match.start()].strip()
+        logger.info(f"🔪 Trimmed response at trigger: {trigger[:30]}...")
+
+    # Additional cleanup patterns for any remaining fragments
+    for pattern in CLEANUP_PATTERNS:
+        refined_answer = re.sub(pattern, '', refined_answer, flags=re.DOTALL | re.IGNORECASE | re.MULTILINE)
+
+    # Final cleanup
+    refined_answer = re.sub(r'\n\s*\n+', '\n\n', refined_answer)
+    refined_answer = re.sub(r'[,;:]\s*$', '.', refined_answer)
+    return refined_answer.strip()
+
+
+class StreamPostProcessor:
+    """
+    Applies postprocess_answer incrementally while Gemini streams.
+    Only the part of the cleaned text that is at least STREAM_HOLDBACK_CHARS away from
+    the tail is released, so late pattern matches rarely touch text already sent.
+    If they do, `replaced` is set and the final answer must replace the streamed text.
+    """
+
+    def __init__(self, is_date_query: bool):
+        self.is_date_query = is_date_query
+        self.raw_text = ""
+        self.emitted = ""
+        self.stopped = False
+        self.replaced = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a streamed chunk; returns the new text that is safe to send"""
+        if self.stopped:
+            return ""
+        self.raw_text += chunk
+
+        # Date answers are not post-processed beyond strip()
+        if self.is_date_query:
+            return self._release(self.raw_text.lstrip())
+
+        # A trigger phrase ends the answer - no need to read the rest of the stream
+        if _find_trigger(self.raw_text)[1]:
+            self.stopped = True
+            return ""
+
+        cleaned = postprocess_answer(self.raw_text, self.is_date_query)
+        return self._release(cleaned[:max(0, len(cleaned) - STREAM_HOLDBACK_CHARS)])
+
+    def finish(self) -> Tuple[str, str]:
+        """Returns (remaining text to send, final answer)"""
+        final_answer = postprocess_answer(self.raw_text, self.is_date_query)
+        if final_answer.startswith(self.emitted):
+            return final_answer[len(self.emitted):], final_answer
+        self.replaced = True
+        return "", final_answer
+
+    def reset(self):
+        """Discard the streamed text (e.g. when falling back to a non-streaming call)"""
+        self.raw_text = ""
+        self.stopped = False
+
+    def _release(self, stable_text: str) -> str:
+        if len(stable_text) <= len(self.emitted) or not stable_text.startswith(self.emitted):
+            return ""
+        delta = stable_text[len(self.emitted):]
+        self.emitted = stable_text
+        return delta
+
+
+def _prepare_refinement(
     user_name: Optional[str],
     query: str,
     raw_answer: str,
@@ -32,7 +150,8 @@ def refine_with_gemini(
     is_first_message: bool = False,
     session_id: str = None,
     source_info: Dict = None,
-) -> Tuple[str, IntentResult, Dict]:
+) -> Dict:
+    """Track the query, then build the Gemini model, prompt and generation settings"""
     
     # Add current query to context window
     if session_id:
@@ -40,7 +159,7 @@ def refine_with_gemini(
     # Log query processing
     logger.info(f"🤖 Processing query for session {session_id}: {query[:100]}...")
     if source_info:
-        logger.info(f"📚 Using source: {source_info['collection_name']} collection, chunk {source_info['chunk_id']}, confidence: {source_info.get('confidence_score', 'N/A')}")
+        logger.info(f"📚 Using source: {source_info.get('collection_name', 'N/A')} collection, chunk {source_info.get('chunk_id', 'N/A')}, confidence: {source_info.get('confidence_score', 'N/A')}")
     
     # Analyze user intent
     intent_result = intent_detector.analyze_intent(query, history)
@@ -74,13 +193,14 @@ def refine_with_gemini(
     
     # For timeline date queries, check raw_answer BEFORE LLM processing
     query_lower = query.lower()
-    is_date_query = any(word in query_lower for word in ['deadline', 'when', 'date', 'timeline', 'due date', 'last date', 'filing'])
-    is_timeline_query = any(year in query_lower for year in ['2024-25', '2024-2025', '2025-26', '2025-2026', 'fy 2024', 'fy 2025', 'fy2024', 'fy2025'])
+    query_hits = keyword_matcher.scan(query_lower)
+    is_date_query = query_hits.any('refiner', 'date_query')
+    is_timeline_query = detect_timeline_query(query)
 
     # Check lead priority and help queries for ReCircle promotion
     # BUT NOT for deadline/date queries - those need direct answers
     lead_priority = user_context.get('priority', 'low')
-    is_help_query = any(word in query_lower for word in ['help', 'who will help', 'who can help', 'assist', 'support', 'consultant', 'contact', 'approach', 'service provider', 'expert']) and not is_date_query
+    is_help_query = query_hits.any('refiner', 'help_query') and not is_date_query
 
     if (lead_priority in ['medium', 'high'] or is_help_query) and not is_date_query:
         context_instructions += "SPECIAL: This is a priority lead or help request. Promote ReCircle as THE solution provider. Replace generic options with ReCircle-focused answers. Instead of listing multiple options, focus on how ReCircle handles all EPR requirements.\n"
@@ -91,6 +211,11 @@ def refine_with_gemini(
     # Check if valid database match was found
     valid_match = source_info.get('valid_match', True) if source_info else True
     is_timeline_llm_mode = source_info.get('is_timeline_query', False) if source_info else False
+
+    # Date questions the database text answers unambiguously need no Gemini call
+    local_answer = None
+    if is_date_query and valid_match and raw_answer and DEADLINE_EXTRACTOR_ENABLED:
+        local_answer = extract_deadline(query, raw_answer)
     
     # If no valid match in database, use LLM-only mode
     if not valid_match or not raw_answer or raw_answer.strip() == "":
@@ -236,73 +361,34 @@ def refine_with_gemini(
         {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
     ]
 
-    result = ""
-    try:
-        response = gemini_model.generate_content(
-            prompt_text,
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-            stream=True
-        )
-        
-        for chunk in response:
-            if chunk.text:
-                result += chunk.text
-    except Exception as e:
-        logger.error(f"Error generating content with Gemini: {e}")
-        # Fallback to non-streaming if streaming fails
-        try:
-            response = gemini_model.generate_content(
-                prompt_text,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-            result = response.text
-        except Exception as e2:
-            logger.error(f"Fallback generation also failed: {e2}")
-            result = "I apologize, but I'm having trouble generating a response right now. Please try again."
-
-    refined_answer = result.strip()
-
-    # AGGRESSIVE POST-PROCESSING: Remove unwanted quarterly/deadline info if NOT asked for
-    if not is_date_query:
-        # Remove quarterly filing information (Q1, Q2, Q3, Q4 with dates)
-        import re
-
-        # NUCLEAR OPTION: Remove EVERYTHING after certain trigger phrases
-        trigger_phrases = [
-            r'EPR certificates?.*?must be obtained quarterly',
-            r'All registered entities must complete',
-            r'Importers must ensure barcode',
-            r'with deadlines for uploading',
-            r'with the following deadlines',
-        ]
-
-        for trigger in trigger_phrases:
-            # Find the trigger and remove everything after it
-            match = re.search(trigger, refined_answer, flags=re.IGNORECASE)
-            if match:
-                refined_answer = refined_answer[:match.start()].strip()
-                logger.info(f"🔪 Trimmed response at trigger: {trigger[:30]}...")
-                break
+    return {
+        "gemini_model": gemini_model,
+        "prompt_text": prompt_text,
+        "generation_config": generation_config,
+        "safety_settings": safety_settings,
+        "is_date_query": is_date_query,
+        "local_answer": local_answer,
+        "intent_result": intent_result,
+        "user_context": user_context,
+    }
 
-        # Additional cleanup patterns for any remaining fragments
-        cleanup_patterns = [
-            r'(?:with|and) (?:specific )?deadlines.*?(?:\.|$)',
-            r'Q[1-4]\s*\([^)]+\)[:\s]*[^;\n]*',
-            r'The deadline for filing.*?(?:\.|$)',
-            r'Under the Plastic Waste Management Amendment Rules.*?\d{4}\)',
-            r'\n\s*•\s*Q[1-4].*?(?:\n|$)',
-        ]
 
-        for pattern in cleanup_patterns:
-            refined_answer = re.sub(pattern, '', refined_answer, flags=re.DOTALL | re.IGNORECASE | re.MULTILINE)
+def _generate_fallback(prepared: Dict) -> str:
+    """Non-streaming Gemini call used when streaming fails"""
+    try:
+        response = prepared["gemini_model"].generate_content(
+            prepared["prompt_text"],
+            generation_config=prepared["generation_config"],
+            safety_settings=prepared["safety_settings"]
+        )
+        return response.text
+    except Exception as e2:
+        logger.error(f"Fallback generation also failed: {e2}")
+        return "I apologize, but I'm having trouble generating a response right now. Please try again."
 
-        # Final cleanup
-        refined_answer = re.sub(r'\n\s*\n+', '\n\n', refined_answer)
-        refined_answer = re.sub(r'[,;:]\s*$', '.', refined_answer)
-        refined_answer = refined_answer.strip()
 
+def _finalize_refinement(refined_answer: str, session_id: str, user_context: Dict, source_info: Dict):
+    """Record the answer in the context window and enrich user_context"""
     # Update context window with bot response
     if session_id:
         context_window.update_response(session_id, refined_answer)
@@ -310,19 +396,18 @@ def refine_with_gemini(
     # Log response generation
     logger.info(f"✅ Generated response for session {session_id}, length: {len(refined_answer)} chars")
     if source_info and source_info.get('threshold_met', False):
-        logger.info(f"🔍 Query satisfied with high confidence from {source_info['collection_name']} collection")
+        logger.info(f"🔍 Query satisfied with high confidence from {source_info.get('collection_name', 'N/A')} collection")
     elif source_info:
         logger.info(f"⚠️ Query answered with low confidence - may need specialist assistance")
     
     # Get lead priority from Redis directly for context
     if session_id:
         try:
-            from collect_data import redis_client
-            if redis_client:
-                lead_key = f"lead:{session_id}"
-                lead_data = redis_client.hgetall(lead_key)
-                if lead_data:
-                    user_context['priority'] = lead_data.get('priority', 'low')
+            from redis_pool import get_sync_redis
+            lead_key = f"lead:{session_id}"
+            lead_data = get_sync_redis().hgetall(lead_key)
+            if lead_data:
+                user_context['priority'] = lead_data.get('priority', 'low')
         except:
             pass
     
@@ -365,7 +450,94 @@ def refine_with_gemini(
     if source_info:
         user_context['source_info'] = source_info
         threshold_status = "✅ PASSED" if source_info.get('threshold_met', False) else "❌ FAILED"
-        logger.info(f"📊 Response sourced from: {source_info['collection_name']} collection")
-        logger.info(f"   🔢 Chunk: {source_info['chunk_id']}, Confidence: {source_info['confidence_score']}, Threshold: {threshold_status}")
-    
-    return refined_answer, intent_result, user_context
+        logger.info(f"📊 Response sourced from: {source_info.get('collection_name', 'N/A')} collection")
+        logger.info(f"   🔢 Chunk: {source_info.get('chunk_id', 'N/A')}, Confidence: {source_info.get('confidence_score', 'N/A')}, Threshold: {threshold_status}")
+
+
+def refine_with_gemini(
+    user_name: Optional[str],
+    query: str,
+    raw_answer: str,
+    history: List[Dict[str, str]],
+    is_first_message: bool = False,
+    session_id: str = None,
+    source_info: Dict = None,
+) -> Tuple[str, IntentResult, Dict]:
+    prepared = _prepare_refinement(user_name, query, raw_answer, history, is_first_message, session_id, source_info)
+
+    # Deadline extracted from the database text - no Gemini call
+    result = prepared["local_answer"]
+    if result is None:
+        result = ""
+        try:
+            response = prepared["gemini_model"].generate_content(
+                prepared["prompt_text"],
+                generation_config=prepared["generation_config"],
+                safety_settings=prepared["safety_settings"],
+                stream=True
+            )
+
+            for chunk in response:
+                if chunk.text:
+                    result += chunk.text
+        except Exception as e:
+            logger.error(f"Error generating content with Gemini: {e}")
+            # Fallback to non-streaming if streaming fails
+            result = _generate_fallback(prepared)
+
+    refined_answer = postprocess_answer(result, prepared["is_date_query"])
+    _finalize_refinement(refined_answer, session_id, prepared["user_context"], source_info)
+
+    return refined_answer, prepared["intent_result"], prepared["user_context"]
+
+
+def stream_refine_with_gemini(
+    user_name: Optional[str],
+    query: str,
+    raw_answer: str,
+    history: List[Dict[str, str]],
+    is_first_message: bool = False,
+    session_id: str = None,
+    source_info: Dict = None,
+) -> Iterator[Tuple[str, object]]:
+    """
+    Streaming variant of refine_with_gemini.
+    Yields ("token", text) as Gemini produces post-processed text, then one
+    ("final", (answer, intent_result, user_context, replaced)) where `replaced` means
+    the final answer differs from the streamed tokens and should replace them.
+    """
+    prepared = _prepare_refinement(user_name, query, raw_answer, history, is_first_message, session_id, source_info)
+    processor = StreamPostProcessor(prepared["is_date_query"])
+
+    try:
+        if prepared["local_answer"] is not None:
+            # Deadline extracted from the database text - sent as one token, no Gemini call
+            texts = [prepared["local_answer"]]
+        else:
+            response = prepared["gemini_model"].generate_content(
+                prepared["prompt_text"],
+                generation_config=prepared["generation_config"],
+                safety_settings=prepared["safety_settings"],
+                stream=True
+            )
+            texts = (chunk.text for chunk in response)
+
+        for text in texts:
+            if text:
+                delta = processor.feed(text)
+                if delta:
+                    yield "token", delta
+            if processor.stopped:
+                logger.info("🔪 Trigger phrase reached - stopped reading the stream")
+                break
+    except Exception as e:
+        logger.error(f"Error streaming content with Gemini: {e}")
+        processor.reset()
+        processor.feed(_generate_fallback(prepared))
+
+    remaining, refined_answer = processor.finish()
+    if remaining:
+        yield "token", remaining
+    _finalize_refinement(refined_answer, session_id, prepared["user_context"], source_info)
+
+    yield "final", (refined_answer, prepared["intent_result"], prepared["user_context"], processor.replaced)
@@ -0,0 +1,147 @@
+"""
+Local CPU embeddings
+One process-wide SentenceTransformer (LOCAL_EMBEDDING_MODEL, all-MiniLM-L6-v2 by default)
+and a parallel set of collections embedded with it, so retrieval can run without the
+Gemini embedding round trip.
+
+Each configured collection gets a sibling "<name><LOCAL_COLLECTION_SUFFIX>" in the same
+database, with the same ids, documents and metadata but local-model vectors. Build or
+update them after any database change (only new ids are embedded, removed ids are deleted):
+    python local_embeddings.py build
+    python local_embeddings.py build --full        # re-embed everything
+
+Query time: QUERY_EMBEDDING_BACKEND=local searches the local collections with a local
+query embedding. With the default gemini backend, LOCAL_EMBEDDING_FALLBACK=true switches
+a query to the local path when the Gemini embedding call fails.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from config import COLLECTIONS, CHROMA_DB_PATHS, LOCAL_EMBEDDING_MODEL, LOCAL_COLLECTION_SUFFIX
+from index_generation import bump_generation
+
+logger = logging.getLogger(__name__)
+
+BUILD_BATCH_SIZE = 256
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_local_model():
+    """The shared SentenceTransformer, loaded on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                start = time.perf_counter()
+                _model = SentenceTransformer(LOCAL_EMBEDDING_MODEL)
+                logger.info(f"🧠 Loaded local embedding model {LOCAL_EMBEDDING_MODEL} in {time.perf_counter() - start:.1f}s")
+    return _model
+
+
+def embed_local(texts: List[str]) -> List[List[float]]:
+    """Local-model embeddings for a batch of texts"""
+    return get_local_model().encode(texts).tolist()
+
+
+def embed_local_query(text: str) -> List[float]:
+    """Local-model embedding for one query"""
+    return embed_local([text])[0]
+
+
+def local_collection_name(collection_name: str) -> str:
+    return f"{collection_name}{LOCAL_COLLECTION_SUFFIX}"
+
+
+def local_collections_map() -> Dict[str, List[str]]:
+    """COLLECTIONS with every collection name replaced by its local-model sibling"""
+    return {db_path: [local_collection_name(name) for name in names] for db_path, names in COLLECTIONS.items()}
+
+
+def _sync_collection(client, collection_name: str, full: bool) -> Dict[str, int]:
+    """Embed a collection's new documents into its local sibling and drop removed ids"""
+    source = client.get_collection(name=collection_name)
+    target_name = local_collection_name(collection_name)
+    target = client.get_or_create_collection(
+        name=target_name,
+        metadata={"hnsw:space": "cosine", "embedding_model": LOCAL_EMBEDDING_MODEL}
+    )
+    if (target.metadata or {}).get("embedding_model") != LOCAL_EMBEDDING_MODEL:
+        logger.warning(f"⚠️ '{target_name}' was built with another model - re-embedding everything")
+        client.delete_collection(target_name)
+        target = client.create_collection(
+            name=target_name,
+            metadata={"hnsw:space": "cosine", "embedding_model": LOCAL_EMBEDDING_MODEL}
+        )
+        full = True
+
+    existing = set() if full else set(target.get(include=[])["ids"])
+    source_ids = set()
+    added = 0
+    total = source.count()
+    for offset in range(0, total, BUILD_BATCH_SIZE):
+        batch = source.get(include=["documents", "metadatas"], limit=BUILD_BATCH_SIZE, offset=offset)
+        source_ids.update(batch["ids"])
+        new = [
+            i for i, doc_id in enumerate(batch["ids"])
+            if doc_id not in existing and batch["documents"][i]
+        ]
+        if not new:
+            continue
+        documents = [batch["documents"][i] for i in new]
+        target.upsert(
+            ids=[batch["ids"][i] for i in new],
+            embeddings=embed_local(documents),
+            documents=documents,
+            metadatas=[batch["metadatas"][i] or {"chunk_id": offset + i} for i in new]
+        )
+        added += len(new)
+
+    stale = existing - source_ids
+    if stale:
+        target.delete(ids=list(stale))
+    logger.info(f"✅ {target_name}: {added} embedded, {len(stale)} removed, {target.count()} total")
+    return {"added": added, "removed": len(stale), "total": target.count()}
+
+
+def build_local_collections(db_paths: Optional[List[str]] = None, full: bool = False) -> Dict[str, Dict[str, int]]:
+    """Create or update the local-model collections of every (or the given) database"""
+    import chromadb
+
+    summary = {}
+    for db_path in db_paths or CHROMA_DB_PATHS:
+        try:
+            client = chromadb.PersistentClient(path=db_path)
+        except Exception as e:
+            logger.error(f"❌ Failed to open {db_path}: {e}")
+            continue
+        changed = False
+        for collection_name in COLLECTIONS.get(db_path, []):
+            try:
+                result = _sync_collection(client, collection_name, full)
+                summary[f"{collection_name}@{db_path}"] = result
+                changed = changed or bool(result["added"] or result["removed"])
+            except Exception as e:
+                logger.error(f"❌ Could not build local collection for '{collection_name}' in {db_path}: {e}")
+        if changed:
+            # The local collections record their model in their own metadata
+            bump_generation("local_embeddings", db_path)
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build local-model copies of the ChromaDB collections")
+    parser.add_argument("command", choices=["build"], help="build: embed new documents into the local collections")
+    parser.add_argument("--db", action="append", help="Only this database path (repeatable)")
+    parser.add_argument("--full", action="store_true", help="Re-embed every document")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    summary = build_local_collections(args.db, args.full)
+    added = sum(s["added"] for s in summary.values())
+    print(f"Synced {len(summary)} collection(s), {added} document(s) embedded in {time.perf_counter() - start:.1f}s")
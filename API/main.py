@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager
@@ -10,18 +10,35 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import uuid
+import json
+import time
 import asyncio
 from datetime import datetime
 from models import QueryRequest, QueryResponse, UserData
-from search import find_best_answer
-from hybrid_search import find_hybrid_answer
+from search import find_best_answer, generate_related_questions, collection_registry, local_collection_registry, bm25_index
+from local_embeddings import get_local_model
+from timeline_index import is_timeline_query as detect_timeline_query
+from hybrid_search import find_hybrid_answer, hybrid_search_engine
 from search_config import get_search_config, SearchMode
-from llm_refiner import refine_with_gemini
-from collect_data import collect_user_data, get_user_data_from_session, redis_client
+from llm_refiner import refine_with_gemini, stream_refine_with_gemini
+from collect_data import collect_user_data, get_user_data_from_session
+from redis_pool import get_redis, ping_redis, close_redis
+from session_writer import session_writer
 from lead_manager import lead_manager
 from session_reporter import finalize_session, generate_user_pdf
 from session_monitor import start_monitor
 from inactivity_monitor import monitor_inactivity
+from execution_pools import execution_pools, run_blocking, iterate_blocking, StageBusyError
+from metrics import metrics
+from embedding_cache import embedding_cache
+from state_backend import get_state_backend
+from single_flight import single_flight, normalize_query
+from config import BM25_ENABLED, QUERY_EMBEDDING_BACKEND, CANONICAL_ANSWERS_ENABLED
+from canonical_answers import canonical_answers, find_canonical_answer, is_canonical_result
+from keyword_matcher import keyword_matcher
+from retrieval_cache import retrieval_cache
+from index_generation import index_generation
+from db_manifest import manifest_reader
 
 # --------------------------------------------------------
 # APP CONFIG
@@ -31,11 +48,27 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.info("🚀 Starting EPR ChatBot API")
+    await ping_redis()
+    get_state_backend()
+    # Open ChromaDB collections once, before the first query
+    await run_blocking("retrieval", collection_registry.load)
+    if QUERY_EMBEDDING_BACKEND == "local":
+        # Load the model and open the local-model collections before the first query
+        await run_blocking("retrieval", get_local_model)
+        await run_blocking("retrieval", local_collection_registry.load)
+    if CANONICAL_ANSWERS_ENABLED:
+        # Embeds any canonical question without a stored vector
+        await run_blocking("retrieval", canonical_answers.load)
+    if BM25_ENABLED:
+        # Loads the persisted BM25 index and re-reads only sources changed since it was saved
+        await run_blocking("retrieval", bm25_index.refresh)
     asyncio.create_task(start_monitor())
     asyncio.create_task(monitor_inactivity())
     logging.info("✅ Background monitors started")
     yield
     logging.info("🛑 Shutting down EPR ChatBot API")
+    execution_pools.shutdown()
+    await close_redis()
 
 app = FastAPI(lifespan=lifespan)
 SECRET_KEY = os.getenv("SECRET_KEY", "a_default_secret_key_for_development_only")
@@ -80,6 +113,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --------------------------------------------------------
+# Coalesced search calls
+# --------------------------------------------------------
+async def _suggestions_for(result: dict, query_text: str, intent_result, previous_suggestions: list) -> dict:
+    """A shared result carries the leader's suggestions; rebuild them for this session"""
+    suggestions = await run_blocking("retrieval", generate_related_questions, query_text, None, intent_result, previous_suggestions)
+    return {**result, "suggestions": suggestions}
+
+async def search_best_answer(query_text: str, intent_result, previous_suggestions: list) -> dict:
+    """find_best_answer, shared between concurrent identical questions"""
+    result, shared = await single_flight.do(
+        f"find_best_answer:{normalize_query(query_text)}",
+        lambda: run_blocking("retrieval", find_best_answer, query_text, intent_result, previous_suggestions)
+    )
+    if shared:
+        result = await _suggestions_for(result, query_text, intent_result, previous_suggestions)
+    return result
+
+async def search_hybrid_answer(query_text: str, intent_result, previous_suggestions: list, session_id: str, search_mode: SearchMode) -> dict:
+    """find_hybrid_answer, shared between concurrent identical questions from sessions without history"""
+    # Follow-up questions are rewritten with the session's history, so they never share
+    one_shot = search_mode == SearchMode.ONE_SHOT_HYBRID
+    if await run_blocking("retrieval", hybrid_search_engine.has_conversation_history, session_id):
+        return await run_blocking("llm", find_hybrid_answer, query_text, intent_result, previous_suggestions, session_id=session_id, one_shot=one_shot)
+
+    result, shared = await single_flight.do(
+        f"find_hybrid_answer:{search_mode.value}:{normalize_query(query_text)}",
+        lambda: run_blocking("llm", find_hybrid_answer, query_text, intent_result, previous_suggestions, session_id=session_id, one_shot=one_shot)
+    )
+    if shared:
+        await run_blocking("retrieval", hybrid_search_engine.record_turn, session_id, query_text, result["answer"])
+        result = await _suggestions_for(result, query_text, intent_result, previous_suggestions)
+    return result
+
+async def match_canonical(query_text: str, intent_result, previous_suggestions: list, is_timeline_query: bool):
+    """
+    Curated answer for an exact match in the canonical Q&A bank, or None to search and refine as usual.
+    Semantic matches need the query embedding, so find_best_answer checks them after its fast paths.
+    """
+    if not CANONICAL_ANSWERS_ENABLED or is_timeline_query:
+        return None
+    return await run_blocking("retrieval", find_canonical_answer, query_text, intent_result, previous_suggestions)
+
+# Queries not related to EPR/ReCircle get no suggestions
+OFF_TOPIC_KEYWORDS = ['weather', 'sports', 'movie', 'music', 'food', 'game', 'joke', 'story', 'news', 'politics']
+keyword_matcher.register('off_topic', {'off_topic': OFF_TOPIC_KEYWORDS})
+
+def is_off_topic_query(query_text: str) -> bool:
+    return keyword_matcher.scan(query_text.lower()).any('off_topic', 'off_topic')
+
 # --------------------------------------------------------
 # Routes
 # --------------------------------------------------------
@@ -90,6 +173,7 @@ async def root():
 @app.post("/session")
 async def get_or_create_session(request: Request):
     try:
+        redis_client = get_redis()
         if "session_id" not in request.session:
             session_id = str(uuid.uuid4())
             request.session["session_id"] = session_id
@@ -103,8 +187,8 @@ async def get_or_create_session(request: Request):
         chat_history = []
         if user_data:
             chat_key = f"session:{session_id}:chat"
-            if redis_client.exists(chat_key):
-                raw_messages = redis_client.lrange(chat_key, 0, -1)
+            if await redis_client.exists(chat_key):
+                raw_messages = await redis_client.lrange(chat_key, 0, -1)
                 for msg in raw_messages:
                     if msg.startswith("User: "):
                         chat_history.append({"role": "user", "text": msg[6:]})
@@ -125,7 +209,9 @@ async def get_or_create_session(request: Request):
 @app.post("/query", response_model=QueryResponse)
 async def handle_query(request: Request, query: QueryRequest):
     """Handles user query + logs chat + generates answer - NOW USING HYBRID SEARCH"""
+    start_time = time.perf_counter()
     try:
+        redis_client = get_redis()
         if "session_id" not in request.session:
             request.session["session_id"] = str(uuid.uuid4())
         session_id = request.session["session_id"]
@@ -140,17 +226,26 @@ async def handle_query(request: Request, query: QueryRequest):
         
         # Get previous suggestions from Redis
         suggestions_key = f"session:{session_id}:suggestions"
-        previous_suggestions = redis_client.lrange(suggestions_key, 0, -1) or []
+        previous_suggestions = await redis_client.lrange(suggestions_key, 0, -1) or []
         
         # Check if query is about 2024-25 or 2025-26 timeline
-        query_lower = query.text.lower()
-        is_timeline_query = any(year in query_lower for year in ['2024-25', '2024-2025', '2025-26', '2025-2026', 'fy 2024', 'fy 2025', 'fy2024', 'fy2025'])
-        
+        is_timeline_query = detect_timeline_query(query.text)
+
+        # Known questions get their curated answer (timeline questions always go to the UDB)
+        canonical = await match_canonical(query.text, intent_result, previous_suggestions, is_timeline_query)
+
+        if canonical is not None:
+            result = canonical
+            final_answer = result["answer"]
+            await run_blocking("retrieval", hybrid_search_engine.record_turn, session_id, query.text, final_answer)
+
         # For timeline queries: Use ONLY database search (no web, no LLM mixing)
-        if is_timeline_query:
+        elif is_timeline_query:
             logging.info(f"⏰ Timeline query detected - using database-only search")
-            result = find_best_answer(query.text, intent_result, previous_suggestions)
-            final_answer, intent_result, user_context = refine_with_gemini(
+            result = await search_best_answer(query.text, intent_result, previous_suggestions)
+            final_answer, intent_result, user_context = await run_blocking(
+                "llm",
+                refine_with_gemini,
                 user_name=user_name,
                 query=query.text,
                 raw_answer=result["answer"],
@@ -165,46 +260,42 @@ async def handle_query(request: Request, query: QueryRequest):
             search_mode = search_config.get_search_mode()
             
             # Use appropriate search method based on configuration
-            if search_mode == SearchMode.SEQUENTIAL_HYBRID or search_mode == SearchMode.HYBRID:
-                result = find_hybrid_answer(query.text, intent_result, previous_suggestions)
+            if search_mode in (SearchMode.SEQUENTIAL_HYBRID, SearchMode.HYBRID, SearchMode.ONE_SHOT_HYBRID):
+                # Hybrid search is dominated by Gemini calls, so it runs on the LLM pool
+                result = await search_hybrid_answer(query.text, intent_result, previous_suggestions, session_id, search_mode)
                 final_answer = result["answer"]
             else:
                 # Traditional search with LLM refinement
-                result = find_best_answer(query.text, intent_result, previous_suggestions)
-                final_answer, intent_result, user_context = refine_with_gemini(
-                    user_name=user_name,
-                    query=query.text,
-                    raw_answer=result["answer"],
-                    history=history,
-                    is_first_message=(len(history) == 0),
-                    session_id=session_id,
-                    source_info=result.get("source_info", {})
-                )
+                result = await search_best_answer(query.text, intent_result, previous_suggestions)
+                if is_canonical_result(result):
+                    # Semantic canonical match found during retrieval: curated answer, no refinement
+                    final_answer = result["answer"]
+                    await run_blocking("retrieval", hybrid_search_engine.record_turn, session_id, query.text, final_answer)
+                else:
+                    final_answer, intent_result, user_context = await run_blocking(
+                        "llm",
+                        refine_with_gemini,
+                        user_name=user_name,
+                        query=query.text,
+                        raw_answer=result["answer"],
+                        history=history,
+                        is_first_message=(len(history) == 0),
+                        session_id=session_id,
+                        source_info=result.get("source_info", {})
+                    )
 
         from intent_detector import intent_detector
         engagement_score = intent_detector._calculate_engagement_score(query.text.lower(), history)
 
-        # ✅ Save chat to Redis for PDF report
+        # Check if query is off-topic (not EPR/ReCircle related)
+        is_off_topic = is_off_topic_query(query.text)
+        
+        # Don't show suggestions for off-topic queries
+        suggestions = [] if is_off_topic else result["suggestions"]
+
+        # ✅ Save chat, last_interaction and new suggestions in one Redis round trip
         try:
-            chat_key = f"session:{session_id}:chat"
-            redis_client.rpush(chat_key, f"User: {query.text}")
-            redis_client.rpush(chat_key, f"Bot: {final_answer}")
-            redis_client.expire(chat_key, SESSION_EXPIRY_DAYS * 86400)
-            chat_count = redis_client.llen(chat_key)
-            logging.info(f"💬 Saved chat to Redis. Total messages: {chat_count}")
-            
-            # ✅ Update session last_interaction timestamp (don't reset thank you flag)
-            session_key = f"session:{session_id}"
-            
-            if redis_client.exists(session_key):
-                redis_client.hset(session_key, "last_interaction", datetime.utcnow().isoformat())
-                logging.info(f"⏰ Updated last_interaction for session {session_id}")
-                
-                # Reset backend notification flag to allow new PDF after 60 min inactivity
-                backend_sent_key = f"session:{session_id}:backend_sent"
-                if redis_client.exists(backend_sent_key):
-                    redis_client.delete(backend_sent_key)
-                    logging.info(f"🔄 User resumed - reset backend notification flag for session {session_id}")
+            await session_writer.save_turn(session_id, query.text, final_answer, suggestions)
         except Exception as chat_err:
             logging.error(f"❌ Could not save chat logs: {chat_err}", exc_info=True)
 
@@ -217,21 +308,7 @@ async def handle_query(request: Request, query: QueryRequest):
             engagement_score=engagement_score
         )
 
-        # Check if query is off-topic (not EPR/ReCircle related)
-        query_lower = query.text.lower()
-        off_topic_keywords = ['weather', 'sports', 'movie', 'music', 'food', 'game', 'joke', 'story', 'news', 'politics']
-        is_off_topic = any(keyword in query_lower for keyword in off_topic_keywords)
-        
-        # Don't show suggestions for off-topic queries
-        suggestions = [] if is_off_topic else result["suggestions"]
-        
-        # Store new suggestions in Redis (excluding "Connect me to ReCircle")
-        if suggestions:
-            for suggestion in suggestions:
-                if suggestion != "Connect me to ReCircle":
-                    redis_client.rpush(suggestions_key, suggestion)
-            redis_client.expire(suggestions_key, SESSION_EXPIRY_DAYS * 86400)
-        
+        metrics.record_latency("query_total", (time.perf_counter() - start_time) * 1000)
         return {
             "answer": final_answer,
             "similar_questions": suggestions,
@@ -249,14 +326,141 @@ async def handle_query(request: Request, query: QueryRequest):
             "source_info": result.get("source_info", {})
         }
 
+    except StageBusyError as e:
+        logging.warning(f"🚦 /query rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
     except Exception as e:
         logging.error(f"❌ Error in /query endpoint: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Query processing failed")
 
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/query/stream")
+async def handle_query_stream(request: Request, query: QueryRequest):
+    """Streams the refined answer as Server-Sent Events.
+    Emits `token` events as Gemini generates, then one `final` event with the same
+    fields as /query. If `replace` is true the final answer differs from the streamed
+    tokens (late post-processing) and the client should show the final answer instead."""
+    start_time = time.perf_counter()
+    try:
+        redis_client = get_redis()
+        if "session_id" not in request.session:
+            request.session["session_id"] = str(uuid.uuid4())
+        session_id = request.session["session_id"]
+
+        user_data = await get_user_data_from_session(session_id)
+        user_name = user_data.get("user_name") if user_data else None
+        history = query.history or []
+
+        from intent_detector import intent_detector
+        intent_result = intent_detector.analyze_intent(query.text, history)
+
+        suggestions_key = f"session:{session_id}:suggestions"
+        previous_suggestions = await redis_client.lrange(suggestions_key, 0, -1) or []
+
+        # Retrieval completes before the stream opens, so failures still map to status codes
+        canonical = await match_canonical(query.text, intent_result, previous_suggestions, detect_timeline_query(query.text))
+        result = canonical if canonical is not None else await search_best_answer(query.text, intent_result, previous_suggestions)
+        if canonical is None and is_canonical_result(result):
+            canonical = result
+    except StageBusyError as e:
+        logging.warning(f"🚦 /query/stream rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
+    except Exception as e:
+        logging.error(f"❌ Error in /query/stream endpoint: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Query processing failed")
+
+    async def event_stream():
+        ttft_ms = None
+        final = None
+        try:
+            if canonical is not None:
+                # Curated answer: sent whole, no refinement
+                ttft_ms = (time.perf_counter() - start_time) * 1000
+                metrics.record_latency("query_stream_ttft", ttft_ms)
+                yield _sse("token", {"text": result["answer"]})
+                final = (result["answer"], intent_result, None, False)
+            else:
+                async for event, payload in iterate_blocking(
+                    "llm",
+                    stream_refine_with_gemini,
+                    user_name=user_name,
+                    query=query.text,
+                    raw_answer=result["answer"],
+                    history=history,
+                    is_first_message=(len(history) == 0),
+                    session_id=session_id,
+                    source_info=result.get("source_info", {})
+                ):
+                    if event == "token":
+                        if ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - start_time) * 1000
+                            metrics.record_latency("query_stream_ttft", ttft_ms)
+                        yield _sse("token", {"text": payload})
+                    else:
+                        final = payload
+
+            final_answer, final_intent, user_context, replaced = final
+            engagement_score = intent_detector._calculate_engagement_score(query.text.lower(), history)
+
+            # Check if query is off-topic (not EPR/ReCircle related)
+            is_off_topic = is_off_topic_query(query.text)
+            suggestions = [] if is_off_topic else result["suggestions"]
+
+            try:
+                await session_writer.save_turn(session_id, query.text, final_answer, suggestions)
+            except Exception as chat_err:
+                logging.error(f"❌ Could not save chat logs: {chat_err}", exc_info=True)
+
+            await lead_manager.track_user_intent(
+                session_id=session_id,
+                intent_result=final_intent,
+                query=query.text,
+                user_data=user_data,
+                engagement_score=engagement_score
+            )
+
+            total_ms = (time.perf_counter() - start_time) * 1000
+            metrics.record_latency("query_stream_total", total_ms)
+            yield _sse("final", {
+                "answer": final_answer,
+                "replace": replaced,
+                "similar_questions": suggestions,
+                "intent": {
+                    "type": final_intent.intent,
+                    "confidence": final_intent.confidence,
+                    "should_connect": final_intent.should_connect
+                },
+                "context": {
+                    "search_type": "traditional",
+                    "engagement_score": engagement_score
+                },
+                "source_info": result.get("source_info", {}),
+                "timings": {
+                    "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+                    "total_ms": round(total_ms, 1)
+                }
+            })
+        except StageBusyError as e:
+            logging.warning(f"🚦 /query/stream rejected: {e}")
+            yield _sse("error", {"detail": "Server is busy, please try again shortly"})
+        except Exception as e:
+            logging.error(f"❌ Error in /query/stream endpoint: {e}", exc_info=True)
+            yield _sse("error", {"detail": "Query processing failed"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/hybrid-query", response_model=QueryResponse)
 async def handle_hybrid_query(request: Request, query: QueryRequest):
     """Handles user query with hybrid search (60% LLM + 40% Database)"""
     try:
+        redis_client = get_redis()
         if "session_id" not in request.session:
             request.session["session_id"] = str(uuid.uuid4())
         session_id = request.session["session_id"]
@@ -271,10 +475,10 @@ async def handle_hybrid_query(request: Request, query: QueryRequest):
         
         # Get previous suggestions from Redis
         suggestions_key = f"session:{session_id}:suggestions"
-        previous_suggestions = redis_client.lrange(suggestions_key, 0, -1) or []
+        previous_suggestions = await redis_client.lrange(suggestions_key, 0, -1) or []
         
         # Use hybrid search (60% LLM + 40% Database)
-        result = find_hybrid_answer(query.text, intent_result, previous_suggestions)
+        result = await search_hybrid_answer(query.text, intent_result, previous_suggestions, session_id, SearchMode.HYBRID)
         
         # The hybrid search already combines LLM and DB, so we use the result directly
         final_answer = result["answer"]
@@ -282,27 +486,15 @@ async def handle_hybrid_query(request: Request, query: QueryRequest):
         from intent_detector import intent_detector
         engagement_score = intent_detector._calculate_engagement_score(query.text.lower(), history)
 
-        # ✅ Save chat to Redis for PDF report
+        # Check if query is off-topic (not EPR/ReCircle related)
+        is_off_topic = is_off_topic_query(query.text)
+        
+        # Don't show suggestions for off-topic queries
+        suggestions = [] if is_off_topic else result["suggestions"]
+
+        # ✅ Save chat, last_interaction and new suggestions in one Redis round trip
         try:
-            chat_key = f"session:{session_id}:chat"
-            redis_client.rpush(chat_key, f"User: {query.text}")
-            redis_client.rpush(chat_key, f"Bot: {final_answer}")
-            redis_client.expire(chat_key, SESSION_EXPIRY_DAYS * 86400)
-            chat_count = redis_client.llen(chat_key)
-            logging.info(f"💬 Hybrid search - Saved chat to Redis. Total messages: {chat_count}")
-            
-            # ✅ Update session last_interaction timestamp
-            session_key = f"session:{session_id}"
-            
-            if redis_client.exists(session_key):
-                redis_client.hset(session_key, "last_interaction", datetime.utcnow().isoformat())
-                logging.info(f"⏰ Updated last_interaction for session {session_id}")
-                
-                # Reset backend notification flag to allow new PDF after 60 min inactivity
-                backend_sent_key = f"session:{session_id}:backend_sent"
-                if redis_client.exists(backend_sent_key):
-                    redis_client.delete(backend_sent_key)
-                    logging.info(f"🔄 User resumed - reset backend notification flag for session {session_id}")
+            await session_writer.save_turn(session_id, query.text, final_answer, suggestions)
         except Exception as chat_err:
             logging.error(f"❌ Could not save chat logs: {chat_err}", exc_info=True)
 
@@ -314,21 +506,6 @@ async def handle_hybrid_query(request: Request, query: QueryRequest):
             user_data=user_data,
             engagement_score=engagement_score
         )
-
-        # Check if query is off-topic (not EPR/ReCircle related)
-        query_lower = query.text.lower()
-        off_topic_keywords = ['weather', 'sports', 'movie', 'music', 'food', 'game', 'joke', 'story', 'news', 'politics']
-        is_off_topic = any(keyword in query_lower for keyword in off_topic_keywords)
-        
-        # Don't show suggestions for off-topic queries
-        suggestions = [] if is_off_topic else result["suggestions"]
-        
-        # Store new suggestions in Redis (excluding "Connect me to ReCircle")
-        if suggestions:
-            for suggestion in suggestions:
-                if suggestion != "Connect me to ReCircle":
-                    redis_client.rpush(suggestions_key, suggestion)
-            redis_client.expire(suggestions_key, SESSION_EXPIRY_DAYS * 86400)
         
         return {
             "answer": final_answer,
@@ -347,6 +524,9 @@ async def handle_hybrid_query(request: Request, query: QueryRequest):
             "source_info": result.get("source_info", {})
         }
 
+    except StageBusyError as e:
+        logging.warning(f"🚦 /hybrid-query rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
     except Exception as e:
         logging.error(f"❌ Error in /hybrid-query endpoint: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Hybrid query processing failed")
@@ -360,24 +540,15 @@ async def handle_user_data(request: Request, user_data: UserData):
         user_data.session_id = session_id
         result = await collect_user_data(user_data)
         
-        # Mark this session for inactivity monitoring
-        monitor_key = f"session:{session_id}:monitor_inactivity"
-        redis_client.set(monitor_key, datetime.utcnow().isoformat(), ex=SESSION_EXPIRY_DAYS * 86400)
-        
-        # Also set initial last_interaction timestamp
-        session_key = f"session:{session_id}"
-        redis_client.hset(session_key, "last_interaction", datetime.utcnow().isoformat())
-        
-        # Retrieve chat history for returning users
+        # Mark this session for inactivity monitoring, set initial last_interaction
+        # and retrieve chat history for returning users (one round trip)
+        raw_messages = await session_writer.mark_for_monitoring(session_id)
         chat_history = []
-        chat_key = f"session:{session_id}:chat"
-        if redis_client.exists(chat_key):
-            raw_messages = redis_client.lrange(chat_key, 0, -1)
-            for msg in raw_messages:
-                if msg.startswith("User: "):
-                    chat_history.append({"role": "user", "text": msg[6:]})
-                elif msg.startswith("Bot: "):
-                    chat_history.append({"role": "bot", "text": msg[5:]})
+        for msg in raw_messages:
+            if msg.startswith("User: "):
+                chat_history.append({"role": "user", "text": msg[6:]})
+            elif msg.startswith("Bot: "):
+                chat_history.append({"role": "bot", "text": msg[5:]})
         
         logging.info(f"✅ Session {session_id} marked for inactivity monitoring")
         
@@ -397,10 +568,11 @@ async def handle_user_data(request: Request, user_data: UserData):
 async def debug_chat_logs(session_id: str):
     """Debug endpoint to check chat logs in Redis"""
     try:
+        redis_client = get_redis()
         chat_key = f"session:{session_id}:chat"
-        exists = redis_client.exists(chat_key)
-        count = redis_client.llen(chat_key)
-        messages = redis_client.lrange(chat_key, 0, -1)
+        exists = await redis_client.exists(chat_key)
+        count = await redis_client.llen(chat_key)
+        messages = await redis_client.lrange(chat_key, 0, -1)
         return {
             "session_id": session_id,
             "chat_key": chat_key,
@@ -416,7 +588,7 @@ async def debug_chat_logs(session_id: str):
 async def download_chat(session_id: str):
     try:
         logging.info(f"📥 Download request for session: {session_id}")
-        pdf_path = generate_user_pdf(session_id)
+        pdf_path = await run_blocking("reporting", generate_user_pdf, session_id)
         if not pdf_path:
             logging.error(f"❌ No chat data found for session {session_id}")
             raise HTTPException(status_code=404, detail="No chat data found")
@@ -427,6 +599,9 @@ async def download_chat(session_id: str):
         return FileResponse(pdf_path, media_type="application/pdf", filename="Discussion_with_ReCircle.pdf")
     except HTTPException:
         raise
+    except StageBusyError as e:
+        logging.warning(f"🚦 /download_chat rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
     except Exception as e:
         logging.error(f"❌ Error downloading chat: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -435,6 +610,7 @@ async def download_chat(session_id: str):
 async def trigger_contact_intent(request: Request):
     """Immediately send data to backend when user clicks contact button"""
     try:
+        redis_client = get_redis()
         if "session_id" not in request.session:
             raise HTTPException(status_code=400, detail="Session not found")
         session_id = request.session["session_id"]
@@ -447,12 +623,14 @@ async def trigger_contact_intent(request: Request):
         
         # Mark as contact intent and send immediately
         lead_key = f"lead:{session_id}"
-        redis_client.hset(lead_key, "contact_clicked", "true")
-        redis_client.hset(lead_key, "contact_timestamp", datetime.utcnow().isoformat())
-        redis_client.hset(lead_key, "priority", "high")
+        await redis_client.hset(lead_key, mapping={
+            "contact_clicked": "true",
+            "contact_timestamp": datetime.utcnow().isoformat(),
+            "priority": "high"
+        })
         
         # Send PDF report immediately to backend team
-        finalize_session(session_id)
+        await run_blocking("reporting", finalize_session, session_id)
         
         # Return response for user
         contact_email = os.getenv("CONTACT_EMAIL", "info@recircle.in")
@@ -463,6 +641,9 @@ async def trigger_contact_intent(request: Request):
             "status": "success",
             "message": response_message
         }
+    except StageBusyError as e:
+        logging.warning(f"🚦 /trigger_contact_intent rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
     except Exception as e:
         logging.error(f"❌ Error triggering contact intent: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to send contact request")
@@ -470,33 +651,71 @@ async def trigger_contact_intent(request: Request):
 @app.post("/end_session")
 async def end_chat_session(request: Request):
     try:
+        redis_client = get_redis()
         if "session_id" not in request.session:
             raise HTTPException(status_code=400, detail="Session not found")
         session_id = request.session["session_id"]
 
         # Debug: Check chat logs before finalizing
         chat_key = f"session:{session_id}:chat"
-        chat_count = redis_client.llen(chat_key)
+        chat_count = await redis_client.llen(chat_key)
         logging.info(f"🔍 Finalizing session {session_id} with {chat_count} chat messages")
 
-        finalize_session(session_id)
+        await run_blocking("reporting", finalize_session, session_id)
         return {"status": "success", "message": f"PDF report generated and emailed for session {session_id}"}
+    except StageBusyError as e:
+        logging.warning(f"🚦 /end_session rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
     except Exception as e:
         logging.error(f"❌ Error finalizing session: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to finalize session")
 
 @app.post("/admin/clear_cache")
 async def clear_cache():
-    """Clear the hybrid search cache - admin endpoint"""
+    """Clear the hybrid search and retrieval caches - admin endpoint"""
     try:
         from hybrid_search import hybrid_search_engine
         hybrid_search_engine.clear_cache()
-        logging.info("✅ Hybrid search cache cleared successfully")
+        retrieval_cache.clear()
+        logging.info("✅ Hybrid search and retrieval caches cleared successfully")
         return {"status": "success", "message": "Cache cleared successfully"}
     except Exception as e:
         logging.error(f"❌ Error clearing cache: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to clear cache")
 
+@app.get("/admin/execution_stats")
+async def execution_stats():
+    """In-flight calls and limits for each execution pool - admin endpoint"""
+    return execution_pools.get_stats()
+
+@app.get("/admin/collections")
+async def collection_stats():
+    """Cached document count per ChromaDB collection - admin endpoint"""
+    return await run_blocking("retrieval", collection_registry.get_counts)
+
+@app.get("/admin/manifests")
+async def manifest_stats():
+    """Generation, document count, checksum and embedding models per database - admin endpoint"""
+    return {db_path: manifest_reader.read(db_path) for db_path in collection_registry.clients}
+
+@app.get("/admin/bm25")
+async def bm25_stats():
+    """Documents and terms in the BM25 lexical index - admin endpoint"""
+    if not BM25_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **await run_blocking("retrieval", bm25_index.get_stats)}
+
+@app.get("/admin/metrics")
+async def serving_metrics():
+    """Latency percentiles and counters - admin endpoint"""
+    return {
+        **metrics.get_stats(),
+        "embedding_cache": embedding_cache.get_stats(),
+        "canonical_answers": canonical_answers.get_stats(),
+        "retrieval_cache": retrieval_cache.get_stats(),
+        "index_generation": index_generation.get_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
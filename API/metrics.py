@@ -0,0 +1,70 @@
+"""
+In-process serving metrics
+Thread-safe counters and latency samples (kept in a bounded window) with percentile
+summaries, exposed through /admin/metrics. Safe to call from pool threads.
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+# Latency samples kept per metric
+LATENCY_WINDOW = 1000
+
+
+def _percentile(ordered, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Metrics:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._latencies: Dict[str, deque] = {}
+
+    def increment(self, name: str, amount: int = 1):
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] += amount
+
+    def record_latency(self, name: str, milliseconds: float):
+        """Store one latency sample"""
+        with self._lock:
+            if name not in self._latencies:
+                self._latencies[name] = deque(maxlen=self.window)
+            self._latencies[name].append(milliseconds)
+
+    def get_counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_stats(self) -> Dict:
+        """Counters plus p50/p95/p99 for every latency metric"""
+        with self._lock:
+            counters = dict(self._counters)
+            samples = {name: sorted(values) for name, values in self._latencies.items()}
+
+        latencies = {
+            name: {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 50), 1),
+                "p95_ms": round(_percentile(ordered, 95), 1),
+                "p99_ms": round(_percentile(ordered, 99), 1),
+            }
+            for name, ordered in samples.items()
+        }
+        return {"counters": counters, "latencies": latencies}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._latencies.clear()
+
+
+# Global instance
+metrics = Metrics()
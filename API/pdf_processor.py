@@ -1,7 +1,9 @@
 import os
 import sys
 import chromadb
-from sentence_transformers import SentenceTransformer
+from local_embeddings import get_local_model
+from index_generation import bump_generation
+from config import LOCAL_EMBEDDING_MODEL
 import pdfplumber
 
 def extract_pdf_text(pdf_path):
@@ -26,7 +28,7 @@ def chunk_text(text, chunk_size=280, overlap=50):
 def process_folder_pdfs(folder_path):
     # Initialize
     client = chromadb.PersistentClient(path="./chroma_db")
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    model = get_local_model()
     
     # Create collection
     try:
@@ -77,6 +79,7 @@ def process_folder_pdfs(folder_path):
             metadatas=all_metadata,
             ids=all_ids
         )
+        bump_generation("pdf_processor", os.path.abspath("./chroma_db"), "pdf_docs", LOCAL_EMBEDDING_MODEL)
         
         print(f"✅ Stored {len(all_chunks)} chunks from {len(pdf_files)} PDFs")
         
@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import json
-from collect_data import redis_client
+from redis_pool import get_sync_redis
 
 class ProactiveEngagement:
     def __init__(self):
@@ -82,10 +82,8 @@ class ProactiveEngagement:
     
     def track_user_journey(self, session_id: str, query: str, intent: str):
         """Track user journey for proactive engagement"""
-        if not redis_client:
-            return
-        
         try:
+            redis_client = get_sync_redis()
             journey_key = f"journey:{session_id}"
             existing_journey = redis_client.get(journey_key)
             
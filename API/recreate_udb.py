@@ -7,6 +7,7 @@ import chromadb
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from index_generation import bump_generation
 
 load_dotenv()
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
@@ -116,3 +117,6 @@ for i, item in enumerate(timeline_data):
 print(f"\n✓ UDB updated successfully!")
 print(f"✓ Total documents: {collection.count()}")
 print(f"✓ All documents use 768-dimensional embeddings")
+
+# Invalidate cached retrieval results in the API
+bump_generation("recreate_udb", UDB_PATH, "updated_db", "models/gemini-embedding-001")
@@ -0,0 +1,90 @@
+"""
+Shared Redis connections
+One redis.asyncio pool for the API's async code, plus a sync facade over a shared
+blocking pool for CLI scripts and code that runs on worker threads.
+Every module gets its client through get_redis() / get_sync_redis().
+"""
+
+import logging
+import redis
+import redis.asyncio as aioredis
+from config import (
+    REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD,
+    REDIS_MAX_CONNECTIONS, REDIS_SOCKET_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+_async_client = None
+_sync_client = None
+_sync_binary_client = None
+
+
+def _connection_kwargs(decode_responses: bool = True) -> dict:
+    """Connection settings shared by the async and sync pools"""
+    return {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "db": REDIS_DB,
+        "password": REDIS_PASSWORD,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        "health_check_interval": 30,
+        "decode_responses": decode_responses,
+    }
+
+
+def get_redis() -> aioredis.Redis:
+    """Async client backed by the shared connection pool"""
+    global _async_client
+    if _async_client is None:
+        pool = aioredis.ConnectionPool(**_connection_kwargs())
+        _async_client = aioredis.Redis(connection_pool=pool)
+        logger.info(f"✅ Async Redis pool created for {REDIS_HOST}:{REDIS_PORT}/{REDIS_DB} (max {REDIS_MAX_CONNECTIONS} connections)")
+    return _async_client
+
+
+def get_sync_redis() -> redis.Redis:
+    """Blocking client for CLI scripts and worker threads, backed by its own shared pool"""
+    global _sync_client
+    if _sync_client is None:
+        pool = redis.ConnectionPool(**_connection_kwargs())
+        _sync_client = redis.Redis(connection_pool=pool)
+        logger.info(f"✅ Sync Redis pool created for {REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
+    return _sync_client
+
+
+def get_sync_binary_redis() -> redis.Redis:
+    """Blocking client that returns raw bytes (for binary values such as embeddings)"""
+    global _sync_binary_client
+    if _sync_binary_client is None:
+        pool = redis.ConnectionPool(**_connection_kwargs(decode_responses=False))
+        _sync_binary_client = redis.Redis(connection_pool=pool)
+    return _sync_binary_client
+
+
+async def ping_redis() -> bool:
+    """Check connectivity at startup"""
+    try:
+        await get_redis().ping()
+        logger.info(f"✅ Redis reachable at {REDIS_HOST}:{REDIS_PORT}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Redis not reachable at {REDIS_HOST}:{REDIS_PORT}: {e}")
+        return False
+
+
+async def close_redis():
+    """Release pooled connections on shutdown"""
+    global _async_client, _sync_client, _sync_binary_client
+    if _async_client is not None:
+        await _async_client.connection_pool.disconnect()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.connection_pool.disconnect()
+        _sync_client = None
+    if _sync_binary_client is not None:
+        _sync_binary_client.connection_pool.disconnect()
+        _sync_binary_client = None
+    logger.info("🔌 Redis pools closed")
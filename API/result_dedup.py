@@ -0,0 +1,92 @@
+"""
+Near-duplicate filter for retrieved chunks
+The six databases overlap heavily, so the best results for a question are often the same
+passage stored in several databases (or in overlapping chunks of one PDF). find_best_answer
+joins its top results into the answer that refine_with_gemini puts in the prompt; picking
+them with select_distinct keeps the information and drops the repeats.
+
+Results are taken in rank order, skipping any whose embedding (returned by Chroma / the
+serving index with the neighbours) has cosine similarity >= DEDUP_SIMILARITY_THRESHOLD with
+one already taken. All pairwise similarities come from one NumPy matrix product. Results
+without an embedding (BM25 and timeline lookup hits) are compared by normalized text only.
+
+The DEDUP_WINDOW answer chunks are picked from the first DEDUP_CANDIDATES results, so a
+repeat in the top ranks is replaced by the next distinct result instead of shortening the
+answer. Only the DEDUP_CANDIDATES nearest results keep their embedding (trim_embeddings): the
+other vectors would only fill the retrieval cache. A result moved into the candidates by BM25
+fusion without its vector is compared by text.
+"""
+
+import logging
+import re
+from typing import Dict, List
+import numpy as np
+from config import DEDUP_SIMILARITY_THRESHOLD
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+# Results joined into the answer
+DEDUP_WINDOW = 3
+# Results select_distinct picks them from (repeats are replaced by the next distinct ones)
+DEDUP_CANDIDATES = DEDUP_WINDOW * 3
+
+
+def _normalized_text(document: str) -> str:
+    return " ".join(WORD_PATTERN.findall(document.lower()))
+
+
+def _similarity_matrix(results: List[Dict]):
+    """(cosine similarity matrix, row of each result or None) over the results that carry an embedding"""
+    rows = {}
+    vectors = []
+    for i, result in enumerate(results):
+        embedding = result.get('embedding')
+        if embedding is not None:
+            rows[i] = len(vectors)
+            vectors.append(embedding)
+    if len(vectors) < 2:
+        return None, {}
+    try:
+        matrix = np.asarray(vectors, dtype=np.float32)
+    except ValueError:  # mixed dimensions (should not happen within one search)
+        return None, {}
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    return matrix @ matrix.T, rows
+
+
+def trim_embeddings(results: List[Dict], window: int = DEDUP_CANDIDATES):
+    """Drop the embedding of every result except the `window` nearest ones (in place)"""
+    if len(results) <= window:
+        return
+    nearest = set(sorted(range(len(results)), key=lambda i: results[i]['distance'])[:window])
+    for i, result in enumerate(results):
+        if i not in nearest:
+            result.pop('embedding', None)
+
+
+def select_distinct(results: List[Dict], limit: int, threshold: float = DEDUP_SIMILARITY_THRESHOLD) -> List[Dict]:
+    """The first `limit` results, in order, that are not near-duplicates of an earlier pick"""
+    similarity, rows = _similarity_matrix(results)
+    selected: List[Dict] = []
+    selected_rows: List[int] = []
+    seen_texts = set()
+    dropped = 0
+    for i, result in enumerate(results):
+        text = _normalized_text(result['document'])
+        row = rows.get(i)
+        if text in seen_texts or (row is not None and selected_rows and similarity[row, selected_rows].max() >= threshold):
+            dropped += 1
+            continue
+        selected.append(result)
+        seen_texts.add(text)
+        if row is not None:
+            selected_rows.append(row)
+        if len(selected) == limit:
+            break
+    if dropped:
+        metrics.increment("dedup_dropped", dropped)
+        logger.info(f"🧹 Skipped {dropped} near-duplicate chunk(s) while picking the top {limit}")
+    return selected
@@ -0,0 +1,80 @@
+"""
+Retrieval result cache
+In-process LRU of the vector search stage of find_best_answer: the raw nearest-neighbour
+results and searched databases for a query embedding. A repeat (or near-identical)
+question skips the Chroma / serving index queries as well as the embedding call.
+
+The key is the embedding rounded to RETRIEVAL_CACHE_DECIMALS, the search flags that
+change which databases are queried (timeline, priority search, retrieval mode/backend,
+embedding backend) and the index generation. Writers bump the generation
+(index_generation.py) and the collection registry counts every re-open, so results from
+before a database change are never served. Hits and misses are counted in metrics.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_DECIMALS
+from metrics import metrics
+
+
+class RetrievalCache:
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE, decimals: int = RETRIEVAL_CACHE_DECIMALS):
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[List[Dict], List[str]]]" = OrderedDict()
+
+    def make_key(self, query_embedding: List[float], flags: Tuple, generation: Tuple) -> Tuple:
+        """Cache key: rounded embedding digest + search flags + index generation"""
+        quantized = np.round(np.asarray(query_embedding, dtype=np.float32), self.decimals) + 0.0  # -0.0 -> 0.0
+        digest = hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+        return digest, flags, generation
+
+    def get(self, key: Tuple) -> Optional[Tuple[List[Dict], List[str]]]:
+        """(results, searched_databases) copies, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            metrics.increment("retrieval_cache_miss")
+            return None
+        metrics.increment("retrieval_cache_hit")
+        results, searched_databases = entry
+        # Callers sort and annotate the results, so hand out copies
+        return [dict(r) for r in results], list(searched_databases)
+
+    def put(self, key: Tuple, results: List[Dict], searched_databases: List[str]):
+        entry = ([dict(r) for r in results], list(searched_databases))
+        with self._lock:
+            # Entries of older generations can no longer be hit; drop them first
+            generation = key[2]
+            stale = [k for k in self._entries if k[2] != generation] if len(self._entries) >= self.max_entries else []
+            for k in stale:
+                del self._entries[k]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        hits = metrics.get_counter("retrieval_cache_hit")
+        misses = metrics.get_counter("retrieval_cache_miss")
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+retrieval_cache = RetrievalCache()
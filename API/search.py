@@ -2,10 +2,23 @@ import chromadb
 import google.generativeai as genai
 import os
 import logging
-import csv
 import random
 from dotenv import load_dotenv
-from config import CHROMA_DB_PATHS, COLLECTIONS, UDB_PATH, DB_PRIORITY_ORDER, ENABLE_PRIORITY_SEARCH, EARLY_STOP_THRESHOLD, EARLY_STOP_THRESHOLD_TIMELINE
+from config import CHROMA_DB_PATHS, COLLECTIONS, UDB_PATH, DB_PRIORITY_ORDER, ENABLE_PRIORITY_SEARCH, EARLY_STOP_THRESHOLD, EARLY_STOP_THRESHOLD_TIMELINE, COLLECTION_REFRESH_INTERVAL, DB_MANIFEST_POLL_INTERVAL, RETRIEVAL_MODE, RETRIEVAL_BACKEND, BM25_ENABLED, BM25_FAST_PATH_ENABLED, BM25_MIN_SCORE, QUERY_EMBEDDING_BACKEND, LOCAL_EMBEDDING_FALLBACK, LOCAL_EARLY_STOP_THRESHOLD, LOCAL_DISTANCE_THRESHOLD, LOCAL_DISTANCE_THRESHOLD_TIMELINE, RETRIEVAL_CACHE_ENABLED, DEDUP_ENABLED, CANONICAL_ANSWERS_ENABLED
+from collection_registry import CollectionRegistry
+from bm25_index import BM25Index, is_decisive, reciprocal_rank_fusion
+from timeline_index import TimelineIndex, is_timeline_query as detect_timeline_query
+from execution_pools import get_fanout_executor
+from embedding_cache import embed_query
+from local_embeddings import embed_local_query, local_collections_map
+from serving_index import serving_index
+from metrics import metrics
+from faq_index import faq_index
+from keyword_matcher import keyword_matcher
+from retrieval_cache import retrieval_cache
+from index_generation import index_generation
+from result_dedup import select_distinct, trim_embeddings, DEDUP_WINDOW, DEDUP_CANDIDATES
+from canonical_answers import find_canonical_answer_by_embedding
 
 # Load environment variables
 load_dotenv()
@@ -23,25 +36,24 @@ for db_path in CHROMA_DB_PATHS:
     except Exception as e:
         logger.error(f"❌ Failed to connect to ChromaDB at {db_path}: {e}")
 
+# Collection handles are opened once and refreshed when a database changes on disk
+collection_registry = CollectionRegistry(clients, COLLECTIONS, DB_PRIORITY_ORDER, UDB_PATH, COLLECTION_REFRESH_INTERVAL, DB_MANIFEST_POLL_INTERVAL)
+
+# Parallel collections embedded with the local CPU model (see local_embeddings.py), opened on first use
+local_collection_registry = CollectionRegistry(clients, local_collections_map(), DB_PRIORITY_ORDER, UDB_PATH, COLLECTION_REFRESH_INTERVAL, DB_MANIFEST_POLL_INTERVAL)
+
+# (fiscal year, document type) -> UDB documents, for timeline deadline questions
+timeline_index = TimelineIndex(collection_registry)
+
+# Lexical index over the same collections plus data/knowledge.csv (persisted, refreshed per source)
+bm25_index = BM25Index(collection_registry)
+
 # Configure Gemini
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
 def get_collections():
-    """Get all available collections from all 5 databases"""
-    all_collections = {}
-    for db_path, client in clients.items():
-        for collection_name in COLLECTIONS.get(db_path, []):
-            try:
-                collection = client.get_collection(name=collection_name)
-                all_collections[f"{collection_name}@{db_path}"] = collection
-                logger.info(f"✅ Found collection '{collection_name}' with {collection.count()} documents from {db_path}")
-            except Exception as e:
-                logger.warning(f"Collection '{collection_name}' not found in {db_path}: {e}")
-
-    if not all_collections:
-        logger.error("No collections found. ChromaDB databases may be empty.")
-
-    return all_collections
+    """Get all available collections from all 5 databases (cached handles from the registry)"""
+    return collection_registry.get_collections()
 
 def get_recircle_info(query: str) -> str:
     """Get ReCircle company information based on query"""
@@ -109,68 +121,33 @@ def generate_related_questions(user_query: str, search_results: list = None, int
 def get_faq_questions(user_query: str, previous_suggestions: list = None) -> list:
     """Get related questions from FAQ CSV based on user query, excluding previous suggestions"""
     try:
-        faq_path = os.path.join(os.path.dirname(__file__), 'data', 'epr_faqs.csv')
-        if not os.path.exists(faq_path):
-            logger.warning(f"FAQ file not found: {faq_path}")
-            return []
-        
-        previous_suggestions = previous_suggestions or []
-        query_lower = user_query.lower()
-        query_words = set(query_lower.split())
-        
-        # Score each FAQ question based on keyword matches
-        scored_questions = []
-        
-        with open(faq_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                keywords = row.get('keywords', '').lower()
-                question = row.get('question', '')
-                
-                # Skip if question is same as user query or was previously suggested
-                if question.lower().strip() == query_lower.strip():
-                    continue
-                if question in previous_suggestions:
-                    continue
-                
-                # Calculate match score
-                keyword_words = set(keywords.split())
-                common_words = query_words.intersection(keyword_words)
-                score = len(common_words)
-                
-                if score > 0:
-                    scored_questions.append((question, score))
-        
-        # Sort by score (highest first) and get top 2 unique questions
-        scored_questions.sort(key=lambda x: x[1], reverse=True)
-        top_questions = [q[0] for q in scored_questions[:2]]
-        
-        if len(top_questions) >= 2:
-            return top_questions
-        
-        # If not enough matches, add high priority questions
-        with open(faq_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            high_priority = [row['question'] for row in reader 
-                           if row.get('priority') == 'high' 
-                           and row['question'] not in top_questions
-                           and row['question'] not in previous_suggestions
-                           and row['question'].lower().strip() != query_lower.strip()]
-            
-            needed = 2 - len(top_questions)
-            return top_questions + high_priority[:needed]
-    
+        # In-memory keyword index, reloaded when the CSV changes
+        return faq_index.related_questions(user_query, previous_suggestions)
     except Exception as e:
         logger.error(f"Error reading FAQ CSV: {e}")
         return []
 
+# Fallback question topics, checked in order (first match wins)
+FALLBACK_TOPIC_KEYWORDS = {
+    'registration': ['register', 'registration', 'how to register'],
+    'penalty': ['penalty', 'fine', 'non-compliance', 'violation'],
+    'certificate': ['certificate', 'credit', 'epr certificate'],
+    'target': ['target', 'obligation', 'fulfill', 'achieve'],
+    'deadline': ['deadline', 'timeline', 'when', 'date'],
+    'cost': ['cost', 'price', 'fee', 'expensive'],
+    'recircle': ['recircle', 'help', 'service provider', 'pro'],
+    'documents': ['document', 'paperwork', 'proof'],
+}
+keyword_matcher.register('fallback_topics', FALLBACK_TOPIC_KEYWORDS)
+
 def get_fallback_questions(user_query: str, previous_suggestions: list = None) -> list:
     """Generate contextual fallback questions based on user query, excluding previous suggestions"""
     previous_suggestions = previous_suggestions or []
     query_lower = user_query.lower()
     
     # Extract key topics from query
-    if any(word in query_lower for word in ['register', 'registration', 'how to register']):
+    topic = keyword_matcher.scan(query_lower).first('fallback_topics', FALLBACK_TOPIC_KEYWORDS)
+    if topic == 'registration':
         questions = [
             "What documents are needed for EPR registration?",
             "How long does EPR registration take?",
@@ -178,49 +155,49 @@ def get_fallback_questions(user_query: str, previous_suggestions: list = None) -
         ]
         filtered = [q for q in questions if q not in previous_suggestions]
         return filtered[:3] if filtered else questions[:2]
-    elif any(word in query_lower for word in ['penalty', 'fine', 'non-compliance', 'violation']):
+    elif topic == 'penalty':
         questions = [
             "What are EPR non-compliance penalties?",
             "How can I avoid EPR fines?",
             "How do I resolve penalty notices?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['certificate', 'credit', 'epr certificate']):
+    elif topic == 'certificate':
         questions = [
             "Where can I buy EPR certificates?",
             "What is the validity of EPR certificates?",
             "What is the cost of EPR certificates?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['target', 'obligation', 'fulfill', 'achieve']):
+    elif topic == 'target':
         questions = [
             "How to calculate my EPR target?",
             "Who will help me fulfill my EPR target?",
             "What happens if I don't meet EPR targets?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['deadline', 'timeline', 'when', 'date']):
+    elif topic == 'deadline':
         questions = [
             "What are the key EPR deadlines?",
             "When is the EPR annual return due?",
             "How often do I need to report under EPR?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['cost', 'price', 'fee', 'expensive']):
+    elif topic == 'cost':
         questions = [
             "How much does EPR compliance cost?",
             "What are the EPR registration fees?",
             "How can I reduce EPR compliance costs?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['recircle', 'help', 'service provider', 'pro']):
+    elif topic == 'recircle':
         questions = [
             "What services does ReCircle offer?",
             "How can ReCircle help with EPR compliance?",
             "Can ReCircle manage my entire EPR process?"
         ]
         return [q for q in questions if q not in previous_suggestions][:3]
-    elif any(word in query_lower for word in ['document', 'paperwork', 'proof']):
+    elif topic == 'documents':
         questions = [
             "What documents do I need for EPR registration?",
             "What proof is required for EPR compliance?",
@@ -250,31 +227,205 @@ def get_priority_ordered_collections(collections: dict, is_timeline_query: bool,
         List of dicts with collection info ordered by priority (newest first)
         Each dict contains: collection_key, collection_obj, priority, db_path, description, recency
     """
-    from config import DB_PRIORITY_ORDER, UDB_PATH
-
-    priority_ordered = []
+    # The ordering is precomputed by the registry; keep only the requested collections
+    return [
+        col_info for col_info in collection_registry.get_ordered(exclude_udb)
+        if col_info["collection_key"] in collections
+    ]
+
+# The near-duplicate filter compares the returned embeddings
+QUERY_INCLUDE = ["documents", "metadatas", "distances"] + (["embeddings"] if DEDUP_ENABLED else [])
+
+def _default_source(collection_name: str) -> str:
+    """Source label for chunks without a 'source' metadata field"""
+    if 'EPR-chatbot' in collection_name:
+        return 'EPR_Knowledge_Base'
+    elif 'EPRChatbot-1' in collection_name:
+        return 'EPR_Regulations'
+    elif 'FinalDB' in collection_name:
+        return 'EPR_Comprehensive_Database'
+    elif 'updated_db' in collection_name:
+        return 'EPR_Updated_Database'
+    return f'{collection_name}_documents'
+
+def _query_collection(col_info: dict, query_embedding: list) -> tuple:
+    """
+    Query one collection from the priority list.
+    Returns (results, best_distance); results is empty if the collection returned nothing.
+    """
+    collection_name = col_info["collection_key"]
+    results = col_info["collection_obj"].query(
+        query_embeddings=[query_embedding],
+        n_results=10,
+        include=QUERY_INCLUDE
+    )
+
+    collected = []
+    best_distance = float('inf')
+    if results['documents'][0]:
+        for i, doc in enumerate(results['documents'][0]):
+            metadata = results['metadatas'][0][i] if results['metadatas'] else {}
+            distance = results['distances'][0][i] if results['distances'] else 0
+
+            # Determine source
+            source = metadata.get('source', 'unknown')
+            if source == 'unknown' or not source:
+                source = _default_source(collection_name)
+
+            collected.append({
+                'document': doc,
+                'distance': distance,
+                'collection': collection_name,
+                'metadata': metadata,
+                'chunk_id': metadata.get('chunk_id', i),
+                'source': source,
+                'pdf_index': metadata.get('pdf_index', 0),
+                'db_priority': col_info["priority"],
+                'db_recency': col_info["recency"],
+                'embedding': results['embeddings'][0][i] if results.get('embeddings') is not None else None
+            })
+
+            # Track best distance in this database
+            if distance < best_distance:
+                best_distance = distance
+
+    return collected, best_distance
+
+def _accept_collection_results(col_info: dict, collected: list, best_distance: float,
+                               all_results: list, searched_databases: list, total: int,
+                               early_stop_threshold: float = EARLY_STOP_THRESHOLD) -> bool:
+    """Merge one database's results; returns True if the early-stop condition is met"""
+    if not collected:
+        return False
+
+    all_results.extend(collected)
+    searched_databases.append(col_info["db_path"])
+    recency = col_info["recency"]
+    logger.info(f"📚 Priority {col_info['priority']} ({recency}): Found {len(collected)} results from '{col_info['collection_key']}', best distance: {best_distance:.4f}")
+
+    # Early stopping logic (only if priority search enabled)
+    if ENABLE_PRIORITY_SEARCH and best_distance < early_stop_threshold:
+        remaining_dbs = total - len(searched_databases)
+        logger.info(f"✅ Early stop triggered! Found excellent match (distance: {best_distance:.4f} < threshold: {early_stop_threshold}) in {recency} database")
+        logger.info(f"🚫 Skipping {remaining_dbs} older databases")
+        return True
+    if ENABLE_PRIORITY_SEARCH:
+        logger.info(f"⏭️ No excellent match yet (best: {best_distance:.4f} >= threshold: {early_stop_threshold}), continuing to next database")
+    return False
+
+def search_collections_serial(ordered_collections: list, query_embedding: list,
+                              early_stop_threshold: float = EARLY_STOP_THRESHOLD) -> tuple:
+    """Query databases one at a time in priority order, stopping at the first excellent match"""
+    all_results = []
+    searched_databases = []
+    for col_info in ordered_collections:
+        try:
+            collected, best_distance = _query_collection(col_info, query_embedding)
+        except Exception as e:
+            logger.error(f"Error querying collection '{col_info['collection_key']}': {e}")
+            continue
+        if _accept_collection_results(col_info, collected, best_distance, all_results, searched_databases, len(ordered_collections), early_stop_threshold):
+            break  # Stop searching older databases
+    return all_results, searched_databases
 
-    for db_config in DB_PRIORITY_ORDER:
-        db_path = db_config["path"]
-        priority = db_config["priority"]
+def search_collections_parallel(ordered_collections: list, query_embedding: list,
+                                early_stop_threshold: float = EARLY_STOP_THRESHOLD) -> tuple:
+    """
+    Query all databases at once on the fan-out pool, then merge in priority order.
+    Produces the same results as search_collections_serial: once a database meets the
+    early-stop condition, lower-priority queries are cancelled (or ignored if running).
+    """
+    executor = get_fanout_executor()
+    futures = [executor.submit(_query_collection, col_info, query_embedding) for col_info in ordered_collections]
 
-        # Skip UDB if exclude_udb is True
-        if exclude_udb and db_path == UDB_PATH:
+    all_results = []
+    searched_databases = []
+    for index, (col_info, future) in enumerate(zip(ordered_collections, futures)):
+        try:
+            collected, best_distance = future.result()
+        except Exception as e:
+            logger.error(f"Error querying collection '{col_info['collection_key']}': {e}")
             continue
+        if _accept_collection_results(col_info, collected, best_distance, all_results, searched_databases, len(ordered_collections), early_stop_threshold):
+            for pending in futures[index + 1:]:
+                pending.cancel()
+            break
+    return all_results, searched_databases
+
+def search_serving_index(query_embedding: list, is_timeline_query: bool):
+    """(results, searched_databases) from the serving index, or None to query ChromaDB directly"""
+    if RETRIEVAL_BACKEND not in ("serving_index", "int8"):
+        return None
+    if not serving_index.is_available():
+        logger.warning(f"⚠️ RETRIEVAL_BACKEND={RETRIEVAL_BACKEND} but the serving index is not built - using ChromaDB")
+        return None
+    try:
+        results, searched_databases = serving_index.search(
+            query_embedding, timeline=is_timeline_query, quantized=RETRIEVAL_BACKEND == "int8"
+        )
+    except Exception as e:
+        logger.error(f"❌ Serving index search failed, using ChromaDB: {e}")
+        return None
+    logger.info(f"📦 Serving index ({RETRIEVAL_BACKEND}): {len(results)} results from {len(searched_databases)} database(s)")
+    return results, searched_databases
+
+def embed_for_search(user_query: str) -> tuple:
+    """
+    (query_embedding, registry) for QUERY_EMBEDDING_BACKEND. If the Gemini call fails and
+    the local collections are built, the query is embedded and searched locally instead.
+    """
+    if QUERY_EMBEDDING_BACKEND == "local":
+        metrics.increment("query_embedding_local")
+        return embed_local_query(user_query), local_collection_registry
+    try:
+        # Cached: repeated questions skip the Gemini round trip
+        return embed_query(user_query), collection_registry
+    except Exception as e:
+        if not LOCAL_EMBEDDING_FALLBACK or not local_collection_registry.get_ordered():
+            raise
+        logger.warning(f"⚠️ Gemini embedding failed ({e}) - falling back to local embeddings")
+        metrics.increment("query_embedding_local_fallback")
+        return embed_local_query(user_query), local_collection_registry
+
+def distance_thresholds(registry, is_timeline_query: bool) -> tuple:
+    """(early_stop, valid_match) distance thresholds for the embedding model behind the registry"""
+    if registry is local_collection_registry:
+        return LOCAL_EARLY_STOP_THRESHOLD, LOCAL_DISTANCE_THRESHOLD_TIMELINE if is_timeline_query else LOCAL_DISTANCE_THRESHOLD
+    return EARLY_STOP_THRESHOLD, 2.0 if is_timeline_query else 1.5
+
+def retrieval_cache_key(query_embedding: list, registry, is_timeline_query: bool) -> tuple:
+    """Retrieval cache key for this embedding, the flags that pick the databases, and the index generation"""
+    flags = (
+        "local" if registry is local_collection_registry else "gemini",
+        is_timeline_query, ENABLE_PRIORITY_SEARCH, RETRIEVAL_MODE, RETRIEVAL_BACKEND
+    )
+    # The registry re-opens changed databases first, so its counter covers writes it has picked up
+    return retrieval_cache.make_key(query_embedding, flags, (index_generation.read(), registry.current_generation()))
+
+def search_timeline_index(user_query: str) -> list:
+    """UDB documents for the query's fiscal year and document type (empty if unresolved)"""
+    try:
+        return timeline_index.lookup(user_query)
+    except Exception as e:
+        logger.error(f"❌ Timeline lookup failed: {e}")
+        return []
 
-        # Find collections that belong to this database
-        for collection_key, collection_obj in collections.items():
-            if db_path in collection_key:
-                priority_ordered.append({
-                    "collection_key": collection_key,
-                    "collection_obj": collection_obj,
-                    "priority": priority,
-                    "db_path": db_path,
-                    "description": db_config["description"],
-                    "recency": db_config["recency"]
-                })
+def search_lexical(user_query: str, is_timeline_query: bool) -> list:
+    """BM25 hits for the query (empty if disabled or the index is unavailable)"""
+    if not BM25_ENABLED:
+        return []
+    try:
+        return bm25_index.search(user_query, timeline=is_timeline_query)
+    except Exception as e:
+        logger.error(f"❌ BM25 search failed: {e}")
+        return []
 
-    return priority_ordered
+def _confidence(result: dict) -> float:
+    """Confidence from the vector distance, or a saturating BM25 score for lexical-only hits"""
+    if result.get('distance') is not None:
+        return round(1 - result['distance'], 4)
+    score = result.get('bm25_score') or 0.0
+    return round(score / (score + 10.0), 4)
 
 def find_best_answer(user_query: str, intent_result=None, previous_suggestions: list = None) -> dict:
     logger.info(f"🔍 Searching databases for query: {user_query[:100]}...")
@@ -282,7 +433,7 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
     
     # Check for timeline queries (2024-25, 2025-26) - use ONLY Updated_DB
     query_lower = user_query.lower()
-    is_timeline_query = any(year in query_lower for year in ['2024-25', '2024-2025', '2025-26', '2025-2026', 'fy 2024', 'fy 2025', 'fy2024', 'fy2025'])
+    is_timeline_query = detect_timeline_query(user_query)
     
     # Check for consultant/help queries and return ReCircle info directly
     is_consultant_query = any(word in query_lower for word in ['consultant', 'who can help', 'who will help', 'contact for epr', 'approach', 'service provider', 'expert'])
@@ -305,42 +456,89 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
             "source_info": {}
         }
 
-    # Generate query embedding using Gemini
-    try:
-        result = genai.embed_content(
-            model="models/gemini-embedding-001",
-            content=user_query,
-            task_type="retrieval_query",
-            output_dimensionality=768
-        )
-        query_embedding = result['embedding']
-        logger.info(f"📊 Generated query embedding (dim: {len(query_embedding)})")
-    except Exception as e:
-        logger.error(f"Error generating query embedding: {e}")
-        return {
-            "answer": "Error processing your query. Please try again.",
-            "suggestions": [],
-            "source_info": {}
-        }
+    # Timeline deadline questions: keyed (fiscal year, document type) lookup in the UDB
+    keyed_results = search_timeline_index(user_query) if is_timeline_query else []
+
+    # BM25 needs no embedding; a decisive hit answers short keyword queries on its own
+    lexical_results = [] if keyed_results else search_lexical(user_query, is_timeline_query)
+    use_fast_path = BM25_FAST_PATH_ENABLED and is_decisive(user_query, lexical_results)
+    skip_vector_search = bool(keyed_results) or use_fast_path
+
+    # Generate query embedding (Gemini, or the local model and its collections)
+    query_embedding = None
+    registry = collection_registry
+    if not skip_vector_search:
+        try:
+            query_embedding, registry = embed_for_search(user_query)
+            logger.info(f"📊 Generated query embedding (dim: {len(query_embedding)})")
+        except Exception as e:
+            logger.error(f"Error generating query embedding: {e}")
+            return {
+                "answer": "Error processing your query. Please try again.",
+                "suggestions": [],
+                "source_info": {}
+            }
+
+    # Known questions phrased differently get the curated answer. The bank holds Gemini vectors,
+    # so this reuses the Gemini embedding above and is skipped for local-model embeddings.
+    if CANONICAL_ANSWERS_ENABLED and not is_timeline_query and query_embedding is not None and registry is collection_registry:
+        canonical = find_canonical_answer_by_embedding(user_query, query_embedding, intent_result, previous_suggestions)
+        if canonical is not None:
+            return canonical
+
+    # Local-model (cosine) distances need their own cut-offs, including after a Gemini failure
+    early_stop_threshold, distance_threshold = distance_thresholds(registry, is_timeline_query)
 
     all_results = []
     best_db_distance = float('inf')  # Track best distance found so far
     searched_databases = []  # Track which databases were searched
 
+    # Repeat questions reuse the neighbours found for the same embedding and index generation
+    cache_key = cached = None
+    if not skip_vector_search and RETRIEVAL_CACHE_ENABLED:
+        cache_key = retrieval_cache_key(query_embedding, registry, is_timeline_query)
+        cached = retrieval_cache.get(cache_key)
+
+    # The consolidated serving index (if enabled) answers timeline and regular queries in one pass.
+    # It holds Gemini vectors, so local-model queries always go to the local collections.
+    if skip_vector_search or cached is not None or registry is not collection_registry:
+        indexed = None
+    else:
+        indexed = search_serving_index(query_embedding, is_timeline_query)
+    if keyed_results:
+        logger.info(f"📅 Timeline lookup: {len(keyed_results)} UDB document(s) - skipping vector search")
+        metrics.increment("timeline_lookup_hit")
+        all_results = keyed_results
+        searched_databases = [UDB_PATH]
+
+    elif use_fast_path:
+        logger.info(f"⚡ Lexical fast path: BM25 {lexical_results[0]['bm25_score']} from '{lexical_results[0]['collection']}' - skipping vector search")
+        metrics.increment("bm25_fast_path")
+        all_results = lexical_results
+        searched_databases = list(dict.fromkeys(r['db_path'] for r in lexical_results))
+
+    elif cached is not None:
+        logger.info(f"♻️ Retrieval cache hit: {len(cached[0])} results from {len(cached[1])} database(s)")
+        all_results, searched_databases = cached
+
+    elif indexed is not None:
+        all_results, searched_databases = indexed
+
     # If timeline query, search ONLY UDB (unchanged behavior)
-    if is_timeline_query:
+    elif is_timeline_query:
         logger.info("⏰ Timeline query detected (2024-25/2025-26) - searching ONLY UDB")
-        target_collections = {k: v for k, v in collections.items() if UDB_PATH in k}
+        target_collections = registry.get_collections(db_path=UDB_PATH)
         if not target_collections:
             logger.warning("UDB collection not found")
-            target_collections = collections  # Fallback to all
+            target_collections = registry.get_collections()  # Fallback to all
 
         # Query UDB collections (traditional sequential search)
         for collection_name, collection in target_collections.items():
             try:
                 results = collection.query(
                     query_embeddings=[query_embedding],
-                    n_results=10
+                    n_results=10,
+                    include=QUERY_INCLUDE
                 )
 
                 if results['documents'][0]:
@@ -355,7 +553,8 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
                             'metadata': metadata,
                             'chunk_id': metadata.get('chunk_id', i),
                             'source': source,
-                            'pdf_index': metadata.get('pdf_index', 0)
+                            'pdf_index': metadata.get('pdf_index', 0),
+                            'embedding': results['embeddings'][0][i] if results.get('embeddings') is not None else None
                         })
 
                     searched_databases.append(UDB_PATH)
@@ -369,12 +568,13 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
 
         # Get collections excluding UDB, ordered by priority
         if ENABLE_PRIORITY_SEARCH:
-            ordered_collections = get_priority_ordered_collections(collections, is_timeline_query, exclude_udb=True)
+            ordered_collections = registry.get_ordered(exclude_udb=True)
             logger.info(f"🔍 Priority search enabled - will search {len(ordered_collections)} databases in order of recency")
         else:
             # Fallback to old behavior if priority search disabled
             logger.info("⚠️ Priority search disabled - using traditional all-database search")
-            target_collections = {k: v for k, v in collections.items() if UDB_PATH not in k}
+            udb_collections = registry.get_collections(db_path=UDB_PATH)
+            target_collections = {k: v for k, v in registry.get_collections().items() if k not in udb_collections}
             ordered_collections = [
                 {
                     "collection_key": k,
@@ -388,74 +588,19 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
             ]
 
         # Search databases in priority order with early stopping
-        for col_info in ordered_collections:
-            collection_name = col_info["collection_key"]
-            collection = col_info["collection_obj"]
-            db_path = col_info["db_path"]
-            priority = col_info["priority"]
-            recency = col_info["recency"]
-
-            try:
-                # Query this collection
-                results = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=10
-                )
-
-                if results['documents'][0]:
-                    db_best_distance = float('inf')
-
-                    for i, doc in enumerate(results['documents'][0]):
-                        metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                        distance = results['distances'][0][i] if results['distances'] else 0
-
-                        # Determine source
-                        source = metadata.get('source', 'unknown')
-                        if source == 'unknown' or not source:
-                            if 'EPR-chatbot' in collection_name:
-                                source = 'EPR_Knowledge_Base'
-                            elif 'EPRChatbot-1' in collection_name:
-                                source = 'EPR_Regulations'
-                            elif 'FinalDB' in collection_name:
-                                source = 'EPR_Comprehensive_Database'
-                            elif 'updated_db' in collection_name:
-                                source = 'EPR_Updated_Database'
-                            else:
-                                source = f'{collection_name}_documents'
-
-                        all_results.append({
-                            'document': doc,
-                            'distance': distance,
-                            'collection': collection_name,
-                            'metadata': metadata,
-                            'chunk_id': metadata.get('chunk_id', i),
-                            'source': source,
-                            'pdf_index': metadata.get('pdf_index', 0),
-                            'db_priority': priority,
-                            'db_recency': recency
-                        })
-
-                        # Track best distance in this database
-                        if distance < db_best_distance:
-                            db_best_distance = distance
-
-                    searched_databases.append(db_path)
-                    logger.info(f"📚 Priority {priority} ({recency}): Found {len(results['documents'][0])} results from '{collection_name}', best distance: {db_best_distance:.4f}")
+        if RETRIEVAL_MODE == "parallel":
+            all_results, searched_databases = search_collections_parallel(ordered_collections, query_embedding, early_stop_threshold)
+        else:
+            all_results, searched_databases = search_collections_serial(ordered_collections, query_embedding, early_stop_threshold)
 
-                    # Early stopping logic (only if priority search enabled)
-                    if ENABLE_PRIORITY_SEARCH and db_best_distance < EARLY_STOP_THRESHOLD:
-                        remaining_dbs = len(ordered_collections) - len(searched_databases)
-                        logger.info(f"✅ Early stop triggered! Found excellent match (distance: {db_best_distance:.4f} < threshold: {EARLY_STOP_THRESHOLD}) in {recency} database")
-                        logger.info(f"🚫 Skipping {remaining_dbs} older databases")
-                        break  # Stop searching older databases
-                    else:
-                        if ENABLE_PRIORITY_SEARCH:
-                            logger.info(f"⏭️ No excellent match yet (best: {db_best_distance:.4f} >= threshold: {EARLY_STOP_THRESHOLD}), continuing to next database")
+        logger.info(f"🏁 Search completed. Searched {len(searched_databases)} database(s): {[db.split('/')[-1] for db in searched_databases]}")
 
-            except Exception as e:
-                logger.error(f"Error querying collection '{collection_name}': {e}")
+    # Vectors are kept only where the near-duplicate filter can use them, so cache entries stay small
+    if DEDUP_ENABLED and not skip_vector_search and cached is None:
+        trim_embeddings(all_results)
 
-        logger.info(f"🏁 Search completed. Searched {len(searched_databases)} database(s): {[db.split('/')[-1] for db in searched_databases]}")
+    if cache_key is not None and cached is None and all_results:
+        retrieval_cache.put(cache_key, all_results, searched_databases)
     
     if not all_results:
         logger.warning("No results found for query")
@@ -465,14 +610,18 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
             "source_info": {}
         }
     
-    # Sort by distance (lower is better)
-    all_results.sort(key=lambda x: x['distance'])
-
-    # Apply distance threshold - more lenient for timeline queries
-    distance_threshold = 2.0 if is_timeline_query else 1.5
+    # Apply distance threshold (set above) - more lenient for timeline queries
+    if keyed_results:
+        filtered_results = all_results
+    elif use_fast_path:
+        # Already ranked by BM25 score (the top hit always clears the minimum)
+        filtered_results = [r for r in all_results if r['bm25_score'] >= BM25_MIN_SCORE]
+    else:
+        # Sort by distance (lower is better)
+        all_results.sort(key=lambda x: x['distance'])
 
-    # Filter results by distance threshold
-    filtered_results = [r for r in all_results if r['distance'] <= distance_threshold]
+        # Filter results by distance threshold
+        filtered_results = [r for r in all_results if r['distance'] <= distance_threshold]
     
     # Check if valid match found
     valid_match_found = len(filtered_results) > 0
@@ -496,6 +645,14 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
             "source_info": {"valid_match": False}
         }
     
+    # Reciprocal rank fusion with BM25 so exact keyword matches the embedding ranked low still surface
+    retrieval = "timeline_lookup" if keyed_results else "lexical" if use_fast_path else "vector"
+    fusable = [r for r in lexical_results if r['bm25_score'] >= BM25_MIN_SCORE]
+    if fusable and not use_fast_path:
+        filtered_results = reciprocal_rank_fusion(filtered_results, fusable)
+        retrieval = "fused"
+        metrics.increment("bm25_fused")
+
     # Get best result
     best_result = filtered_results[0]
 
@@ -507,9 +664,11 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
         # For deadline queries: return only the best result to avoid repetition
         answer = filtered_results[0]['document'].strip()
     else:
-        # Combine top results for comprehensive answer (for non-deadline queries)
+        # Combine top results for comprehensive answer (for non-deadline queries),
+        # leaving out chunks that repeat one already included (the databases overlap)
+        top_results = select_distinct(filtered_results[:DEDUP_CANDIDATES], DEDUP_WINDOW) if DEDUP_ENABLED else filtered_results[:3]
         combined_text = ""
-        for result in filtered_results[:3]:
+        for result in top_results:
             doc = result['document']
             if len(doc) > 30:
                 if combined_text:
@@ -536,10 +695,11 @@ def find_best_answer(user_query: str, intent_result=None, previous_suggestions:
             "collection_name": best_result['collection'],
             "chunk_id": best_result['chunk_id'],
             "source_document": best_result['source'],
-            "confidence_score": round(1 - best_result['distance'], 4),
+            "confidence_score": _confidence(best_result),
             "valid_match": True,
             "db_priority": best_result.get('db_priority', 'N/A'),
             "db_recency": best_result.get('db_recency', 'unknown'),
+            "retrieval": retrieval,
             "searched_databases": len(searched_databases) if 'searched_databases' in locals() else 'N/A'
         }
     }
@@ -13,6 +13,7 @@ class SearchMode(Enum):
     SEQUENTIAL_HYBRID = "sequential_hybrid"  # DB first (40%), then LLM (60%) if needed
     LLM_ONLY = "llm_only"      # 100% LLM knowledge
     DB_ONLY = "db_only"        # 100% Database search
+    ONE_SHOT_HYBRID = "one_shot_hybrid"  # DB first, then one structured LLM call (rewrite + answer + filter)
 
 class SearchConfig:
     def __init__(self):
@@ -0,0 +1,379 @@
+"""
+Unified read-only serving index
+Consolidates every configured ChromaDB collection into one directory of NumPy arrays,
+builds/<build id>/, written once and never modified:
+
+    embeddings.npy      float32 (rows x dim), memory-mapped at query time
+    sq_norms.npy        float32 squared norm per row (for l2 distances)
+    embeddings_int8.npy int8 scalar-quantized copy of embeddings.npy (one scale per row)
+    int8_scales.npy     float32 dequantization scale per row
+    records.json        document, metadata, chunk_id and source per row
+    meta.json           collections (row range, db_path, priority, recency, distance space),
+                        build id and time and the on-disk version of each database
+
+The CURRENT file next to builds/ names the build being served. A build is published by
+atomically replacing CURRENT, so a process that loads the index always reads every file
+from the same build (the previous build is kept for processes still loading it).
+
+Rows are stored contiguously per collection in DB_PRIORITY_ORDER, so one matrix-vector
+product scores the whole corpus and the serial early-stop walk over databases becomes a
+walk over precomputed per-collection top-k lists.
+
+Build (after any database update):
+    python serving_index.py build
+    python serving_index.py build --output /path/to/serving_index
+
+Serve: set RETRIEVAL_BACKEND=serving_index (float32 scoring) or RETRIEVAL_BACKEND=int8.
+The int8 backend keeps only the quantized matrix in RAM (a quarter of the float size),
+scores every row with it, then re-scores the best INT8_RESCORE_CANDIDATES rows of each
+collection with their exact float32 vectors, read from the memory-mapped embeddings.npy.
+The index reloads itself when CURRENT changes.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import (
+    DB_PRIORITY_ORDER, COLLECTIONS, UDB_PATH, ENABLE_PRIORITY_SEARCH,
+    EARLY_STOP_THRESHOLD, SERVING_INDEX_DIR, INT8_RESCORE_CANDIDATES
+)
+from collection_registry import get_db_version
+from index_generation import bump_generation
+
+logger = logging.getLogger(__name__)
+
+# Results kept per collection, same as collection.query(n_results=10)
+RESULTS_PER_COLLECTION = 10
+BUILD_BATCH_SIZE = 1000
+# Rows dequantized at a time when scoring with the int8 matrix (bounds temporary memory)
+INT8_SCORE_CHUNK_ROWS = 4096
+# Pointer to the build being served, and the builds kept (current + previous)
+CURRENT_POINTER = "CURRENT"
+BUILDS_DIR = "builds"
+KEEP_BUILDS = 2
+
+
+def _distance_space(collection) -> str:
+    """Chroma's distance function for a collection (l2 unless configured otherwise)"""
+    metadata = getattr(collection, "metadata", None) or {}
+    return metadata.get("hnsw:space", "l2")
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row scalar quantization: row ~= int8_row * scale"""
+    max_abs = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(matrix.shape[0], dtype=np.float32)
+    scales = (max_abs / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def build_index(output_dir: str = SERVING_INDEX_DIR) -> Dict:
+    """Read every configured collection and write the serving index to output_dir"""
+    import chromadb
+    from search import _default_source
+
+    build_id = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+    build_dir = os.path.join(output_dir, BUILDS_DIR, build_id)
+    os.makedirs(build_dir)
+    embeddings: List[np.ndarray] = []
+    records: List[Dict] = []
+    collections_meta: List[Dict] = []
+    db_versions: Dict[str, List[int]] = {}
+
+    for db_config in sorted(DB_PRIORITY_ORDER, key=lambda c: c["priority"]):
+        db_path = db_config["path"]
+        db_versions[db_path] = list(get_db_version(db_path))
+        try:
+            client = chromadb.PersistentClient(path=db_path)
+        except Exception as e:
+            logger.error(f"❌ Failed to open {db_path}: {e}")
+            continue
+
+        for collection_name in COLLECTIONS.get(db_path, []):
+            try:
+                collection = client.get_collection(name=collection_name)
+            except Exception as e:
+                logger.warning(f"Collection '{collection_name}' not found in {db_path}: {e}")
+                continue
+
+            collection_key = f"{collection_name}@{db_path}"
+            start_row = len(records)
+            total = collection.count()
+            for offset in range(0, total, BUILD_BATCH_SIZE):
+                batch = collection.get(
+                    include=["embeddings", "documents", "metadatas"],
+                    limit=BUILD_BATCH_SIZE,
+                    offset=offset
+                )
+                for i, doc in enumerate(batch["documents"]):
+                    metadata = batch["metadatas"][i] or {}
+                    source = metadata.get("source", "unknown")
+                    if source == "unknown" or not source:
+                        source = "Updated_DB_Timeline" if db_path == UDB_PATH else _default_source(collection_key)
+                    records.append({
+                        "document": doc,
+                        "metadata": metadata,
+                        "chunk_id": metadata.get("chunk_id", offset + i),
+                        "source": source,
+                        "pdf_index": metadata.get("pdf_index", 0),
+                    })
+                embeddings.append(np.asarray(batch["embeddings"], dtype=np.float32))
+
+            collections_meta.append({
+                "collection_key": collection_key,
+                "db_path": db_path,
+                "priority": db_config["priority"],
+                "description": db_config["description"],
+                "recency": db_config["recency"],
+                "space": _distance_space(collection),
+                "start": start_row,
+                "end": len(records),
+            })
+            logger.info(f"✅ Indexed {len(records) - start_row} rows from '{collection_key}'")
+
+    matrix = np.concatenate(embeddings) if embeddings else np.zeros((0, 768), dtype=np.float32)
+    # Nothing reads build_dir until CURRENT points at it
+    np.save(os.path.join(build_dir, "embeddings.npy"), matrix)
+    np.save(os.path.join(build_dir, "sq_norms.npy"), np.einsum("ij,ij->i", matrix, matrix).astype(np.float32))
+    quantized, scales = quantize_int8(matrix)
+    np.save(os.path.join(build_dir, "embeddings_int8.npy"), quantized)
+    np.save(os.path.join(build_dir, "int8_scales.npy"), scales)
+    with open(os.path.join(build_dir, "records.json"), "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+    meta = {
+        "build_id": build_id,
+        "built_at": datetime.utcnow().isoformat(),
+        "rows": int(matrix.shape[0]),
+        "dimensions": int(matrix.shape[1]),
+        "collections": collections_meta,
+        "db_versions": db_versions,
+    }
+    with open(os.path.join(build_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Publish: one atomic rename switches every file at once
+    pointer_tmp = os.path.join(output_dir, f"{CURRENT_POINTER}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(build_id)
+    os.replace(pointer_tmp, os.path.join(output_dir, CURRENT_POINTER))
+    _remove_old_builds(output_dir)
+    bump_generation("serving_index")
+
+    logger.info(f"📦 Serving index build {build_id} written to {output_dir}: {meta['rows']} rows, {len(collections_meta)} collections")
+    return meta
+
+
+def _remove_old_builds(output_dir: str):
+    """Delete all but the newest KEEP_BUILDS builds (processes still mapping them keep their open files)"""
+    builds_root = os.path.join(output_dir, BUILDS_DIR)
+    for build_id in sorted(os.listdir(builds_root))[:-KEEP_BUILDS]:
+        shutil.rmtree(os.path.join(builds_root, build_id), ignore_errors=True)
+        logger.info(f"🗑️ Removed old serving index build {build_id}")
+
+
+def distances_from_dots(dots: np.ndarray, query: np.ndarray, sq_norms: np.ndarray, space: str) -> np.ndarray:
+    """Distances with the same definitions Chroma uses for each hnsw:space"""
+    if space == "cosine":
+        query_norm = float(np.sqrt(query @ query)) or 1.0
+        row_norms = np.sqrt(sq_norms)
+        row_norms[row_norms == 0] = 1.0
+        return 1.0 - dots / (row_norms * query_norm)
+    if space == "ip":
+        return 1.0 - dots
+    return sq_norms + float(query @ query) - 2.0 * dots
+
+
+class ServingIndex:
+    def __init__(self, index_dir: str = SERVING_INDEX_DIR):
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+        # (inode, mtime) of CURRENT when it was last read
+        self._pointer_version = None
+        # Swapped as a whole on reload so in-flight searches keep a consistent view
+        self._state: Optional[Dict] = None
+
+    def _pointer_path(self) -> str:
+        return os.path.join(self.index_dir, CURRENT_POINTER)
+
+    def is_available(self) -> bool:
+        return os.path.exists(self._pointer_path())
+
+    def _load_state(self, build_id: str) -> Dict:
+        """Read meta/records, memory-map the float vectors and load the int8 copy (if built) of one build"""
+        build_dir = os.path.join(self.index_dir, BUILDS_DIR, build_id)
+        with open(os.path.join(build_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(build_dir, "records.json"), encoding="utf-8") as f:
+            records = json.load(f)
+        int8_path = os.path.join(build_dir, "embeddings_int8.npy")
+        has_int8 = os.path.exists(int8_path)
+        return {
+            "meta": meta,
+            "records": records,
+            "embeddings": np.load(os.path.join(build_dir, "embeddings.npy"), mmap_mode="r"),
+            "sq_norms": np.load(os.path.join(build_dir, "sq_norms.npy")),
+            "embeddings_int8": np.load(int8_path) if has_int8 else None,
+            "int8_scales": np.load(os.path.join(build_dir, "int8_scales.npy")) if has_int8 else None,
+            "collections": sorted(meta["collections"], key=lambda c: c["priority"]),
+        }
+
+    def _ensure_loaded(self) -> Dict:
+        """Map the index on first use and again whenever CURRENT points at a new build"""
+        try:
+            stat = os.stat(self._pointer_path())
+        except OSError:
+            raise FileNotFoundError(f"Serving index not built: {self.index_dir} (run: python serving_index.py build)")
+        pointer_version = (stat.st_ino, stat.st_mtime_ns)
+        if pointer_version == self._pointer_version:
+            return self._state
+
+        with self._lock:
+            if pointer_version != self._pointer_version:
+                with open(self._pointer_path(), encoding="utf-8") as f:
+                    build_id = f.read().strip()
+                if self._state is None or self._state["meta"].get("build_id") != build_id:
+                    state = self._load_state(build_id)
+                    meta = state["meta"]
+                    logger.info(f"📦 Serving index build {build_id} loaded: {meta['rows']} rows from {len(state['collections'])} collections (built {meta['built_at']})")
+                    for db_path, version in meta.get("db_versions", {}).items():
+                        if list(get_db_version(db_path)) != version:
+                            logger.warning(f"⚠️ Serving index is older than {db_path} - rebuild with: python serving_index.py build")
+                    self._state = state
+                self._pointer_version = pointer_version
+            return self._state
+
+    @staticmethod
+    def _top_k(state: Dict, collection: Dict, query: np.ndarray, dots: np.ndarray, offset: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and distances of a collection's best RESULTS_PER_COLLECTION rows"""
+        start, end = collection["start"], collection["end"]
+        if end <= start:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        distances = distances_from_dots(dots[start - offset:end - offset], query, state["sq_norms"][start:end], collection["space"])
+        k = min(RESULTS_PER_COLLECTION, end - start)
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates])]
+        return candidates + start, distances[candidates]
+
+    @staticmethod
+    def _int8_dots(state: Dict, query: np.ndarray, offset: int, end: int) -> np.ndarray:
+        """Approximate dot products of rows offset..end from the int8 matrix"""
+        quantized, scales = state["embeddings_int8"], state["int8_scales"]
+        dots = np.empty(end - offset, dtype=np.float32)
+        for chunk_start in range(offset, end, INT8_SCORE_CHUNK_ROWS):
+            chunk_end = min(chunk_start + INT8_SCORE_CHUNK_ROWS, end)
+            dots[chunk_start - offset:chunk_end - offset] = quantized[chunk_start:chunk_end].astype(np.float32) @ query
+        return dots * scales[offset:end]
+
+    @classmethod
+    def _rescored_top_k(cls, state: Dict, collection: Dict, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist a collection's rows by int8 distance, then rank the shortlist by exact float distance"""
+        start, end = collection["start"], collection["end"]
+        if end <= start:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        approx_dots = cls._int8_dots(state, query, start, end)
+        approx = distances_from_dots(approx_dots, query, state["sq_norms"][start:end], collection["space"])
+        shortlist_size = min(max(INT8_RESCORE_CANDIDATES, RESULTS_PER_COLLECTION), end - start)
+        shortlist = np.sort(np.argpartition(approx, shortlist_size - 1)[:shortlist_size]) + start
+
+        # Only the shortlisted float rows are read from the memory-mapped matrix
+        exact_dots = state["embeddings"][shortlist] @ query
+        distances = distances_from_dots(exact_dots, query, state["sq_norms"][shortlist], collection["space"])
+        k = min(RESULTS_PER_COLLECTION, shortlist_size)
+        best = np.argpartition(distances, k - 1)[:k]
+        best = best[np.argsort(distances[best])]
+        return shortlist[best], distances[best]
+
+    @staticmethod
+    def _result(state: Dict, row: int, distance: float, collection: Dict) -> Dict:
+        record = state["records"][row]
+        return {
+            'document': record["document"],
+            'distance': float(distance),
+            'collection': collection["collection_key"],
+            'metadata': record["metadata"],
+            'chunk_id': record["chunk_id"],
+            'source': record["source"],
+            'pdf_index': record["pdf_index"],
+            'db_priority': collection["priority"],
+            'db_recency': collection["recency"],
+            'embedding': state["embeddings"][row]  # row of the memory-mapped matrix, for the near-duplicate filter
+        }
+
+    def search(self, query_embedding: List[float], timeline: bool = False,
+               quantized: bool = False) -> Tuple[List[Dict], List[str]]:
+        """
+        Same contract as search.search_collections_serial: (results, searched_databases).
+        Timeline queries search only the UDB; regular queries walk the non-UDB collections
+        in priority order and stop after the first one whose best distance beats
+        EARLY_STOP_THRESHOLD. With quantized=True candidates come from the int8 matrix and
+        are re-scored in float32, so reported distances are exact.
+        """
+        state = self._ensure_loaded()
+        if quantized and state["embeddings_int8"] is None:
+            raise FileNotFoundError(f"Serving index has no int8 copy: {self.index_dir} (rebuild with: python serving_index.py build)")
+        query = np.asarray(query_embedding, dtype=np.float32)
+        collections = [c for c in state["collections"] if (c["db_path"] == UDB_PATH) == timeline]
+        if timeline and not collections:
+            logger.warning("UDB collection not found")
+            collections = state["collections"]  # Fallback to all
+        if not collections:
+            return [], []
+
+        # One matrix-vector product scores every candidate row (collections are contiguous).
+        # numpy has no BLAS kernel for int8, so the quantized path scores one collection at
+        # a time instead and skips the collections after an early stop.
+        offset = min(c["start"] for c in collections)
+        end = max(c["end"] for c in collections)
+        dots = None if quantized else state["embeddings"][offset:end] @ query
+
+        all_results = []
+        searched_databases = []
+        for collection in collections:
+            if quantized:
+                rows, distances = self._rescored_top_k(state, collection, query)
+            else:
+                rows, distances = self._top_k(state, collection, query, dots, offset)
+            if rows.size == 0:
+                continue
+            all_results.extend(self._result(state, int(row), distance, collection) for row, distance in zip(rows, distances))
+            searched_databases.append(collection["db_path"])
+            if not timeline and ENABLE_PRIORITY_SEARCH and distances[0] < EARLY_STOP_THRESHOLD:
+                logger.info(f"✅ Early stop at priority {collection['priority']} ({collection['recency']}), best distance {distances[0]:.4f}")
+                break
+        return all_results, searched_databases
+
+    def get_stats(self) -> Dict:
+        state = self._ensure_loaded()
+        meta = state["meta"]
+        return {
+            "build_id": meta.get("build_id"),
+            "rows": meta.get("rows", 0),
+            "dimensions": meta.get("dimensions", 0),
+            "built_at": meta.get("built_at"),
+            "embedding_bytes": int(state["embeddings"].nbytes),
+            "int8_bytes": int(state["embeddings_int8"].nbytes + state["int8_scales"].nbytes) if state["embeddings_int8"] is not None else 0,
+        }
+
+
+# Global instance
+serving_index = ServingIndex()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build the consolidated serving index")
+    parser.add_argument("command", choices=["build"], help="build: read all ChromaDBs and write the index")
+    parser.add_argument("--output", default=SERVING_INDEX_DIR, help="Index directory")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    meta = build_index(args.output)
+    print(f"Built {meta['rows']} rows x {meta['dimensions']} dims in {time.perf_counter() - start:.1f}s -> {args.output}")
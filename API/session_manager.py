@@ -2,7 +2,6 @@ import os
 import json
 import uuid
 import time
-import redis
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -10,6 +9,7 @@ from email.mime.application import MIMEApplication
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from dotenv import load_dotenv
+from redis_pool import get_sync_redis
 
 # --- Load environment variables ---
 load_dotenv()
@@ -23,11 +23,9 @@ RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 BACKEND_TEAM_EMAIL = os.getenv("BACKEND_TEAM_EMAIL", RECIPIENT_EMAIL)
 PDF_OUTPUT_DIR = os.getenv("PDF_OUTPUT_DIR", "/tmp")
 
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", 300))
 
-r = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
+r = get_sync_redis()
 
 
 # --- Create a new chat session ---
@@ -1,8 +1,10 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from collect_data import redis_client
+from redis_pool import get_redis
 from session_reporter import finalize_session
+from execution_pools import run_blocking
+from state_backend import holds_lease
 
 logging.basicConfig(level=logging.INFO)
 
@@ -15,14 +17,15 @@ async def monitor_sessions():
     while True:
         try:
             await asyncio.sleep(60)  # Check every minute
-            
-            if not redis_client:
+
+            # With several workers only the lease holder scans sessions
+            if not await holds_lease("session_monitor"):
                 continue
             
-            # Get all session keys
-            session_keys = redis_client.keys("session:*")
+            redis_client = get_redis()
             
-            for key in session_keys:
+            # Iterate session keys incrementally (SCAN does not block Redis like KEYS)
+            async for key in redis_client.scan_iter(match="session:*", count=500):
                 key_str = key.decode() if isinstance(key, bytes) else key
                 if ":chat" in key_str or ":finalized" in key_str or ":thankyou_sent" in key_str or ":monitor_inactivity" in key_str or ":backend_sent" in key_str or ":suggestions" in key_str:
                     continue
@@ -30,13 +33,13 @@ async def monitor_sessions():
                 session_id = key_str.split(":")[1]
 
                 # Check key type before calling hgetall
-                key_type = redis_client.type(key_str)
+                key_type = await redis_client.type(key_str)
                 if isinstance(key_type, bytes):
                     key_type = key_type.decode()
                 if key_type != "hash":
                     continue
 
-                session_data = redis_client.hgetall(key_str)
+                session_data = await redis_client.hgetall(key_str)
                 
                 if not session_data:
                     continue
@@ -47,13 +50,13 @@ async def monitor_sessions():
                 
                 # Check if session has chat messages
                 chat_key = f"session:{session_id}:chat"
-                chat_count = redis_client.llen(chat_key)
+                chat_count = await redis_client.llen(chat_key)
                 if chat_count == 0:
                     continue
                 
                 # Check if already finalized
                 finalized_key = f"session:{session_id}:finalized"
-                if redis_client.exists(finalized_key):
+                if await redis_client.exists(finalized_key):
                     continue
                 
                 last_interaction = session_data.get(b"last_interaction") or session_data.get("last_interaction")
@@ -72,15 +75,15 @@ async def monitor_sessions():
                         logging.info(f"⏰ Session {session_id} inactive for {time_diff:.1f} minutes - generating PDF")
                         
                         # Mark as finalized FIRST to prevent duplicate processing
-                        redis_client.setex(finalized_key, 86400 * 7, "true")
+                        await redis_client.setex(finalized_key, 86400 * 7, "true")
                         
                         # Generate and send PDF
-                        finalize_session(session_id)
+                        await run_blocking("reporting", finalize_session, session_id)
                         
                         logging.info(f"✅ PDF generated and sent for session {session_id}")
                     elif time_diff > 60:
                         # Mark old sessions as finalized without generating PDF
-                        redis_client.setex(finalized_key, 86400 * 7, "true")
+                        await redis_client.setex(finalized_key, 86400 * 7, "true")
                         
                 except Exception as e:
                     logging.error(f"❌ Error processing session {session_id}: {e}")
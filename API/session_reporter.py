@@ -1,5 +1,4 @@
 import os
-import redis
 import smtplib
 import logging
 import json
@@ -12,18 +11,11 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.utils import simpleSplit
+from redis_pool import get_sync_redis
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Redis setup
-redis_client = redis.StrictRedis(
-    host=os.getenv("REDIS_HOST", "localhost"),
-    port=int(os.getenv("REDIS_PORT", 6379)),
-    db=0,
-    decode_responses=True
-)
-
 # SMTP
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
@@ -44,6 +36,7 @@ def fetch_full_session(session_id: str):
     session_key = f"session:{session_id}"
     lead_key = f"lead:{session_id}"
     chat_key = f"session:{session_id}:chat"
+    redis_client = get_sync_redis()
     
     session_info = redis_client.hgetall(session_key)
     lead_info = redis_client.hgetall(lead_key)
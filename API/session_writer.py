@@ -0,0 +1,90 @@
+"""
+Session write path
+Persists everything that changes after an answer (chat log, last_interaction,
+backend notification reset, new suggestions) in a single Redis round trip.
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import List, Optional
+from dotenv import load_dotenv
+from redis_pool import get_redis
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+SESSION_EXPIRY_DAYS = int(os.getenv("SESSION_EXPIRY_DAYS", 30))
+
+# KEYS: chat, session hash, backend_sent flag, suggestions
+# ARGV: user message, bot message, expiry seconds, timestamp, suggestions...
+# Returns {message count, 1 if the backend notification flag was reset}
+SAVE_TURN_SCRIPT = """
+local count = redis.call('RPUSH', KEYS[1], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+local resumed = 0
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('HSET', KEYS[2], 'last_interaction', ARGV[4])
+    resumed = redis.call('DEL', KEYS[3])
+end
+if #ARGV > 4 then
+    redis.call('RPUSH', KEYS[4], unpack(ARGV, 5))
+    redis.call('EXPIRE', KEYS[4], ARGV[3])
+end
+return {count, resumed}
+"""
+
+
+class SessionWriter:
+    def __init__(self, expiry_seconds: int):
+        self.expiry_seconds = expiry_seconds
+        self._script = None
+        self._script_client = None
+
+    def _get_script(self):
+        """Register the Lua script once per Redis client (EVALSHA after the first call)"""
+        client = get_redis()
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(SAVE_TURN_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    async def save_turn(self, session_id: str, user_text: str, bot_text: str,
+                        suggestions: Optional[List[str]] = None) -> int:
+        """Store one Q&A turn and its suggestions; returns the new chat message count"""
+        # "Connect me to ReCircle" is static and never counts as a previous suggestion
+        new_suggestions = [s for s in (suggestions or []) if s != "Connect me to ReCircle"]
+
+        keys = [
+            f"session:{session_id}:chat",
+            f"session:{session_id}",
+            f"session:{session_id}:backend_sent",
+            f"session:{session_id}:suggestions",
+        ]
+        args = [
+            f"User: {user_text}",
+            f"Bot: {bot_text}",
+            self.expiry_seconds,
+            datetime.utcnow().isoformat(),
+            *new_suggestions,
+        ]
+
+        chat_count, resumed = await self._get_script()(keys=keys, args=args)
+        logger.info(f"💬 Saved chat turn for session {session_id}. Total messages: {chat_count}")
+        if resumed:
+            logger.info(f"🔄 User resumed - reset backend notification flag for session {session_id}")
+        return int(chat_count)
+
+    async def mark_for_monitoring(self, session_id: str) -> List[str]:
+        """Flag the session for inactivity monitoring and return its raw chat log"""
+        now = datetime.utcnow().isoformat()
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(f"session:{session_id}:monitor_inactivity", now, ex=self.expiry_seconds)
+            pipe.hset(f"session:{session_id}", "last_interaction", now)
+            pipe.lrange(f"session:{session_id}:chat", 0, -1)
+            _, _, raw_messages = await pipe.execute()
+        return raw_messages
+
+
+# Global instance
+session_writer = SessionWriter(SESSION_EXPIRY_DAYS * 86400)
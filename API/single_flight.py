@@ -0,0 +1,149 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one in-flight computation: the first caller
+(leader) runs it, everyone else awaits the leader's result.
+Within a worker this is an asyncio task per key. With SINGLE_FLIGHT_REDIS=true the
+leader also takes a Redis lock and publishes its result, so other workers wait for it
+instead of repeating the search. If the leader fails or takes too long, waiters fall
+back to computing the answer themselves.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from config import (
+    SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_REDIS, SINGLE_FLIGHT_LOCK_TTL,
+    SINGLE_FLIGHT_WAIT_TIMEOUT, SINGLE_FLIGHT_POLL_INTERVAL, SINGLE_FLIGHT_RESULT_TTL
+)
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if this leader still owns it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", text.lower()).strip().rstrip("?!. ")
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True, use_redis: bool = False, lock_ttl: float = 60,
+                 wait_timeout: float = 45, poll_interval: float = 0.1, result_ttl: float = 10):
+        self.enabled = enabled
+        self.use_redis = use_redis
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run func() once per key among concurrent callers.
+        Returns (result, shared) where shared is True if another caller computed it.
+        """
+        if not self.enabled:
+            return await func(), False
+
+        task = self._calls.get(key)
+        if task is not None:
+            metrics.increment("single_flight_shared_local")
+            logger.info(f"🤝 Joining in-flight search for: {key[:80]}")
+            result, _ = await asyncio.shield(task)
+            return result, True
+
+        task = asyncio.ensure_future(self._execute(key, func))
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        # Shielded so a cancelled leader request does not cancel the waiters' computation
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every caller has gone away
+
+    async def _execute(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        if not self.use_redis:
+            metrics.increment("single_flight_leader")
+            return await func(), False
+
+        from redis_pool import get_redis
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        lock_key = f"singleflight:lock:{digest}"
+        result_key = f"singleflight:result:{digest}"
+        token = str(uuid.uuid4())
+
+        try:
+            client = get_redis()
+            is_leader = await client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.warning(f"⚠️ Single-flight lock unavailable, searching locally: {e}")
+            metrics.increment("single_flight_leader")
+            return await func(), False
+
+        if is_leader:
+            metrics.increment("single_flight_leader")
+            try:
+                result = await func()
+                try:
+                    await client.set(result_key, json.dumps(result, default=str), px=int(self.result_ttl * 1000))
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not publish single-flight result: {e}")
+                return result, False
+            finally:
+                try:
+                    await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not release single-flight lock: {e}")
+
+        result = await self._wait_for_result(client, lock_key, result_key)
+        if result is not None:
+            metrics.increment("single_flight_shared_redis")
+            logger.info(f"🤝 Reused another worker's search for: {key[:80]}")
+            return result, True
+
+        logger.info(f"⌛ No result from the leading worker, searching locally: {key[:80]}")
+        metrics.increment("single_flight_fallback")
+        return await func(), False
+
+    async def _wait_for_result(self, client, lock_key: str, result_key: str):
+        """Poll for the leader's published result until its lock disappears or we time out"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        try:
+            while loop.time() < deadline:
+                raw = await client.get(result_key)
+                if raw is not None:
+                    return json.loads(raw)
+                if not await client.exists(lock_key):
+                    # The leader publishes before releasing, so check once more
+                    raw = await client.get(result_key)
+                    return json.loads(raw) if raw is not None else None
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning(f"⚠️ Single-flight wait failed: {e}")
+        return None
+
+
+# Global instance
+single_flight = SingleFlight(
+    enabled=SINGLE_FLIGHT_ENABLED,
+    use_redis=SINGLE_FLIGHT_REDIS,
+    lock_ttl=SINGLE_FLIGHT_LOCK_TTL,
+    wait_timeout=SINGLE_FLIGHT_WAIT_TIMEOUT,
+    poll_interval=SINGLE_FLIGHT_POLL_INTERVAL,
+    result_ttl=SINGLE_FLIGHT_RESULT_TTL,
+)
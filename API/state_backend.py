@@ -0,0 +1,218 @@
+"""
+Pluggable conversation state
+Bounded lists (context window, conversation history) and bounded caches (answer cache)
+behind one interface, stored either in process memory or in Redis.
+Pick the backend with STATE_BACKEND=memory|redis. Redis is required when running
+more than one uvicorn worker or container, so every worker sees the same state.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config import STATE_BACKEND, STATE_KEY_PREFIX, MEMORY_STATE_MAX_KEYS, MONITOR_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Extend a lease only if this worker still owns it
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class InMemoryStateBackend:
+    """Process-local state. Fast, but only correct with a single worker."""
+
+    def __init__(self, max_keys: int = MEMORY_STATE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._lists: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, items)
+        self._caches: Dict[str, OrderedDict] = {}  # namespace -> key -> (expires_at, value)
+
+    @staticmethod
+    def _expiry(ttl: Optional[int]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    @staticmethod
+    def _expired(expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at <= time.time()
+
+    def list_append(self, key: str, item: Dict, max_len: int, ttl: Optional[int] = None):
+        """Append an item, keep only the newest max_len items and refresh the TTL"""
+        with self._lock:
+            entry = self._lists.pop(key, None)
+            items = [] if entry is None or self._expired(entry[0]) else entry[1]
+            items = (items + [item])[-max_len:]
+            self._lists[key] = (self._expiry(ttl), items)
+            while len(self._lists) > self.max_keys:
+                self._lists.popitem(last=False)
+
+    def list_get(self, key: str) -> List[Dict]:
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry is None:
+                return []
+            if self._expired(entry[0]):
+                del self._lists[key]
+                return []
+            return [dict(item) for item in entry[1]]
+
+    def list_update_last(self, key: str, item: Dict):
+        """Replace the newest item (no-op if the list is empty or missing)"""
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry and entry[1] and not self._expired(entry[0]):
+                entry[1][-1] = item
+
+    def delete(self, key: str):
+        with self._lock:
+            self._lists.pop(key, None)
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            cache = self._caches.get(namespace)
+            if not cache or key not in cache:
+                return None
+            expires_at, value = cache[key]
+            if self._expired(expires_at):
+                del cache[key]
+                return None
+            return value
+
+    def cache_set(self, namespace: str, key: str, value: Any, max_size: int, ttl: Optional[int] = None) -> bool:
+        """Store a value; evicts the oldest entry when full. Returns True if something was evicted."""
+        with self._lock:
+            cache = self._caches.setdefault(namespace, OrderedDict())
+            cache.pop(key, None)
+            evicted = False
+            while len(cache) >= max_size:
+                cache.popitem(last=False)
+                evicted = True
+            cache[key] = (self._expiry(ttl), value)
+            return evicted
+
+    def cache_clear(self, namespace: str):
+        with self._lock:
+            self._caches.pop(namespace, None)
+
+    def cache_size(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._caches.get(namespace, {}))
+
+    async def acquire_lease(self, name: str, owner: str, ttl: int) -> bool:
+        """Only one process exists, so it always holds every lease"""
+        return True
+
+
+class RedisStateBackend:
+    """Shared state in Redis (JSON values). Safe with any number of workers."""
+
+    def __init__(self, prefix: str = STATE_KEY_PREFIX):
+        self.prefix = prefix
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    @staticmethod
+    def _client():
+        from redis_pool import get_sync_redis
+        return get_sync_redis()
+
+    def list_append(self, key: str, item: Dict, max_len: int, ttl: Optional[int] = None):
+        redis_key = self._key("list", key)
+        pipe = self._client().pipeline(transaction=True)
+        pipe.rpush(redis_key, json.dumps(item, default=str))
+        pipe.ltrim(redis_key, -max_len, -1)
+        if ttl:
+            pipe.expire(redis_key, ttl)
+        pipe.execute()
+
+    def list_get(self, key: str) -> List[Dict]:
+        return [json.loads(raw) for raw in self._client().lrange(self._key("list", key), 0, -1)]
+
+    def list_update_last(self, key: str, item: Dict):
+        try:
+            self._client().lset(self._key("list", key), -1, json.dumps(item, default=str))
+        except Exception as e:
+            # ResponseError when the list expired between read and write
+            logger.debug(f"State list {key} not updated: {e}")
+
+    def delete(self, key: str):
+        self._client().delete(self._key("list", key))
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        raw = self._client().get(self._key("cache", namespace, key))
+        return json.loads(raw) if raw is not None else None
+
+    def cache_set(self, namespace: str, key: str, value: Any, max_size: int, ttl: Optional[int] = None) -> bool:
+        """Entries are plain keys; a sorted set by insertion time drives oldest-first eviction"""
+        client = self._client()
+        index_key = self._key("cache", namespace, "__index__")
+        pipe = client.pipeline(transaction=True)
+        pipe.set(self._key("cache", namespace, key), json.dumps(value, default=str), ex=ttl or None)
+        pipe.zadd(index_key, {key: time.time()})
+        pipe.zcard(index_key)
+        size = pipe.execute()[-1]
+
+        overflow = size - max_size
+        if overflow <= 0:
+            return False
+        oldest = client.zpopmin(index_key, overflow)
+        if oldest:
+            client.delete(*[self._key("cache", namespace, member) for member, _ in oldest])
+        return True
+
+    def cache_clear(self, namespace: str):
+        client = self._client()
+        index_key = self._key("cache", namespace, "__index__")
+        members = client.zrange(index_key, 0, -1)
+        keys = [self._key("cache", namespace, member) for member in members] + [index_key]
+        client.delete(*keys)
+
+    def cache_size(self, namespace: str) -> int:
+        return self._client().zcard(self._key("cache", namespace, "__index__"))
+
+    async def acquire_lease(self, name: str, owner: str, ttl: int) -> bool:
+        """Take or renew a named lease; True while this owner holds it"""
+        from redis_pool import get_redis
+        client = get_redis()
+        lease_key = self._key("lease", name)
+        if await client.set(lease_key, owner, nx=True, ex=ttl):
+            return True
+        renewed = await client.eval(RENEW_LEASE_SCRIPT, 1, lease_key, owner, ttl)
+        return bool(renewed)
+
+
+_backend = None
+
+# Identifies this worker process when taking leases
+WORKER_ID = str(uuid.uuid4())
+
+
+def get_state_backend():
+    """Backend selected by STATE_BACKEND (created on first use)"""
+    global _backend
+    if _backend is None:
+        if STATE_BACKEND == "redis":
+            _backend = RedisStateBackend()
+        else:
+            if STATE_BACKEND != "memory":
+                logger.warning(f"⚠️ Unknown STATE_BACKEND '{STATE_BACKEND}' - using in-memory state")
+            _backend = InMemoryStateBackend()
+        logger.info(f"🗄️ Conversation state backend: {type(_backend).__name__}")
+    return _backend
+
+
+async def holds_lease(name: str) -> bool:
+    """True if this worker should run the named singleton job (e.g. a background monitor)"""
+    try:
+        return await get_state_backend().acquire_lease(name, WORKER_ID, MONITOR_LEASE_SECONDS)
+    except Exception as e:
+        logger.error(f"❌ Could not check lease '{name}': {e}")
+        return False
@@ -0,0 +1,121 @@
+"""
+UDB timeline lookup index
+Maps (fiscal year, document type) to UDB documents using the "year" and "type" metadata
+written by update_udb.py / recreate_udb.py, e.g. ("2024-25", "annual_return_deadline").
+
+Timeline deadline questions ("ARF deadline for FY 2024-25") are answered by a keyed
+lookup with no embedding call; anything the lookup cannot resolve unambiguously falls
+back to the vector search over UDB. The index is rebuilt when the UDB changes on disk.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from config import UDB_PATH, DB_MANIFEST_POLL_INTERVAL
+from collection_registry import get_db_version
+
+logger = logging.getLogger(__name__)
+
+# Substrings that route a query to the UDB (shared by main.py, search.py and llm_refiner.py)
+TIMELINE_MARKERS = ['2024-25', '2024-2025', '2025-26', '2025-2026', 'fy 2024', 'fy 2025', 'fy2024', 'fy2025']
+
+# "2024-25", "2024-2025", "2024–25", "2024/25" (bare "FY 2025" is ambiguous and not resolved)
+FISCAL_YEAR_PATTERN = re.compile(r"\b(20\d{2})\s*[-–—/]\s*(?:20)?(\d{2})\b")
+
+# Question wording -> UDB "type" metadata, checked in order (first match wins)
+DOC_TYPE_KEYWORDS = [
+    ("quarterly_obligations", ['quarter', 'quarterly', 'q1', 'q2', 'q3', 'q4']),
+    ("annual_return_deadline", ['annual return', 'annual report', 'arf', 'deadline', 'last date',
+                                'due date', 'due', 'when', 'return', 'file', 'filing']),
+]
+
+
+def is_timeline_query(text: str) -> bool:
+    """True if the query names one of the fiscal years held in the UDB"""
+    query_lower = text.lower()
+    return any(marker in query_lower for marker in TIMELINE_MARKERS)
+
+
+def parse_fiscal_year(text: str) -> Optional[str]:
+    """The fiscal year in text as "YYYY-YY", or None if there is none or several"""
+    years = set()
+    for start, end in FISCAL_YEAR_PATTERN.findall(text):
+        if (int(start) + 1) % 100 == int(end):
+            years.add(f"{start}-{end}")
+    return years.pop() if len(years) == 1 else None
+
+
+def detect_doc_type(text: str) -> Optional[str]:
+    query_lower = text.lower()
+    for doc_type, keywords in DOC_TYPE_KEYWORDS:
+        if any(re.search(rf"\b{re.escape(keyword)}\b", query_lower) for keyword in keywords):
+            return doc_type
+    return None
+
+
+class TimelineIndex:
+    def __init__(self, registry, udb_path: str = UDB_PATH, refresh_interval: float = DB_MANIFEST_POLL_INTERVAL):
+        self.registry = registry
+        self.udb_path = udb_path
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._last_check = 0.0
+        # (fiscal_year, doc_type) -> result dicts, swapped as a whole on rebuild
+        self._entries: Dict[Tuple[str, str], List[Dict]] = {}
+
+    def _build(self) -> Dict[Tuple[str, str], List[Dict]]:
+        entries = defaultdict(list)
+        for collection_key, collection in self.registry.get_collections(db_path=self.udb_path).items():
+            batch = collection.get(include=["documents", "metadatas"])
+            rows = sorted(zip(batch["ids"], batch["documents"], batch["metadatas"]), key=lambda row: row[0])
+            for doc_id, doc, metadata in rows:
+                metadata = metadata or {}
+                fiscal_year = parse_fiscal_year(str(metadata.get("year", "")))
+                doc_type = metadata.get("type")
+                if not doc or not fiscal_year or not doc_type:
+                    continue
+                entries[(fiscal_year, doc_type)].append({
+                    'document': doc,
+                    'distance': 0.0,  # exact keyed match
+                    'collection': collection_key,
+                    'metadata': metadata,
+                    'chunk_id': metadata.get('chunk_id', doc_id),
+                    'source': metadata.get('source', 'Updated_DB_Timeline'),
+                    'pdf_index': metadata.get('pdf_index', 0),
+                    'db_priority': 1,
+                    'db_recency': 'latest'
+                })
+        return dict(entries)
+
+    def _ensure_fresh(self) -> Dict[Tuple[str, str], List[Dict]]:
+        """Build on first use, then rebuild when the UDB's on-disk version changes"""
+        now = time.monotonic()
+        if self._version is not None and now - self._last_check < self.refresh_interval:
+            return self._entries
+        with self._lock:
+            self._last_check = now
+            version = get_db_version(self.udb_path)
+            if version != self._version:
+                self._entries = self._build()
+                self._version = version
+                logger.info(f"📅 Timeline index built: {sum(len(v) for v in self._entries.values())} UDB documents "
+                            f"under {len(self._entries)} (year, type) keys")
+        return self._entries
+
+    def lookup(self, query: str) -> List[Dict]:
+        """UDB documents for the query's fiscal year and document type (empty if either is unclear)"""
+        fiscal_year = parse_fiscal_year(query)
+        doc_type = detect_doc_type(query)
+        if not fiscal_year or not doc_type:
+            return []
+        results = self._ensure_fresh().get((fiscal_year, doc_type), [])
+        return [dict(result) for result in results]
+
+    def get_keys(self) -> Dict[str, int]:
+        """Document count per "year/type" key"""
+        return {f"{year}/{doc_type}": len(docs) for (year, doc_type), docs in sorted(self._ensure_fresh().items())}
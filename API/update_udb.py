@@ -2,6 +2,7 @@ import chromadb
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from index_generation import bump_generation
 
 load_dotenv()
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
@@ -68,3 +69,6 @@ for i, item in enumerate(timeline_data):
     print(f"[OK] Added: {item['metadata']['year']} - {item['metadata']['type']}")
 
 print(f"\n[OK] UDB updated! Total documents: {collection.count()}")
+
+# Invalidate cached retrieval results in the API
+bump_generation("update_udb", UDB_PATH, "Updated_DB", "models/text-embedding-004")